@@ -0,0 +1,53 @@
+"""station telemetry
+
+Revision ID: 3f6b8d21a5c7
+Revises: e8a15d7c2f90
+Create Date: 2026-10-18 12:08:17.530642
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b8d21a5c7'
+down_revision: Union[str, None] = 'e8a15d7c2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('station_reading',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('station_id', sa.UUID(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('power_kw', sa.Float(), nullable=False),
+    sa.Column('energy_kwh', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_station_reading_station_recorded_at', 'station_reading', ['station_id', 'recorded_at'], unique=False)
+    op.create_table('station_telemetry_rollup',
+    sa.Column('station_id', sa.UUID(), nullable=False),
+    sa.Column('resolution', sa.String(length=2), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('power_sum_kw', sa.Float(), nullable=False),
+    sa.Column('power_max_kw', sa.Float(), nullable=False),
+    sa.Column('energy_kwh', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['station_id'], ['station.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('station_id', 'resolution', 'bucket_start')
+    )
+    op.create_index('ix_station_telemetry_rollup_resolution_bucket', 'station_telemetry_rollup', ['resolution', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_station_telemetry_rollup_resolution_bucket', table_name='station_telemetry_rollup')
+    op.drop_table('station_telemetry_rollup')
+    op.drop_index('ix_station_reading_station_recorded_at', table_name='station_reading')
+    op.drop_table('station_reading')
@@ -0,0 +1,32 @@
+"""station coordinates
+
+Revision ID: 4c8e1f6a2b95
+Revises: 7a4c2e9b1d36
+Create Date: 2026-10-18 16:42:09.318554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e1f6a2b95'
+down_revision: Union[str, None] = '7a4c2e9b1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable: existing stations have no known coordinates and are left
+    # out of nearby searches until they are set
+    op.add_column('station', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('station', sa.Column('longitude', sa.Float(), nullable=True))
+    op.create_index('ix_station_latitude_longitude', 'station', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_station_latitude_longitude', table_name='station')
+    op.drop_column('station', 'longitude')
+    op.drop_column('station', 'latitude')
@@ -0,0 +1,39 @@
+"""station status transition
+
+Revision ID: 5b2d9e41c7a3
+Revises: acc61053a1e1
+Create Date: 2026-10-18 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2d9e41c7a3'
+down_revision: Union[str, None] = 'acc61053a1e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('station_status_transition',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('station_id', sa.UUID(), nullable=False),
+    sa.Column('target_status', postgresql.ENUM('ACTIVE', 'INACTIVE', name='stationstatus', create_type=False), nullable=False),
+    sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['station_id'], ['station.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_station_status_transition_due_at'), 'station_status_transition', ['due_at'], unique=False)
+    op.create_index(op.f('ix_station_status_transition_station_id'), 'station_status_transition', ['station_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_station_status_transition_station_id'), table_name='station_status_transition')
+    op.drop_index(op.f('ix_station_status_transition_due_at'), table_name='station_status_transition')
+    op.drop_table('station_status_transition')
@@ -0,0 +1,57 @@
+"""station status history
+
+Revision ID: 7a4c2e9b1d36
+Revises: 3f6b8d21a5c7
+Create Date: 2026-10-18 13:21:44.806713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4c2e9b1d36'
+down_revision: Union[str, None] = '3f6b8d21a5c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Earlier status history is unknown: existing stations start their
+    # current status interval now
+    op.add_column('station', sa.Column('status_since', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_table('station_status_event',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('station_id', sa.UUID(), nullable=False),
+    sa.Column('from_status', postgresql.ENUM('ACTIVE', 'INACTIVE', name='stationstatus', create_type=False), nullable=True),
+    sa.Column('to_status', postgresql.ENUM('ACTIVE', 'INACTIVE', name='stationstatus', create_type=False), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['station_id'], ['station.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_station_status_event_station_changed_at', 'station_status_event', ['station_id', 'changed_at'], unique=False)
+    op.create_table('station_availability_rollup',
+    sa.Column('station_id', sa.UUID(), nullable=False),
+    sa.Column('resolution', sa.String(length=2), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('active_seconds', sa.Float(), nullable=False),
+    sa.Column('inactive_seconds', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['station_id'], ['station.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('station_id', 'resolution', 'bucket_start')
+    )
+    op.create_index('ix_station_availability_rollup_resolution_bucket', 'station_availability_rollup', ['resolution', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_station_availability_rollup_resolution_bucket', table_name='station_availability_rollup')
+    op.drop_table('station_availability_rollup')
+    op.drop_index('ix_station_status_event_station_changed_at', table_name='station_status_event')
+    op.drop_table('station_status_event')
+    op.drop_column('station', 'status_since')
@@ -0,0 +1,33 @@
+"""table version
+
+Revision ID: 9e7c3f2a8d14
+Revises: 5b2d9e41c7a3
+Create Date: 2026-10-18 10:03:55.917204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e7c3f2a8d14'
+down_revision: Union[str, None] = '5b2d9e41c7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table_version = op.create_table('table_version',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_version, [{'name': 'station', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('table_version')
@@ -0,0 +1,96 @@
+"""convert apscheduler jobs
+
+Revision ID: a7e3d5c9f0b2
+Revises: f2a9c4e6b1d3
+Create Date: 2026-10-18 19:20:41.880213
+
+Status changes scheduled through the former APScheduler SQLAlchemy job
+store are pickled in apscheduler_jobs; they are moved to
+station_status_transition so the transition engine applies them. Jobs that
+cannot be converted are left in place and reported.
+"""
+import logging
+import pickle
+import uuid
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3d5c9f0b2'
+down_revision: Union[str, None] = 'f2a9c4e6b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger(f"alembic.runtime.migration.{revision}")
+
+STATUS_CHANGE_FUNC = "app.core.scheduler:scheduled_status_change"
+STATUSES = {"active": "ACTIVE", "inactive": "INACTIVE"}
+
+jobs = sa.table(
+    'apscheduler_jobs',
+    sa.column('id', sa.String),
+    sa.column('next_run_time', sa.Float),
+    sa.column('job_state', sa.LargeBinary),
+)
+
+
+def _transition(job_state: bytes):
+    """(station_id, target status name) of a status change job, else None"""
+    try:
+        state = pickle.loads(job_state)
+    except Exception:
+        return None
+    if state.get("func") != STATUS_CHANGE_FUNC or len(state.get("args", ())) != 2:
+        return None
+    station_id, status = state["args"]
+    status = STATUSES.get(str(getattr(status, "value", status)).lower())
+    try:
+        return uuid.UUID(str(station_id)), status
+    except ValueError:
+        return None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('apscheduler_jobs'):
+        return
+
+    converted, skipped, moved = [], [], 0
+    for job_id, next_run_time, job_state in bind.execute(
+            sa.select(jobs.c.id, jobs.c.next_run_time, jobs.c.job_state)).all():
+        transition = _transition(job_state) if next_run_time is not None else None
+        if transition is None or transition[1] is None:
+            skipped.append(job_id)
+            continue
+        station_id, status = transition
+        # Jobs of stations deleted since are dropped with them, as the
+        # foreign key of station_status_transition would
+        moved += bind.execute(sa.text(
+            "INSERT INTO station_status_transition (id, station_id, target_status, due_at) "
+            "SELECT :id, station.id, CAST(:status AS stationstatus), :due_at "
+            "FROM station WHERE station.id = :station_id"
+        ), {
+            "id": uuid.uuid4(),
+            "station_id": station_id,
+            "status": status,
+            "due_at": datetime.fromtimestamp(next_run_time, timezone.utc),
+        }).rowcount
+        converted.append(job_id)
+
+    if converted:
+        bind.execute(sa.delete(jobs).where(jobs.c.id.in_(converted)))
+    logger.info(f"Moved {moved} scheduled status changes from apscheduler_jobs")
+    if skipped:
+        logger.warning(f"Left {len(skipped)} jobs that are not status changes in "
+                       f"apscheduler_jobs: {', '.join(skipped)}")
+    else:
+        op.drop_table('apscheduler_jobs')
+
+
+def downgrade() -> None:
+    # The job store is gone; transitions stay where the engine applies them
+    pass
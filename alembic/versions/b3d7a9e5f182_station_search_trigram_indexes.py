@@ -0,0 +1,38 @@
+"""station search trigram indexes
+
+Revision ID: b3d7a9e5f182
+Revises: 4c8e1f6a2b95
+Create Date: 2026-10-18 17:35:52.104377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d7a9e5f182'
+down_revision: Union[str, None] = '4c8e1f6a2b95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently so large station tables stay writable
+    with op.get_context().autocommit_block():
+        op.create_index('ix_station_name_trgm', 'station', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+        op.create_index('ix_station_location_trgm', 'station', ['location'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'location': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_station_location_trgm', table_name='station',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_station_name_trgm', table_name='station',
+                      postgresql_concurrently=True)
+    # The extension is left installed: other objects may depend on it
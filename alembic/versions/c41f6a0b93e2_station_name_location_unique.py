@@ -0,0 +1,59 @@
+"""station name/location unique, seed state
+
+Revision ID: c41f6a0b93e2
+Revises: 9e7c3f2a8d14
+Create Date: 2026-10-18 10:41:07.225806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Duplicate groups listed when the constraint cannot be created
+MAX_LISTED_DUPLICATES = 50
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f6a0b93e2'
+down_revision: Union[str, None] = '9e7c3f2a8d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _check_duplicates() -> None:
+    """Fail on stations sharing a name and location: which to keep, merge or
+    rename is for an operator to decide, not this migration"""
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT name, location, array_agg(id::text ORDER BY created_at, id) "
+        "FROM station GROUP BY name, location HAVING count(*) > 1 "
+        "ORDER BY name, location"
+    )).all()
+    if not duplicates:
+        return
+    listed = "\n".join(
+        f"  {name!r} in {location!r}: {', '.join(ids)}"
+        for name, location, ids in duplicates[:MAX_LISTED_DUPLICATES])
+    if len(duplicates) > MAX_LISTED_DUPLICATES:
+        listed += f"\n  ... and {len(duplicates) - MAX_LISTED_DUPLICATES} more"
+    raise RuntimeError(
+        f"{len(duplicates)} (name, location) pairs are used by several stations "
+        f"(ids oldest first); rename or delete the extra ones, then rerun the "
+        f"migration:\n{listed}")
+
+
+def upgrade() -> None:
+    _check_duplicates()
+    op.create_unique_constraint('uq_station_name_location', 'station', ['name', 'location'])
+    op.create_table('seed_state',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('checksum', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('seed_state')
+    op.drop_constraint('uq_station_name_location', 'station', type_='unique')
@@ -0,0 +1,44 @@
+"""station version sequence
+
+Revision ID: c5f1e7a3b9d2
+Revises: a7e3d5c9f0b2
+Create Date: 2026-10-18 19:48:12.604511
+
+The station version moves from a table_version row, whose UPDATE made
+concurrent station writes wait on each other, to a sequence bumped after
+each commit.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1e7a3b9d2'
+down_revision: Union[str, None] = 'a7e3d5c9f0b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('station_version')))
+    # Past the old version, so ETags handed out before no longer match
+    op.execute(
+        "SELECT setval('station_version', "
+        "COALESCE((SELECT version FROM table_version WHERE name = 'station'), 0) + 1)")
+    op.drop_table('table_version')
+
+
+def downgrade() -> None:
+    op.create_table('table_version',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        "INSERT INTO table_version (name, version) "
+        "SELECT 'station', last_value + 1 FROM station_version")
+    op.execute(sa.schema.DropSequence(sa.Sequence('station_version')))
@@ -0,0 +1,46 @@
+"""station status schedule
+
+Revision ID: d6e2b8f4a9c1
+Revises: b3d7a9e5f182
+Create Date: 2026-10-18 18:24:07.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6e2b8f4a9c1'
+down_revision: Union[str, None] = 'b3d7a9e5f182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('station_status_schedule',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('target_status', postgresql.ENUM('ACTIVE', 'INACTIVE', name='stationstatus', create_type=False), nullable=False),
+    sa.Column('location', sa.String(), nullable=True),
+    sa.Column('status', postgresql.ENUM('ACTIVE', 'INACTIVE', name='stationstatus', create_type=False), nullable=True),
+    sa.Column('min_capacity_kw', sa.Float(), nullable=True),
+    sa.Column('max_capacity_kw', sa.Float(), nullable=True),
+    sa.Column('station_ids', postgresql.ARRAY(sa.UUID()), nullable=True),
+    sa.Column('cron', sa.String(), nullable=True),
+    sa.Column('timezone', sa.String(), nullable=False),
+    sa.Column('duration_seconds', sa.Integer(), nullable=True),
+    sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_run_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_station_status_schedule_next_run_at'), 'station_status_schedule', ['next_run_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_station_status_schedule_next_run_at'), table_name='station_status_schedule')
+    op.drop_table('station_status_schedule')
@@ -0,0 +1,60 @@
+"""station search text indexes
+
+Revision ID: e4b8c2f6d0a7
+Revises: c5f1e7a3b9d2
+Create Date: 2026-10-18 20:31:26.118047
+
+The search fallback matches word prefixes of names and locations folded
+to lowercase without accents, like the in-memory index; the trigram
+indexes move from the raw columns to station_search_text() of them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8c2f6d0a7'
+down_revision: Union[str, None] = 'c5f1e7a3b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    # unaccent() is only STABLE, as its dictionary could change; naming the
+    # dictionary makes the result fixed, so it can be declared IMMUTABLE and
+    # indexed
+    op.execute(
+        "CREATE OR REPLACE FUNCTION station_search_text(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$")
+    # Built concurrently so large station tables stay writable
+    with op.get_context().autocommit_block():
+        op.create_index('ix_station_name_search_trgm', 'station',
+                        [sa.text('station_search_text(name) gin_trgm_ops')], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_station_location_search_trgm', 'station',
+                        [sa.text('station_search_text(location) gin_trgm_ops')], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+        op.drop_index('ix_station_location_trgm', table_name='station',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_station_name_trgm', table_name='station',
+                      postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_station_name_trgm', 'station', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+        op.create_index('ix_station_location_trgm', 'station', ['location'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'location': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+        op.drop_index('ix_station_location_search_trgm', table_name='station',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_station_name_search_trgm', table_name='station',
+                      postgresql_concurrently=True)
+    op.execute('DROP FUNCTION station_search_text(text)')
+    # The extension is left installed: other objects may depend on it
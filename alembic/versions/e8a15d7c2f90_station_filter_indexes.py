@@ -0,0 +1,43 @@
+"""station filter indexes
+
+Revision ID: e8a15d7c2f90
+Revises: c41f6a0b93e2
+Create Date: 2026-10-18 11:26:48.061377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a15d7c2f90'
+down_revision: Union[str, None] = 'c41f6a0b93e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so large station tables stay writable
+    with op.get_context().autocommit_block():
+        op.create_index('ix_station_location_status_capacity', 'station',
+                        ['location', 'status', 'max_capacity_kw'], unique=False,
+                        postgresql_include=['id', 'name', 'created_at'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_station_status_capacity', 'station',
+                        ['status', 'max_capacity_kw'], unique=False,
+                        postgresql_include=['id', 'name', 'location', 'created_at'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_station_max_capacity_kw', 'station',
+                        ['max_capacity_kw'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_station_max_capacity_kw', table_name='station',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_station_status_capacity', table_name='station',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_station_location_status_capacity', table_name='station',
+                      postgresql_concurrently=True)
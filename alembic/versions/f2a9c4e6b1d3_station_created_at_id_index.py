@@ -0,0 +1,31 @@
+"""station created_at id index
+
+Revision ID: f2a9c4e6b1d3
+Revises: d6e2b8f4a9c1
+Create Date: 2026-10-18 19:02:14.337810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c4e6b1d3'
+down_revision: Union[str, None] = 'd6e2b8f4a9c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so large station tables stay writable
+    with op.get_context().autocommit_block():
+        op.create_index('ix_station_created_at_id', 'station',
+                        ['created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_station_created_at_id', table_name='station',
+                      postgresql_concurrently=True)
@@ -0,0 +1,208 @@
+import ipaddress
+import math
+import time
+from collections import defaultdict
+from fnmatch import fnmatchcase
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from fastapi import HTTPException, Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.auth_cache import token_subject
+from app.core.config import settings
+from app.core.metrics import RouteKey, route_template
+from app.db.instrumentation import db_stats
+
+# Retry-After of requests shed because of load rather than rate
+SHED_RETRY_AFTER_SECONDS = 1
+
+# (status code, detail, Retry-After seconds)
+Rejection = Tuple[int, str, int]
+
+
+class AdmissionControl:
+    """Per-client token buckets, and in-flight counts of expensive routes.
+
+    Requests are refused up front instead of queueing for a DB connection.
+    Everything runs on the event loop thread, so plain integers are updated
+    without locks.
+    """
+
+    def __init__(self):
+        self._configured = False
+        self._buckets: Optional[TTLCache] = None
+        self._expensive: Dict[RouteKey, bool] = {}
+        self.in_flight: Dict[RouteKey, int] = defaultdict(int)
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed_concurrency = 0
+        self.shed_pool_wait = 0
+
+    def _configure(self) -> None:
+        self.enabled = settings.ADMISSION_ENABLED
+        self.rate = settings.ADMISSION_RATE_PER_SECOND
+        self.burst = settings.ADMISSION_BURST
+        self.patterns: List[str] = settings.ADMISSION_EXPENSIVE_ROUTES
+        self.concurrency = settings.ADMISSION_ROUTE_CONCURRENCY
+        self.pool_wait = settings.ADMISSION_POOL_WAIT_MS / 1000
+        self.exempt = set(settings.ADMISSION_EXEMPT_PATHS)
+        self.trusted_proxies = [
+            ipaddress.ip_network(proxy, strict=False)
+            for proxy in settings.ADMISSION_TRUSTED_PROXIES]
+        # An idle bucket is full again after burst / rate seconds, so it is
+        # dropped then
+        self._buckets = TTLCache(
+            maxsize=settings.ADMISSION_MAX_CLIENTS, ttl=self.burst / self.rate)
+        self._configured = True
+
+    def applies(self, path: str) -> bool:
+        if not self._configured:
+            self._configure()
+        return self.enabled and path not in self.exempt
+
+    def is_expensive(self, key: RouteKey) -> bool:
+        expensive = self._expensive.get(key)
+        if expensive is None:
+            route = f"{key[0]} {key[1]}"
+            expensive = self._expensive[key] = any(
+                fnmatchcase(route, pattern) for pattern in self.patterns)
+        return expensive
+
+    def take(self, client: str) -> float:
+        """Take a token from the client's bucket; 0 when there was one, else
+        the seconds until there is"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self._buckets[client] = (tokens - 1, now)
+        return 0.0
+
+    def admit(self, client: str) -> Optional[Rejection]:
+        """None when the client is within its rate"""
+        wait = self.take(client)
+        if wait > 0:
+            self.rate_limited += 1
+            return 429, "Too many requests, please retry later", math.ceil(wait)
+        self.admitted += 1
+        return None
+
+    def admit_route(self, key: RouteKey) -> Optional[Rejection]:
+        """None when the request may proceed; it must then be released"""
+        if self.is_expensive(key):
+            if self.in_flight[key] >= self.concurrency:
+                self.shed_concurrency += 1
+                return 503, "Server busy, please retry", SHED_RETRY_AFTER_SECONDS
+            if db_stats.current_wait() > self.pool_wait:
+                self.shed_pool_wait += 1
+                return 503, "Database busy, please retry", SHED_RETRY_AFTER_SECONDS
+            self.in_flight[key] += 1
+        return None
+
+    def release(self, key: RouteKey) -> None:
+        if self.is_expensive(key):
+            self.in_flight[key] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed_concurrency": self.shed_concurrency,
+            "shed_pool_wait": self.shed_pool_wait,
+            "clients": len(self._buckets) if self._buckets is not None else 0,
+            "in_flight": {
+                f"{method} {route}": count
+                for (method, route), count in self.in_flight.items() if count},
+            "pool_wait_ms": db_stats.current_wait() * 1000,
+        }
+
+
+admission_control = AdmissionControl()
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in admission_control.trusted_proxies)
+
+
+def _client_address(scope: Scope) -> str:
+    """The peer address, or behind trusted proxies the last address they
+    forwarded for that is not one of them"""
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if not admission_control.trusted_proxies or not _trusted(address):
+        return address
+    forwarded = [
+        value.decode("latin-1") for name, value in scope["headers"]
+        if name == b"x-forwarded-for"]
+    # Proxies append the address they received the request from; only the
+    # entries added by trusted proxies can be believed
+    for hop in reversed(",".join(forwarded).split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        address = hop
+        if not _trusted(hop):
+            break
+    return address
+
+
+def _client_key(scope: Scope) -> str:
+    """The user of a valid bearer token, else the client address"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                subject = token_subject(token)
+                if subject is not None:
+                    return f"user:{subject}"
+            break
+    return f"addr:{_client_address(scope)}"
+
+
+class AdmissionMiddleware:
+    """Answers 429, with a Retry-After, to clients over their rate"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not admission_control.applies(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        rejection = admission_control.admit(_client_key(scope))
+        if rejection is not None:
+            status, detail, retry_after = rejection
+            response = JSONResponse(
+                {"detail": detail}, status_code=status,
+                headers={"Retry-After": str(retry_after)})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+async def admit_route(request: Request) -> AsyncIterator[None]:
+    """App dependency answering 503, with a Retry-After, to requests for
+    expensive routes over their concurrency or while the DB pool is
+    saturated; it runs once the router has matched the route"""
+    scope = request.scope
+    if not admission_control.applies(scope["path"]):
+        yield
+        return
+    key = (scope["method"], route_template(scope))
+    rejection = admission_control.admit_route(key)
+    if rejection is not None:
+        status, detail, retry_after = rejection
+        raise HTTPException(status, detail, headers={"Retry-After": str(retry_after)})
+    try:
+        yield
+    finally:
+        admission_control.release(key)
@@ -0,0 +1,131 @@
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import station_events
+from app.core.invalidation import invalidation_bus
+from app.core.station_events import SNAPSHOT_COLUMNS, StationChange, StationSnapshot
+from app.db.session import AsyncSessionLocal
+from app.models.station import StationStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LocationStats:
+    total_stations: int = 0
+    capacity_sum: float = 0.0
+    active_stations: int = 0
+
+
+class AnalyticsState:
+    """In-process station aggregates kept current by the write paths.
+
+    The stations they were computed from are kept, so that applying a change
+    replaces what is counted for its station: a change the database read
+    already included can be applied again without being counted twice.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.status_counts: Dict[StationStatus, int] = {}
+        self.locations: Dict[str, LocationStats] = {}
+        self._stations: Dict[uuid.UUID, StationSnapshot] = {}
+        self._pending: Optional[List[StationChange]] = None
+
+    async def load(self, db: AsyncSession) -> None:
+        """Rebuild the aggregates from the database"""
+        previous = (self.status_counts, self.locations)
+        # Changes published while the query runs are applied again on top
+        self._pending = []
+        try:
+            result = await db.execute(select(*SNAPSHOT_COLUMNS))
+            rows = result.all()
+            self.status_counts = {status: 0 for status in StationStatus}
+            self.locations, self._stations = {}, {}
+            for row in rows:
+                self._put(StationSnapshot(*row))
+            pending = self._pending
+        finally:
+            self._pending = None
+        self._replace(pending)
+
+        if self.ready and self._drifted(*previous):
+            logger.warning("Analytics state drifted from the database, corrected")
+        self.ready = True
+
+    def _drifted(
+        self, status_counts: Dict[StationStatus, int], locations: Dict[str, LocationStats]
+    ) -> bool:
+        if status_counts != self.status_counts or locations.keys() != self.locations.keys():
+            return True
+        return any(
+            stats.total_stations != self.locations[location].total_stations
+            or stats.active_stations != self.locations[location].active_stations
+            or abs(stats.capacity_sum - self.locations[location].capacity_sum) > 1e-6
+            for location, stats in locations.items()
+        )
+
+    def _add(self, snapshot: StationSnapshot, sign: int) -> None:
+        self.status_counts[snapshot.status] = \
+            self.status_counts.get(snapshot.status, 0) + sign
+
+        stats = self.locations.setdefault(snapshot.location, LocationStats())
+        stats.total_stations += sign
+        stats.capacity_sum += sign * snapshot.max_capacity_kw
+        if snapshot.status == StationStatus.ACTIVE:
+            stats.active_stations += sign
+        if stats.total_stations <= 0:
+            del self.locations[snapshot.location]
+
+    def _put(self, snapshot: StationSnapshot) -> None:
+        self._stations[snapshot.id] = snapshot
+        self._add(snapshot, 1)
+
+    def _replace(self, changes: List[StationChange]) -> None:
+        for before, after in changes:
+            counted = self._stations.pop((after or before).id, None)
+            if counted is not None:
+                self._add(counted, -1)
+            if after is not None:
+                self._put(after)
+
+    def apply(self, changes: List[StationChange]) -> None:
+        """Apply committed station changes to the aggregates"""
+        if self._pending is not None:
+            self._pending.extend(changes)
+        if self.ready:
+            self._replace(changes)
+
+    def status_summary(self) -> Dict[str, int]:
+        return {status.value: self.status_counts.get(status, 0) for status in StationStatus}
+
+    def location_stats(self) -> List[Dict[str, Any]]:
+        # Sorted, so that workers holding the same aggregates answer alike
+        return [{
+            "location": location,
+            "total_stations": stats.total_stations,
+            "avg_capacity": stats.capacity_sum / stats.total_stations,
+            "active_stations": stats.active_stations
+        } for location, stats in sorted(self.locations.items())]
+
+
+analytics_state = AnalyticsState()
+station_events.subscribe(analytics_state.apply)
+
+
+async def reconcile_analytics_state() -> None:
+    """Rebuild the analytics state from the database to correct any drift"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await analytics_state.load(db)
+    except Exception as e:
+        logger.error(f"Error reconciling analytics state: {e}")
+
+
+# Changes may have been missed: the aggregates must be rebuilt
+invalidation_bus.on_resync(reconcile_analytics_state)
@@ -0,0 +1,102 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.invalidation import USERS, invalidation_bus
+
+
+class AuthCache:
+    """Bounded TTL cache of verified tokens and the users they resolve to"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        # token -> (subject, exp)
+        self._tokens: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # subject (email) -> user schema
+        self._users: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.invalidations = 0
+
+    def get_subject(self, token: str) -> Optional[str]:
+        entry: Optional[Tuple[str, float]] = self._tokens.get(token)
+        if entry is None or entry[1] <= time.time():
+            self.token_misses += 1
+            return None
+        self.token_hits += 1
+        return entry[0]
+
+    def set_subject(self, token: str, subject: str, exp: float) -> None:
+        self._tokens[token] = (subject, exp)
+
+    def get_user(self, subject: str) -> Optional[Any]:
+        user = self._users.get(subject)
+        if user is None:
+            self.user_misses += 1
+        else:
+            self.user_hits += 1
+        return user
+
+    def set_user(self, subject: str, user: Any) -> None:
+        self._users[subject] = user
+
+    def invalidate_user(self, subject: str) -> None:
+        """Drop a cached user so the next request reloads it from the DB"""
+        if self._users.pop(subject, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_users(self, subjects: List[str]) -> None:
+        for subject in subjects:
+            self.invalidate_user(subject)
+
+    def clear_users(self) -> None:
+        self._users.clear()
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "token_hits": self.token_hits,
+            "token_misses": self.token_misses,
+            "user_hits": self.user_hits,
+            "user_misses": self.user_misses,
+            "invalidations": self.invalidations,
+            "cached_tokens": len(self._tokens),
+            "cached_users": len(self._users),
+        }
+
+
+auth_cache = AuthCache(
+    maxsize=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def token_subject(token: str) -> Optional[str]:
+    """Subject of a valid access token, from the cache or by decoding it"""
+    subject = auth_cache.get_subject(token)
+    if subject is not None:
+        return subject
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    if subject is not None and payload.get("exp") is not None:
+        auth_cache.set_subject(token, subject, payload["exp"])
+    return subject
+
+
+def invalidate_user(subject: str) -> None:
+    """Drop a cached user in this and every other worker"""
+    auth_cache.invalidate_user(subject)
+    invalidation_bus.publish(USERS, [subject])
+
+
+invalidation_bus.on(USERS, auth_cache.invalidate_users)
+# Tokens stay valid; users may have changed while messages were missed
+invalidation_bus.on_resync(auth_cache.clear_users)
@@ -1,5 +1,37 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+
+# Named engine pool profiles; explicit DB_* settings override them
+DB_PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "prepared_statement_cache_size": 100,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "prepared_statement_cache_size": 256,
+    },
+    "high-concurrency": {
+        "echo": False,
+        "pool_size": 30,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "prepared_statement_cache_size": 512,
+    },
+}
 
 
 class Settings(BaseSettings):
@@ -16,13 +48,122 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_ID: Optional[str] = None
     GOOGLE_CLIENT_SECRET: Optional[str] = None
     GOOGLE_REDIRECT_URI: str = "http://localhost:8000/api/v1/auth/google/callback"
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
+
+    # Password hashing (bcrypt runs on a dedicated thread pool)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     # Database
     DATABASE_URL: str
+    # "dev" echoes every SQL statement; opt into it locally
+    DB_PROFILE: str = "prod"
+    DB_ECHO: Optional[bool] = None
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None
+    DB_POOL_RECYCLE: Optional[int] = None
+    DB_POOL_PRE_PING: Optional[bool] = None
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = None
+    # Queries slower than this are counted as slow
+    DB_SLOW_QUERY_MS: float = 200.0
+
+    # Startup seeding; disable when seeding runs as a separate step
+    # (python -m app.core.init_data)
+    SEED_ON_STARTUP: bool = True
+    SEED_FIXTURES_PATH: Optional[str] = None
+
+    # Encode large list responses straight from SQL rows with orjson,
+    # skipping per-row pydantic validation
+    FAST_JSON_RESPONSES: bool = False
+
+    # Maximum number of items accepted by the bulk station endpoints
+    STATIONS_BULK_MAX_ITEMS: int = 1000
+
+    # Telemetry ingestion: readings are buffered in memory and written every
+    # TELEMETRY_FLUSH_SECONDS, or as soon as TELEMETRY_FLUSH_ROWS are buffered
+    TELEMETRY_BATCH_MAX_ITEMS: int = 50000
+    TELEMETRY_FLUSH_SECONDS: float = 1.0
+    TELEMETRY_FLUSH_ROWS: int = 10000
+    TELEMETRY_BUFFER_MAX_ROWS: int = 500000
+
+    # Station change streams: undelivered events are coalesced per station,
+    # a stream with more than STREAM_QUEUE_SIZE stations pending is reset.
+    # The last STREAM_REPLAY_SIZE events can be resumed with Last-Event-ID
+    STREAM_QUEUE_SIZE: int = 1000
+    STREAM_REPLAY_SIZE: int = 10000
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_MAX_SUBSCRIBERS: int = 10000
+
+    # Serve /stations/nearby from an in-memory grid of station coordinates;
+    # otherwise, and until it is loaded, from bounding-box queries
+    GEO_INDEX_ENABLED: bool = True
+    # Serve /stations/search from an in-memory prefix and trigram index;
+    # otherwise, and until it is loaded, from pg_trgm-indexed queries
+    SEARCH_INDEX_ENABLED: bool = True
+
+    # Propagation of invalidations and station changes between workers:
+    # "postgres" (LISTEN/NOTIFY), "memory" (one process) or "none"
+    INVALIDATION_BACKEND: str = "postgres"
+    INVALIDATION_CHANNEL: str = "s2g_invalidation"
+
+    # Admission control, per worker. Each user (or client address, before
+    # login) may send ADMISSION_RATE_PER_SECOND requests with bursts of
+    # ADMISSION_BURST, beyond which requests get 429. Requests to
+    # ADMISSION_EXPENSIVE_ROUTES ("METHOD /path" patterns) get 503 beyond
+    # ADMISSION_ROUTE_CONCURRENCY in flight per route, or while DB pool
+    # checkouts wait longer than ADMISSION_POOL_WAIT_MS. Behind proxies
+    # listed in ADMISSION_TRUSTED_PROXIES (addresses or networks), the client
+    # address is taken from X-Forwarded-For
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_RATE_PER_SECOND: float = 100.0
+    ADMISSION_BURST: int = 200
+    ADMISSION_MAX_CLIENTS: int = 10000
+    ADMISSION_EXPENSIVE_ROUTES: List[str] = [
+        "GET /api/v1/stations/", "GET /api/v1/analytics/*"]
+    ADMISSION_ROUTE_CONCURRENCY: int = 10
+    ADMISSION_POOL_WAIT_MS: float = 250.0
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/", "/healthcheck", "/metrics"]
+    ADMISSION_TRUSTED_PROXIES: List[str] = []
+
+    # In-process analytics aggregates are rebuilt from the DB this often
+    ANALYTICS_RECONCILE_SECONDS: int = 300
+    # Identical analytics reads running at the same time share one query;
+    # the result is kept this long for identical requests (0 disables it)
+    SINGLE_FLIGHT_TTL_SECONDS: float = 1.0
+
+    # Authentication cache
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+
+    def db_engine_options(self) -> Dict[str, Any]:
+        """Engine options of DB_PROFILE with explicit DB_* overrides applied"""
+        if self.DB_PROFILE not in DB_PROFILES:
+            raise ValueError(f"Unknown DB_PROFILE {self.DB_PROFILE!r}")
+        options = dict(DB_PROFILES[self.DB_PROFILE])
+        overrides = {
+            "echo": self.DB_ECHO,
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+            "prepared_statement_cache_size": self.DB_STATEMENT_CACHE_SIZE,
+        }
+        options.update({k: v for k, v in overrides.items() if v is not None})
+        return options
 
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
-settings = Settings()
+@lru_cache()
+def get_settings() -> Settings:
+    return Settings()
+
+
+# Created at import: the database engine is configured from it when
+# app.db.session is imported anyway
+settings = get_settings()
@@ -0,0 +1,84 @@
+import hashlib
+from typing import Any, Optional, Union
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from sqlalchemy import Sequence, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.responses import dumps
+
+STATIONS = "station"
+
+
+async def _bump_version(db: AsyncSession, name: str = STATIONS) -> None:
+    """Move a table version on; see commit_version.
+
+    Versions are sequences, so concurrent writers never wait on each other.
+    """
+    await db.execute(select(Sequence(f"{name}_version").next_value()))
+
+
+async def commit_version(db: AsyncSession, name: str = STATIONS) -> None:
+    """Commit a write to the table, moving its version on before and after.
+
+    Taken inside the transaction, the version has moved whenever the write
+    is committed, even if the worker dies right after. Sequences ignore
+    transactions though, so a reader may pair that version with the data
+    from before the commit; moving it again once committed keeps clients
+    from holding on to such a response.
+    """
+    await _bump_version(db, name)
+    await db.commit()
+    await _bump_version(db, name)
+
+
+async def get_version(db: AsyncSession, name: str = STATIONS) -> int:
+    result = await db.execute(text(f"SELECT last_value FROM {name}_version"))
+    return result.scalar_one()
+
+
+def make_etag(request: Request, name: str, version: Union[int, str]) -> str:
+    """Strong ETag for a table version and the request's path and query,
+    whatever the order of the query parameters"""
+    # Sorted by name only: repeated parameters keep their order
+    query = urlencode(sorted(request.query_params.multi_items(), key=lambda item: item[0]))
+    variant = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()[:12]
+    return f'"{name}-{version}-{variant}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def check_not_modified(
+    request: Request, response: Response, db: AsyncSession, name: str = STATIONS
+) -> Optional[Response]:
+    """check_version_not_modified against the table version in the database"""
+    return check_version_not_modified(request, response, await get_version(db, name), name)
+
+
+def check_content_not_modified(
+    request: Request, response: Response, content: Any, name: str = STATIONS
+) -> Optional[Response]:
+    """check_version_not_modified against a hash of the content, for
+    responses built from in-process state: workers holding the same data
+    give the same ETag"""
+    version = hashlib.sha1(dumps(content)).hexdigest()[:16]
+    return check_version_not_modified(request, response, version, name)
+
+
+def check_version_not_modified(
+    request: Request, response: Response, version: Union[int, str], name: str = STATIONS
+) -> Optional[Response]:
+    """Return a 304 response if the client's copy is current, otherwise set
+    the ETag header on the response that is about to be built"""
+    etag = make_etag(request, name, version)
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,275 @@
+import heapq
+import logging
+import math
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import station_events
+from app.core.invalidation import invalidation_bus
+from app.core.station_events import SNAPSHOT_COLUMNS, StationChange, StationSnapshot
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station, StationStatus
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+# First radius tried by the database fallback when none is given
+FALLBACK_RADIUS_KM = 50.0
+
+# (latitude rad, longitude rad, cos latitude, station)
+Entry = Tuple[float, float, float, StationSnapshot]
+Cell = Tuple[int, int]
+
+
+def haversine(lat1: float, cos1: float, lon1: float, lat2: float, cos2: float, lon2: float) -> float:
+    """Haversine of the central angle between two points given in radians;
+    grows with the distance, so it is compared instead of kilometres"""
+    return math.sin((lat2 - lat1) / 2) ** 2 + cos1 * cos2 * math.sin((lon2 - lon1) / 2) ** 2
+
+
+def distance_km(h: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, h)))
+
+
+def radius_haversine(radius_km: float) -> float:
+    angle = radius_km / EARTH_RADIUS_KM
+    return math.inf if angle >= math.pi else math.sin(angle / 2) ** 2
+
+
+class GeoIndex:
+    """Stations with coordinates on a grid of cell_degrees square cells.
+
+    Nearest-station queries scan rings of cells around the query point and
+    stop once everything outside the rings scanned so far is provably
+    farther than the k-th station found, or than the search radius.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1):
+        if (360 / cell_degrees) % 1:
+            raise ValueError("cell_degrees must divide 360")
+        self.size = cell_degrees
+        self.columns = round(360 / cell_degrees)
+        self.rows = math.ceil(180 / cell_degrees)
+        self.ready = False
+        self._cells: Dict[Cell, Dict[uuid.UUID, Entry]] = {}
+        self._stations: Dict[uuid.UUID, Cell] = {}
+        self._pending: Optional[List[StationChange]] = None
+
+    def __len__(self) -> int:
+        return len(self._stations)
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        row = min(int((latitude + 90) // self.size), self.rows - 1)
+        return row, int((longitude + 180) // self.size) % self.columns
+
+    def add(self, station: StationSnapshot) -> None:
+        self.remove(station.id)
+        if station.latitude is None or station.longitude is None:
+            return
+        cell = self._cell(station.latitude, station.longitude)
+        latitude = math.radians(station.latitude)
+        self._cells.setdefault(cell, {})[station.id] = (
+            latitude, math.radians(station.longitude), math.cos(latitude), station)
+        self._stations[station.id] = cell
+
+    def remove(self, station_id: uuid.UUID) -> None:
+        cell = self._stations.pop(station_id, None)
+        if cell is None:
+            return
+        stations = self._cells[cell]
+        del stations[station_id]
+        if not stations:
+            del self._cells[cell]
+
+    def on_station_changes(self, changes: List[StationChange]) -> None:
+        if self._pending is not None:
+            self._pending.extend(changes)
+        for before, after in changes:
+            if after is None:
+                self.remove(before.id)
+            else:
+                self.add(after)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Rebuild the index from the database"""
+        # Changes published while the query runs are applied again on top
+        self._pending = []
+        try:
+            result = await db.execute(
+                select(*SNAPSHOT_COLUMNS).where(Station.latitude.isnot(None)))
+            rows = result.all()
+            self._cells, self._stations = {}, {}
+            for row in rows:
+                self.add(StationSnapshot(*row))
+            pending = self._pending
+        finally:
+            self._pending = None
+        self.on_station_changes(pending)
+        self.ready = True
+
+    def _outside_bound(self, latitude: float, longitude: float, row: int, column: int, ring: int) -> float:
+        """Lower bound of the haversine from the query point to any point
+        outside the cells within `ring` of its cell"""
+        lower = (row - ring) * self.size - 90
+        upper = (row + ring + 1) * self.size - 90
+        gaps = []
+        if lower > -90:
+            gaps.append(latitude - lower)
+        if upper < 90:
+            gaps.append(upper - latitude)
+        bound = math.sin(math.radians(min(gaps)) / 2) ** 2 if gaps else math.inf
+        if 2 * ring + 1 < self.columns:
+            west = (column - ring) * self.size - 180
+            east = (column + ring + 1) * self.size - 180
+            gap = min(longitude - west, east - longitude)
+            # Points beyond the columns but within the rows are at most this
+            # far from the equator
+            farthest = min(90.0, max(abs(lower), abs(upper)))
+            bound = min(bound, math.cos(math.radians(farthest)) ** 2
+                        * math.sin(math.radians(min(gap, 180.0)) / 2) ** 2)
+        return bound
+
+    def _ring(self, row: int, column: int, ring: int) -> List[Cell]:
+        if ring == 0:
+            return [(row, column)]
+        columns = range(column - ring, column + ring + 1)
+        cells = [(r, c) for r in (row - ring, row + ring) for c in columns]
+        cells += [(r, c) for r in range(row - ring + 1, row + ring)
+                  for c in (column - ring, column + ring)]
+        return list({(r, c % self.columns) for r, c in cells if 0 <= r < self.rows})
+
+    def _ring_of(self, row: int, column: int, cell: Cell) -> int:
+        offset = abs(cell[1] - column)
+        return max(abs(cell[0] - row), min(offset, self.columns - offset))
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        radius_km: Optional[float] = None,
+        status: Optional[StationStatus] = None,
+    ) -> List[Tuple[StationSnapshot, float]]:
+        """The k stations nearest to a point, within radius_km if given, as
+        (station, distance in km) pairs, nearest first"""
+        limit = radius_haversine(radius_km) if radius_km is not None else math.inf
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        cos_lat = math.cos(lat)
+        row, column = self._cell(latitude, longitude)
+
+        # Max-heap of the best k as (-haversine, tiebreak, station)
+        best: List[Tuple[float, int, StationSnapshot]] = []
+        seen = 0
+        ring = 0
+        visited = 0
+        while True:
+            exhaustive = visited + 8 * ring > len(self._cells)
+            if exhaustive:
+                # Walking further rings would cost more than visiting the
+                # remaining occupied cells directly
+                cells = [cell for cell in self._cells
+                         if self._ring_of(row, column, cell) >= ring]
+            else:
+                cells = self._ring(row, column, ring)
+                visited += len(cells)
+            for cell in cells:
+                stations = self._cells.get(cell)
+                if not stations:
+                    continue
+                for lat2, lon2, cos2, station in stations.values():
+                    if status is not None and station.status != status:
+                        continue
+                    h = haversine(lat, cos_lat, lon, lat2, cos2, lon2)
+                    if h > limit:
+                        continue
+                    seen += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-h, seen, station))
+                    elif h < -best[0][0]:
+                        heapq.heapreplace(best, (-h, seen, station))
+            if exhaustive:
+                break
+            threshold = min(limit, -best[0][0] if len(best) == k else math.inf)
+            if self._outside_bound(latitude, longitude, row, column, ring) > threshold:
+                break
+            ring += 1
+
+        return [(station, distance_km(-negative))
+                for negative, _, station in sorted(best, reverse=True)]
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """Filter on the coordinates of stations possibly within radius_km"""
+    angle = radius_km / EARTH_RADIUS_KM
+    spread = math.degrees(angle)
+    lower, upper = latitude - spread, latitude + spread
+    rows = Station.latitude.between(max(lower, -90.0), min(upper, 90.0))
+    if lower <= -90 or upper >= 90 or math.sin(angle) >= math.cos(math.radians(latitude)):
+        return rows
+    # Widest longitude difference on the circle's boundary
+    spread = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+    west, east = longitude - spread, longitude + spread
+    if west < -180:
+        columns = or_(Station.longitude >= west + 360, Station.longitude <= east)
+    elif east > 180:
+        columns = or_(Station.longitude >= west, Station.longitude <= east - 360)
+    else:
+        columns = Station.longitude.between(west, east)
+    return and_(rows, columns)
+
+
+async def nearest_from_db(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    k: int,
+    radius_km: Optional[float] = None,
+    status: Optional[StationStatus] = None,
+) -> List[Tuple[StationSnapshot, float]]:
+    """GeoIndex.nearest answered from a bounding-box query; without a radius
+    the box grows until it holds k stations"""
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    radius = radius_km or FALLBACK_RADIUS_KM
+    while True:
+        # Near the poles the box only bounds latitudes; stations must still
+        # have a longitude for their distance
+        query = select(*SNAPSHOT_COLUMNS).where(
+            bounding_box(latitude, longitude, radius), Station.longitude.isnot(None))
+        if status is not None:
+            query = query.where(Station.status == status)
+        limit = radius_haversine(radius)
+        found = []
+        for row in (await db.execute(query)).all():
+            station = StationSnapshot(*row)
+            latitude2 = math.radians(station.latitude)
+            h = haversine(lat, cos_lat, lon, latitude2, math.cos(latitude2),
+                          math.radians(station.longitude))
+            if h <= limit:
+                found.append((h, station))
+        if len(found) >= k or radius_km is not None or radius >= HALF_CIRCUMFERENCE_KM:
+            break
+        radius *= 4
+    found.sort(key=lambda item: item[0])
+    return [(station, distance_km(h)) for h, station in found[:k]]
+
+
+geo_index = GeoIndex()
+station_events.subscribe(geo_index.on_station_changes)
+
+
+async def reload_geo_index() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await geo_index.load(db)
+    except Exception as e:
+        logger.error(f"Error reloading the station geo index: {e}")
+
+
+invalidation_bus.on_resync(reload_geo_index)
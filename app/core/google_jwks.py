@@ -0,0 +1,91 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.http import get_http_client
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Used when the certs response has no usable Cache-Control max-age
+DEFAULT_MAX_AGE = 3600
+# An unknown key id forces a refresh at most this often
+MIN_REFRESH_INTERVAL = 60
+
+_max_age_re = re.compile(r"max-age=(\d+)")
+
+
+class GoogleKeysUnavailable(Exception):
+    """Raised when Google's signing keys cannot be fetched"""
+
+
+class GoogleJWKS:
+    """Google's ID token signing keys, fetched asynchronously and cached for
+    as long as the response's Cache-Control allows"""
+
+    def __init__(self):
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.fetches = 0
+
+    async def _refresh(self) -> None:
+        try:
+            response = await get_http_client().get(settings.GOOGLE_CERTS_URL)
+            response.raise_for_status()
+            keys = {key["kid"]: key for key in response.json()["keys"]}
+        except Exception as e:
+            raise GoogleKeysUnavailable(str(e)) from e
+
+        match = _max_age_re.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+        self.fetches += 1
+
+    def _needs_refresh(self, kid: str) -> bool:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            return True
+        # Keys may have rotated before the cached set expired
+        return kid not in self._keys and now - self._fetched_at >= MIN_REFRESH_INTERVAL
+
+    async def get_key(self, kid: str) -> Dict[str, Any]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._needs_refresh(kid):
+            async with self._lock:
+                # Another coroutine may have refreshed while we waited
+                if self._needs_refresh(kid):
+                    await self._refresh()
+        if kid not in self._keys:
+            raise ValueError(f"Unknown signing key {kid!r}")
+        return self._keys[kid]
+
+    async def verify_id_token(
+        self, token: str, audience: str, access_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Verify a Google ID token locally against the cached keys.
+
+        Raises ValueError if the token is invalid."""
+        try:
+            header = jwt.get_unverified_header(token)
+            key = await self.get_key(header.get("kid", ""))
+            claims = jwt.decode(
+                token, key, algorithms=[key.get("alg", "RS256")],
+                audience=audience, access_token=access_token)
+        except JWTError as e:
+            raise ValueError(str(e))
+
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer {claims.get('iss')!r}")
+        return claims
+
+
+google_jwks = GoogleJWKS()
@@ -0,0 +1,53 @@
+import bisect
+import math
+from typing import Any, Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional speed-up
+    np = None
+
+
+def linear_edges(lower: float, upper: float, bins: int) -> List[float]:
+    """Evenly spaced bin edges between lower and upper"""
+    size = (upper - lower) / bins
+    return [lower + i * size for i in range(bins)] + [upper]
+
+
+def log_edges(lower: float, upper: float, bins: int) -> List[float]:
+    """Logarithmically spaced bin edges between lower and upper (both > 0)"""
+    if lower <= 0:
+        raise ValueError("Log-scale bins require strictly positive values")
+    ratio = math.log(upper / lower) / bins
+    return [lower * math.exp(i * ratio) for i in range(bins)] + [upper]
+
+
+def validate_edges(edges: Sequence[float]) -> None:
+    if len(edges) < 2:
+        raise ValueError("At least two bin edges are required")
+    if any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError("Bin edges must be strictly increasing")
+
+
+def histogram_counts(values: Sequence[float], edges: Sequence[float]) -> List[int]:
+    """Count values per bin; bins are [lower, upper) except the last, which
+    also includes its upper edge. Values outside the edges are ignored."""
+    if np is not None:
+        counts, _ = np.histogram(
+            np.asarray(values, dtype=float), bins=np.asarray(edges, dtype=float))
+        return counts.tolist()
+
+    counts = [0] * (len(edges) - 1)
+    last = len(edges) - 2
+    for value in values:
+        if value < edges[0] or value > edges[-1]:
+            continue
+        counts[min(bisect.bisect_right(edges, value) - 1, last)] += 1
+    return counts
+
+
+def format_distribution(edges: Sequence[float], counts: Sequence[int]) -> List[Dict[str, Any]]:
+    return [{
+        "range": f"{lower:.1f} - {upper:.1f} kW",
+        "count": count
+    } for lower, upper, count in zip(edges, edges[1:], counts)]
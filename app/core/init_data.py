@@ -1,94 +1,122 @@
-from typing import List
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
+from app.core.etag import commit_version
+from app.db.session import AsyncSessionLocal, engine
+from app.models.seed_state import SeedState
 from app.models.station import Station, StationStatus
 
-# Datos de muestra para las estaciones de carga
-sample_stations = [
-    {
-        "name": "Estación Zócalo",
-        "location": "Ciudad de México Centro",
-        "max_capacity_kw": 150.0,
-        "status": StationStatus.ACTIVE
-    },
-    {
-        "name": "Estación San Pedro",
-        "location": "Monterrey Norte",
-        "max_capacity_kw": 100.0,
-        "status": StationStatus.ACTIVE
-    },
-    {
-        "name": "Estación Chapultepec",
-        "location": "Ciudad de México Oeste",
-        "max_capacity_kw": 75.0,
-        "status": StationStatus.INACTIVE
-    },
-    {
-        "name": "Estación Zapopan",
-        "location": "Guadalajara Centro",
-        "max_capacity_kw": 200.0,
-        "status": StationStatus.INACTIVE
-    },
-    {
-        "name": "Estación Zona Hotelera",
-        "location": "Cancún Centro",
-        "max_capacity_kw": 120.0,
-        "status": StationStatus.ACTIVE
-    },
-    {
-        "name": "Estación Reforma",
-        "location": "Ciudad de México Centro",
-        "max_capacity_kw": 180.0,
-        "status": StationStatus.ACTIVE
-    },
-    {
-        "name": "Estación Valle",
-        "location": "Monterrey Norte",
-        "max_capacity_kw": 250.0,
-        "status": StationStatus.ACTIVE
-    },
-    {
-        "name": "Estación Revolución",
-        "location": "Tijuana Centro",
-        "max_capacity_kw": 90.0,
-        "status": StationStatus.INACTIVE
-    },
-    {
-        "name": "Estación Terminal 2",
-        "location": "Ciudad de México Centro",
-        "max_capacity_kw": 300.0,
-        "status": StationStatus.ACTIVE
-    },
-    {
-        "name": "Estación Tecnológico",
-        "location": "Monterrey Norte",
-        "max_capacity_kw": 50.0,
-        "status": StationStatus.INACTIVE
-    }
-]
+logger = logging.getLogger(__name__)
 
+# Datos de muestra para las estaciones de carga, una estación por línea (NDJSON)
+DEFAULT_FIXTURES_PATH = Path(__file__).resolve().parent.parent / "fixtures" / "stations.jsonl"
 
-async def init_sample_data(db: AsyncSession) -> None:
-    """Inicializa la base de datos con datos de muestra, evitando duplicados"""
-    for station_data in sample_stations:
-        # Verificar si ya existe una estación con el mismo nombre y ubicación
+
+def fixture_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_fixture_chunks(path: Path, chunk_size: int) -> Iterator[List[dict]]:
+    """Stream station rows from an NDJSON fixture file in chunks"""
+    chunk = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            chunk.append({
+                "id": uuid.uuid4(),
+                "name": data["name"],
+                "location": data["location"],
+                "max_capacity_kw": float(data["max_capacity_kw"]),
+                "latitude": data.get("latitude"),
+                "longitude": data.get("longitude"),
+                "status": StationStatus(data.get("status", StationStatus.ACTIVE)),
+            })
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def seed_stations(
+    db: AsyncSession,
+    path: Optional[Path] = None,
+    chunk_size: int = 1000,
+    force: bool = False,
+) -> int:
+    """Upsert the stations of a fixture file, skipping it when unchanged.
+
+    Returns the number of stations inserted."""
+    path = Path(path or settings.SEED_FIXTURES_PATH or DEFAULT_FIXTURES_PATH)
+    checksum = fixture_checksum(path)
+    seed_name = f"stations:{path.name}"
+
+    result = await db.execute(
+        select(SeedState.checksum).where(SeedState.name == seed_name))
+    if result.scalar_one_or_none() == checksum and not force:
+        logger.info(f"Fixtures {path} unchanged, skipping seeding")
+        return 0
+
+    inserted = 0
+    for chunk in iter_fixture_chunks(path, chunk_size):
         result = await db.execute(
-            select(Station).where(
-                Station.name == station_data["name"],
-                Station.location == station_data["location"]
-            )
+            insert(Station)
+            .values(chunk)
+            .on_conflict_do_nothing(constraint="uq_station_name_location")
+            .returning(Station.id)
         )
-        existing_station = result.scalars().first()
-
-        if not existing_station:
-            # Crear nueva estación solo si no existe
-            station = Station(
-                name=station_data["name"],
-                location=station_data["location"],
-                max_capacity_kw=station_data["max_capacity_kw"],
-                status=station_data["status"]
-            )
-            db.add(station)
-
-    await db.commit()
+        inserted += len(result.all())
+
+    await db.execute(
+        insert(SeedState)
+        .values(name=seed_name, checksum=checksum)
+        .on_conflict_do_update(
+            index_elements=[SeedState.name], set_={"checksum": checksum})
+    )
+    if inserted:
+        await commit_version(db)
+    else:
+        await db.commit()
+    logger.info(f"Seeded {inserted} stations from {path}")
+    return inserted
+
+
+async def init_sample_data(db: AsyncSession) -> None:
+    """Inicializa la base de datos con datos de muestra, evitando duplicados"""
+    await seed_stations(db)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed stations from an NDJSON fixture file")
+    parser.add_argument("path", nargs="?", type=Path, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--force", action="store_true",
+                        help="Seed even if the fixture checksum is unchanged")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        await seed_stations(db, args.path, args.chunk_size, args.force)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import orjson
+
+from app.core import station_events
+from app.core.config import settings
+from app.core.responses import dumps
+from app.core.station_events import StationChange, StationSnapshot
+from app.models.station import StationStatus
+
+logger = logging.getLogger(__name__)
+
+STATIONS = "stations"
+USERS = "users"
+TRANSITIONS = "transitions"
+SCHEDULES = "schedules"
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7800
+# Messages held while the bus is disconnected; beyond that they are dropped
+# and peers resynchronize on the version gap
+MAX_OUTBOX = 10000
+PING_SECONDS = 10.0
+
+Handler = Callable[[List[Any]], None]
+MessageCallback = Callable[[str], None]
+
+
+class PostgresTransport:
+    """LISTEN/NOTIFY on a connection held from the application's engine"""
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._conn = None
+        self._driver = None
+        self._listener = None
+
+    async def connect(self, on_message: MessageCallback) -> None:
+        # Imported here so the memory backend works without a database
+        from app.db.session import engine
+
+        self._conn = await engine.connect()
+        raw = await self._conn.get_raw_connection()
+        self._driver = raw.driver_connection
+        self._listener = lambda connection, pid, channel, payload: on_message(payload)
+        await self._driver.add_listener(self.channel, self._listener)
+
+    async def send(self, payload: str) -> None:
+        await self._driver.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def ping(self) -> None:
+        await self._driver.execute("SELECT 1")
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            await self._driver.remove_listener(self.channel, self._listener)
+            await self._conn.close()
+        except Exception:
+            await self._conn.invalidate()
+        self._conn = self._driver = self._listener = None
+
+
+class MemoryTransport:
+    """Delivers to the other transports of the same hub, for running several
+    buses in one process"""
+
+    def __init__(self, hub: List["MemoryTransport"]):
+        self.hub = hub
+        self._on_message: Optional[MessageCallback] = None
+
+    async def connect(self, on_message: MessageCallback) -> None:
+        self._on_message = on_message
+        self.hub.append(self)
+
+    async def send(self, payload: str) -> None:
+        loop = asyncio.get_running_loop()
+        for peer in self.hub:
+            if peer is not self and peer._on_message is not None:
+                loop.call_soon(peer._on_message, payload)
+
+    async def ping(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        if self in self.hub:
+            self.hub.remove(self)
+
+
+memory_hub: List[MemoryTransport] = []
+
+
+class InvalidationBus:
+    """Propagates invalidations and station changes between workers.
+
+    Messages carry the sending worker's id and a version counting up by one
+    per message. A receiver that sees a version skipped, or that had to
+    reconnect, cannot tell what it missed and runs the resync handlers,
+    which rebuild in-process state from the database.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.backend: Optional[str] = None
+        self.transport = None
+        self.connected = False
+        self._handlers: Dict[str, Handler] = {}
+        self._resync_handlers: List[Callable[[], Any]] = []
+        self._outbox: Deque[str] = deque()
+        self._peers: Dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.gaps = 0
+        self.reconnects = 0
+        self.resyncs = 0
+
+    def on(self, topic: str, handler: Handler) -> None:
+        """Handle items published on a topic by other workers"""
+        self._handlers[topic] = handler
+
+    def on_resync(self, handler: Callable[[], Any]) -> None:
+        """Run after messages may have been missed; may return a coroutine"""
+        self._resync_handlers.append(handler)
+
+    async def start(self, backend: Optional[str] = None, transport=None) -> None:
+        """Connect and listen, then keep the connection up in a background
+        task. Returns once listening, so in-process state loaded afterwards
+        misses no message; if that first attempt fails, the bus resyncs once
+        it gets connected."""
+        self.backend = backend or settings.INVALIDATION_BACKEND
+        if self.backend == "none":
+            return
+        if transport is not None:
+            self.transport = transport
+        elif self.backend == "memory":
+            self.transport = MemoryTransport(memory_hub)
+        else:
+            self.transport = PostgresTransport(settings.INVALIDATION_CHANNEL)
+        self._wakeup = asyncio.Event()
+        try:
+            await self._connect()
+        except Exception as e:
+            await self._disconnected(e)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Send what is still queued, then disconnect"""
+        if self._task is None:
+            return
+        if self.connected:
+            try:
+                await asyncio.wait_for(self._send_outbox(), timeout=5)
+            except Exception as e:
+                logger.warning(f"Dropping {len(self._outbox)} invalidation messages: {e}")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.transport.close()
+        self.connected = False
+
+    def publish(self, topic: str, items: List[Any]) -> None:
+        """Queue items for the other workers; items are JSON-encodable and
+        may be split over several messages"""
+        if self._task is None or not items:
+            return
+        prefix = f'{{"o":"{self.origin}","t":"{topic}","i":['.encode()
+        budget = MAX_PAYLOAD_BYTES - len(prefix) - 32
+        chunk: List[bytes] = []
+        size = 0
+        for item in items:
+            encoded = dumps(item)
+            if len(encoded) > budget:
+                # Never sent; the version gap makes peers resync
+                logger.warning(f"Invalidation item of {len(encoded)} bytes on {topic!r} too large")
+                self.version += 1
+                continue
+            if chunk and size + len(encoded) + 1 > budget:
+                self._queue(prefix, chunk)
+                chunk, size = [], 0
+            chunk.append(encoded)
+            size += len(encoded) + 1
+        if chunk:
+            self._queue(prefix, chunk)
+        self._wakeup.set()
+
+    def _queue(self, prefix: bytes, chunk: List[bytes]) -> None:
+        self.version += 1
+        if len(self._outbox) >= MAX_OUTBOX:
+            self.dropped += len(self._outbox)
+            self._outbox.clear()
+        self._outbox.append(
+            (prefix + b",".join(chunk) + f'],"v":{self.version}}}'.encode()).decode())
+
+    def _receive(self, payload: str) -> None:
+        try:
+            message = orjson.loads(payload)
+            origin, version = message["o"], message["v"]
+        except Exception:
+            logger.warning(f"Ignoring malformed invalidation message {payload[:200]!r}")
+            return
+        if origin == self.origin:
+            return
+        self.received += 1
+        last = self._peers.get(origin)
+        self._peers[origin] = version
+        if last is not None and version != last + 1:
+            self.gaps += 1
+            self._resync()
+        handler = self._handlers.get(message["t"])
+        if handler is None:
+            return
+        try:
+            handler(message["i"])
+        except Exception:
+            logger.exception(f"Invalidation handler for {message['t']!r} failed")
+
+    def _resync(self) -> None:
+        self.resyncs += 1
+        for handler in self._resync_handlers:
+            try:
+                result = handler()
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception:
+                logger.exception(f"Resync handler {handler!r} failed")
+
+    async def _send_outbox(self) -> None:
+        while self._outbox:
+            await self.transport.send(self._outbox[0])
+            self._outbox.popleft()
+            self.sent += 1
+
+    async def _connect(self) -> None:
+        await self.transport.connect(self._receive)
+        self.connected = True
+        if self.reconnects:
+            self._resync()
+
+    async def _disconnected(self, error: Exception) -> None:
+        logger.error(f"Invalidation bus connection lost: {error}")
+        self.connected = False
+        self.reconnects += 1
+        try:
+            await self.transport.close()
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                if not self.connected:
+                    await self._connect()
+                backoff = 0.5
+                while True:
+                    if not self._outbox:
+                        try:
+                            await asyncio.wait_for(self._wakeup.wait(), timeout=PING_SECONDS)
+                        except asyncio.TimeoutError:
+                            await self.transport.ping()
+                            continue
+                    self._wakeup.clear()
+                    await self._send_outbox()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._disconnected(e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "origin": self.origin,
+            "connected": self.connected,
+            "version": self.version,
+            "queued": len(self._outbox),
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.dropped,
+            "gaps": self.gaps,
+            "reconnects": self.reconnects,
+            "resyncs": self.resyncs,
+            "peers": len(self._peers),
+        }
+
+
+invalidation_bus = InvalidationBus()
+
+
+def _encode_snapshot(snapshot: Optional[StationSnapshot]) -> Optional[list]:
+    if snapshot is None:
+        return None
+    return [str(snapshot.id), snapshot.name, snapshot.location,
+            snapshot.max_capacity_kw, snapshot.status.value,
+            snapshot.latitude, snapshot.longitude]
+
+
+def _decode_snapshot(item: Optional[list]) -> Optional[StationSnapshot]:
+    if item is None:
+        return None
+    id, name, location, max_capacity_kw, status, latitude, longitude = item
+    return StationSnapshot(
+        uuid.UUID(id), name, location, max_capacity_kw, StationStatus(status),
+        latitude, longitude)
+
+
+def _forward_station_changes(changes: List[StationChange]) -> None:
+    invalidation_bus.publish(STATIONS, [
+        [_encode_snapshot(before), _encode_snapshot(after)] for before, after in changes
+    ])
+
+
+def _receive_station_changes(items: List[Any]) -> None:
+    station_events.receive([
+        (_decode_snapshot(before), _decode_snapshot(after)) for before, after in items
+    ])
+
+
+station_events.forward(_forward_station_changes)
+invalidation_bus.on(STATIONS, _receive_station_changes)
@@ -0,0 +1,172 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import QueryUsage, db_stats, request_query_usage
+from app.db.session import engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+RouteKey = Tuple[str, str]  # (method, route template)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two increments"""
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class RequestMetrics:
+    """Per-worker request metrics. Everything runs on the event loop thread,
+    so plain integers are updated without locks."""
+
+    def __init__(self):
+        # method -> count; the route is only known once the app has run
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.latency: Dict[RouteKey, Histogram] = {}
+        self.db_queries: Dict[RouteKey, Histogram] = {}
+        self.db_seconds: Dict[RouteKey, float] = defaultdict(float)
+        self.responses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+
+    def observe(self, key: RouteKey, status: int, seconds: float, usage: QueryUsage) -> None:
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.db_queries[key] = Histogram(DB_QUERY_BUCKETS)
+        latency.observe(seconds)
+        self.db_queries[key].observe(usage.queries)
+        self.db_seconds[key] += usage.seconds
+        self.responses[(key[0], key[1], status)] += 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for method, value in self.in_flight.items():
+            lines.append(f'http_requests_in_flight{{method="{_escape(method)}"}} {value}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for key, histogram in self.latency.items():
+            lines += histogram.render("http_request_duration_seconds", _labels(key))
+
+        lines += [
+            "# HELP http_responses_total Responses by route template and status code.",
+            "# TYPE http_responses_total counter",
+        ]
+        for (method, route, status), value in self.responses.items():
+            lines.append(
+                f'http_responses_total{{{_labels((method, route))},status="{status}"}} {value}')
+
+        lines += [
+            "# HELP http_request_db_queries DB round trips per request.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        for key, histogram in self.db_queries.items():
+            lines += histogram.render("http_request_db_queries", _labels(key))
+
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in DB queries.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for key, value in self.db_seconds.items():
+            lines.append(f"http_request_db_seconds_total{{{_labels(key)}}} {value}")
+
+        lines += [
+            "# HELP db_pool_checked_out Connections currently checked out.",
+            "# TYPE db_pool_checked_out gauge",
+            f"db_pool_checked_out {engine.pool.checkedout()}",
+            "# HELP db_pool_checkouts_total Connection checkouts.",
+            "# TYPE db_pool_checkouts_total counter",
+            f"db_pool_checkouts_total {db_stats.checkouts}",
+            "# HELP db_pool_wait_seconds_total Time spent waiting for a connection.",
+            "# TYPE db_pool_wait_seconds_total counter",
+            f"db_pool_wait_seconds_total {db_stats.wait_seconds_total}",
+            "# HELP db_queries_total Queries executed.",
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {db_stats.queries}",
+            "# HELP db_slow_queries_total Queries slower than DB_SLOW_QUERY_MS.",
+            "# TYPE db_slow_queries_total counter",
+            f"db_slow_queries_total {db_stats.slow_queries}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: RouteKey) -> str:
+    return f'method="{_escape(key[0])}",route="{_escape(key[1])}"'
+
+
+request_metrics = RequestMetrics()
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route a request matched; the router sets it in
+    the scope, so it is known from the endpoint on and after the app has run"""
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """Records latency, status codes, in-flight requests and DB usage per
+    route template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        usage = QueryUsage()
+        token = request_query_usage.set(usage)
+        request_metrics.in_flight[method] += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_metrics.in_flight[method] -= 1
+            key = (method, route_template(scope))
+            request_metrics.observe(key, status, time.perf_counter() - started, usage)
+            request_query_usage.reset(token)
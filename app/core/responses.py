@@ -0,0 +1,58 @@
+import uuid
+from typing import Any, Iterable, List, Optional
+
+import orjson
+from fastapi import Response
+
+from app.models.station import Station
+
+# Same fields, in the same order, as the Station response schema, so rows
+# selected with these columns encode to the same JSON as the validated path
+STATION_COLUMNS = (
+    Station.name,
+    Station.location,
+    Station.max_capacity_kw,
+    Station.latitude,
+    Station.longitude,
+    Station.id,
+    Station.status,
+    Station.created_at,
+    Station.updated_at,
+)
+STATION_FIELDS = tuple(column.key for column in STATION_COLUMNS)
+
+
+def _default(value: Any) -> Any:
+    # asyncpg returns its own UUID subclass, which orjson does not recognise
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    # UTC datetimes as "Z", matching pydantic's JSON output
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def station_rows(rows: Iterable[tuple]) -> List[dict]:
+    """Dicts for rows selected with STATION_COLUMNS"""
+    return [dict(zip(STATION_FIELDS, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson.
+
+    Returned directly from a path operation it skips response_model
+    validation, so the content must already match the documented schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """Build a FastJSONResponse keeping headers already set on the
+    path operation's injected response (ETag, cursors)"""
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, headers=headers)
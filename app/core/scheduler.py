@@ -1,43 +1,15 @@
-import logging
-from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.future import select
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from typing import Any, Optional
 
-from app.core.config import settings
-from app.models.station import Station, StationStatus
-from app.db.session import AsyncSessionLocal
+# Scheduler for periodic housekeeping jobs. It is created on first use so
+# importing the app does not pull in APScheduler. Jobs are re-registered on
+# every start, so the default in-memory job store is enough; scheduled
+# station status changes are handled by app.core.transitions.
+_scheduler: Optional[Any] = None
 
-logger = logging.getLogger(__name__)
 
-# Create a synchronous engine for the job store (remove "+asyncpg" if present)
-sync_db_url = str(settings.DATABASE_URL).replace("+asyncpg", "")
-sync_engine = create_engine(sync_db_url)
-
-# Global scheduler instance
-scheduler = AsyncIOScheduler(
-    timezone="UTC",
-    jobstores={
-        'default': SQLAlchemyJobStore(engine=sync_engine)
-    }
-)
-
-
-async def scheduled_status_change(station_id: str, target_status: str):
-    """Change the status of a station after a delay."""
-    try:
-        async with AsyncSessionLocal() as db:
-            print(
-                f"Changing status of station {station_id} to {target_status}")
-            result = await db.execute(select(Station).where(Station.id == station_id))
-            station = result.scalars().first()
-            if station:
-                station.status = StationStatus(target_status)
-                await db.commit()
-                logger.info(
-                    f"Station {station_id} status changed to {target_status}")
-            else:
-                logger.error(f"Station {station_id} not found")
-    except Exception as e:
-        logger.error(f"Error changing status: {e}")
+def get_scheduler() -> Any:
+    global _scheduler
+    if _scheduler is None:
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        _scheduler = AsyncIOScheduler(timezone="UTC")
+    return _scheduler
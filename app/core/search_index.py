@@ -0,0 +1,474 @@
+import bisect
+import heapq
+import itertools
+import logging
+import re
+import unicodedata
+import uuid
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, false, func, literal, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import station_events
+from app.core.invalidation import invalidation_bus
+from app.core.station_events import SNAPSHOT_COLUMNS, StationChange, StationSnapshot
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station
+
+logger = logging.getLogger(__name__)
+
+# Words sharing at least this fraction of their trigrams count as typos
+FUZZY_THRESHOLD = 0.4
+# Query words shorter than this, and numbers, only match as prefixes
+FUZZY_MIN_LENGTH = 3
+# Query words starting more vocabulary words than this are checked
+# against each candidate station instead of through the postings
+MAX_MATCHED_WORDS = 64
+# Matches are first looked for by walking the postings of the rarest query
+# word in name order, checking the other words on each station; after this
+# many stations, the query words' postings are intersected instead
+WALK_BUDGET = 32
+# Up to this many intersected candidates are sorted; more are found by
+# walking the postings in name order, where they are then frequent
+SORT_CANDIDATES = 2000
+
+_WORD = re.compile(r"\w+")
+
+# (normalized name, slot): stations sort by name
+Key = Tuple[str, int]
+
+
+# Combining marks of the basic multilingual plane, which are the accents
+# left apart by NFKD decomposition
+_ACCENTS = dict.fromkeys(c for c in range(0x10000) if unicodedata.combining(chr(c)))
+
+
+def normalize(text: str) -> str:
+    """Case- and accent-insensitive form of a text"""
+    return unicodedata.normalize("NFKD", text).translate(_ACCENTS).casefold()
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of a word padded like pg_trgm does: two spaces before, one after"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _starts_any(term: str, station_words: List[str]) -> bool:
+    return any(word.startswith(term) for word in station_words)
+
+
+class _Postings:
+    """Stations having each word, in name order and as a set"""
+
+    def __init__(self):
+        self.keys: Dict[str, List[Key]] = {}
+        self.slots: Dict[str, Set[int]] = {}
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.keys
+
+    def add(self, word: str, key: Key, put: Callable[[List[Key], Key], None] = bisect.insort) -> None:
+        put(self.keys.setdefault(word, []), key)
+        self.slots.setdefault(word, set()).add(key[1])
+
+    def sort(self) -> None:
+        for keys in self.keys.values():
+            keys.sort()
+
+    def remove(self, word: str, key: Key) -> None:
+        keys = self.keys[word]
+        del keys[bisect.bisect_left(keys, key)]
+        if keys:
+            self.slots[word].discard(key[1])
+        else:
+            del self.keys[word], self.slots[word]
+
+
+class SearchIndex:
+    """Prefix and trigram search over station names and locations.
+
+    Station words form a sorted vocabulary, searched by prefix, with a
+    trigram index over the vocabulary for typo-tolerant matches. Results
+    rank stations whose name has a word starting with every query word
+    first, then stations matching through their location as well, then
+    fuzzy matches by similarity. Each group is ordered by name.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._pending: Optional[List[StationChange]] = None
+        # Stations are numbered internally: UUIDs hash and compare in Python
+        self._next_slot = itertools.count()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._slots: Dict[uuid.UUID, int] = {}
+        self._stations: Dict[int, StationSnapshot] = {}
+        self._keys: Dict[int, Key] = {}
+        # Per slot, the words of the name and of the name and location
+        self._words: Dict[int, Tuple[List[str], List[str]]] = {}
+        self._order: List[Key] = []
+        self._vocabulary: List[str] = []
+        self._names = _Postings()
+        self._locations = _Postings()
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._stations)
+
+    def _add_word(self, word: str) -> None:
+        i = bisect.bisect_left(self._vocabulary, word)
+        if i < len(self._vocabulary) and self._vocabulary[i] == word:
+            return
+        self._vocabulary.insert(i, word)
+        if word.isdigit():
+            return
+        for trigram in trigrams(word):
+            self._trigrams.setdefault(trigram, set()).add(word)
+
+    def _remove_word(self, word: str) -> None:
+        del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+        if word.isdigit():
+            return
+        for trigram in trigrams(word):
+            words_ = self._trigrams[trigram]
+            words_.discard(word)
+            if not words_:
+                del self._trigrams[trigram]
+
+    def _insert(self, station: StationSnapshot, put: Callable[[List[Key], Key], None]) -> int:
+        """Index a new station but not its words' trigrams"""
+        slot = next(self._next_slot)
+        name = normalize(station.name)
+        key = (name, slot)
+        name_words, location_words = _WORD.findall(name), words(station.location)
+        self._slots[station.id] = slot
+        self._stations[slot] = station
+        self._keys[slot] = key
+        self._words[slot] = (name_words, name_words + location_words)
+        put(self._order, key)
+        for word in set(name_words):
+            self._names.add(word, key, put)
+        for word in set(location_words):
+            self._locations.add(word, key, put)
+        return slot
+
+    def add(self, station: StationSnapshot) -> None:
+        slot = self._slots.get(station.id)
+        if slot is not None:
+            current = self._stations[slot]
+            if (current.name, current.location) == (station.name, station.location):
+                self._stations[slot] = station
+                return
+            self.remove(station.id)
+        slot = self._insert(station, bisect.insort)
+        for word in set(self._words[slot][1]):
+            self._add_word(word)
+
+    def remove(self, station_id: uuid.UUID) -> None:
+        slot = self._slots.pop(station_id, None)
+        if slot is None:
+            return
+        station = self._stations.pop(slot)
+        key = self._keys.pop(slot)
+        del self._words[slot]
+        del self._order[bisect.bisect_left(self._order, key)]
+        for postings, text in ((self._names, station.name), (self._locations, station.location)):
+            for word in set(words(text)):
+                postings.remove(word, key)
+                if word not in self._names and word not in self._locations:
+                    self._remove_word(word)
+
+    def on_station_changes(self, changes: List[StationChange]) -> None:
+        if self._pending is not None:
+            self._pending.extend(changes)
+        for before, after in changes:
+            if after is None:
+                self.remove(before.id)
+            else:
+                self.add(after)
+
+    def reset(self, stations: Iterable[StationSnapshot]) -> None:
+        """Replace the indexed stations, sorting once rather than on every
+        insertion"""
+        self._clear()
+        for station in stations:
+            self._insert(station, list.append)
+        self._order.sort()
+        self._names.sort()
+        self._locations.sort()
+        for word in sorted(self._names.keys.keys() | self._locations.keys.keys()):
+            self._add_word(word)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Rebuild the index from the database"""
+        # Changes published while the query runs are applied again on top
+        self._pending = []
+        try:
+            rows = (await db.execute(select(*SNAPSHOT_COLUMNS))).all()
+            self.reset(StationSnapshot(*row) for row in rows)
+            pending = self._pending
+        finally:
+            self._pending = None
+        self.on_station_changes(pending)
+        self.ready = True
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", start)
+        return self._vocabulary[start:end]
+
+    def _similar(self, word: str) -> Dict[str, float]:
+        """Vocabulary words sharing enough trigrams with a word, with their
+        similarity (shared / all trigrams of both)"""
+        query = trigrams(word)
+        shared = Counter()
+        for trigram in query:
+            shared.update(self._trigrams.get(trigram, ()))
+        similar = {}
+        for candidate, count in shared.items():
+            similarity = count / (len(query) + len(trigrams(candidate)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                similar[candidate] = similarity
+        return similar
+
+    @staticmethod
+    def _count(matched: Iterable[str], fields: List[_Postings]) -> int:
+        return sum(len(field.slots.get(word, ())) for word in matched for field in fields)
+
+    @staticmethod
+    def _having(matched: Iterable[str], fields: List[_Postings], within: Optional[Set[int]] = None) -> Set[int]:
+        """Stations having any of the words, restricted to `within` if given"""
+        sets = [field.slots[word] for word in matched for field in fields if word in field]
+        if within is not None:
+            # Intersections cost as much as their smaller operand; unions
+            # of large postings would not
+            sets = [within & stations for stations in sets]
+        if len(sets) == 1:
+            return sets[0]
+        return set().union(*sets)
+
+    def _in_name_order(self, matched: Iterable[str], fields: List[_Postings]) -> Iterator[int]:
+        """Slots of the stations having any of the words, in name order"""
+        postings = [field.keys[word] for word in matched for field in fields if word in field]
+        previous = None
+        for key in heapq.merge(*postings):
+            # A station is in the postings of each of its matched words
+            if key != previous:
+                previous = key
+                yield key[1]
+
+    @staticmethod
+    def _first(
+        stations: Iterable[int], accepted: Callable[[int], bool], limit: int, budget: Optional[int] = None
+    ) -> Optional[List[int]]:
+        """The first `limit` accepted stations, None if not found within budget"""
+        found = []
+        for checked, slot in enumerate(stations):
+            if checked == budget:
+                return None
+            if accepted(slot):
+                found.append(slot)
+                if len(found) == limit:
+                    break
+        return found
+
+    def search(self, query: str, limit: int = 10) -> List[StationSnapshot]:
+        """Stations matching every word of the query, best matches first"""
+        terms = list(dict.fromkeys(words(query)))
+        if not terms:
+            return []
+        prefixed = [self._prefixed(term) for term in terms]
+
+        results = self._prefix_matches(terms, prefixed, 0, set(), limit)
+        if len(results) < limit:
+            seen = set(results)
+            results += self._prefix_matches(terms, prefixed, 1, seen, limit - len(results))
+            if len(results) < limit:
+                seen.update(results)
+                results += self._fuzzy(terms, prefixed, seen, limit - len(results))
+        return [self._stations[slot] for slot in results]
+
+    def _prefix_matches(
+        self, terms: List[str], prefixed: List[List[str]], text: int, exclude: Set[int], limit: int
+    ) -> List[int]:
+        """First stations by name where every term starts a word of the
+        name (text 0) or of the name or location (text 1)"""
+        fields = [self._names] if text == 0 else [self._names, self._locations]
+
+        def accepted(slot: int, terms: List[str] = terms) -> bool:
+            station_words = self._words[slot][text]
+            return slot not in exclude and all(_starts_any(term, station_words) for term in terms)
+
+        # Terms starting too many words are only checked on each station
+        indexed = sorted(
+            ((self._count(matched, fields), matched) for matched in prefixed
+             if len(matched) <= MAX_MATCHED_WORDS),
+            key=lambda item: item[0])
+        if not indexed:
+            return self._first((key[1] for key in self._order), accepted, limit)
+        if not indexed[0][0]:
+            return []
+        driver = indexed[0][1]
+        found = self._first(self._in_name_order(driver, fields), accepted, limit, WALK_BUDGET)
+        if found is not None:
+            return found
+
+        candidates = self._having(driver, fields)
+        for _, matched in indexed[1:]:
+            candidates = self._having(matched, fields, candidates)
+        checked = [term for term, matched in zip(terms, prefixed) if len(matched) > MAX_MATCHED_WORDS]
+        if len(candidates) <= SORT_CANDIDATES:
+            candidates = candidates - exclude
+            if checked:
+                candidates = [slot for slot in candidates if accepted(slot, checked)]
+            return [key[1] for key in heapq.nsmallest(limit, map(self._keys.__getitem__, candidates))]
+        stations = (slot for slot in self._in_name_order(driver, fields) if slot in candidates)
+        return self._first(stations, lambda slot: accepted(slot, checked), limit)
+
+    def _fuzzy(self, terms: List[str], prefixed: List[List[str]], exclude: Set[int], limit: int) -> List[int]:
+        """Stations where every term starts or resembles one of their words,
+        by the sum of the terms' scores: 1 for a prefix, else the best
+        similarity"""
+        fields = [self._names, self._locations]
+        similar = [
+            self._similar(term) if len(term) >= FUZZY_MIN_LENGTH and not term.isdigit() else {}
+            for term in terms
+        ]
+
+        def scores(slot: int) -> Optional[List[float]]:
+            station_words = self._words[slot][1]
+            values = []
+            for term, close in zip(terms, similar):
+                if _starts_any(term, station_words):
+                    values.append(1.0)
+                    continue
+                best = max(close.get(word, 0.0) for word in station_words)
+                if not best:
+                    return None
+                values.append(best)
+            return values
+
+        # Matched words of each term grouped by the score they give
+        levels: List[Dict[float, List[str]]] = []
+        for matched, close in zip(prefixed, similar):
+            groups = {1.0: list(matched)} if matched else {}
+            for word, similarity in close.items():
+                groups.setdefault(similarity, []).append(word)
+            levels.append(groups)
+        indexed = sorted(
+            ((self._count(itertools.chain(*groups.values()), fields), i)
+             for i, (groups, matched) in enumerate(zip(levels, prefixed))
+             if len(matched) <= MAX_MATCHED_WORDS),
+            key=lambda item: item[0])
+        if not indexed or not indexed[0][0]:
+            return []
+        driver = indexed[0][1]
+        others = len(terms) - 1
+
+        def walk(candidates: Optional[Set[int]], budget: Optional[int]) -> Optional[List[int]]:
+            # The stations of the rarest term level by level, best first; a
+            # level cannot beat the top found so far once the score it would
+            # need exceeds one for each other term
+            top: List[Tuple[float, Key]] = []
+            checked = 0
+            for level in sorted(levels[driver], reverse=True):
+                bound = level + others
+                if len(top) == limit and -top[-1][0] > bound:
+                    break
+                for slot in self._in_name_order(levels[driver][level], fields):
+                    if checked == budget:
+                        return None
+                    checked += 1
+                    if slot in exclude or (candidates is not None and slot not in candidates):
+                        continue
+                    key = self._keys[slot]
+                    if len(top) == limit and top[-1] < (-bound, key):
+                        break
+                    values = scores(slot)
+                    # Stations scoring higher on the driving term came up earlier
+                    if values is None or values[driver] != level:
+                        continue
+                    entry = (-sum(values), key)
+                    if len(top) < limit or entry < top[-1]:
+                        bisect.insort(top, entry)
+                        del top[limit:]
+            return [key[1] for _, key in top]
+
+        found = walk(None, WALK_BUDGET)
+        if found is not None:
+            return found
+
+        candidates = None
+        for _, i in indexed:
+            candidates = self._having(itertools.chain(*levels[i].values()), fields, candidates)
+        if len(candidates) > SORT_CANDIDATES:
+            return walk(candidates, None)
+        scored = []
+        for slot in candidates - exclude:
+            values = scores(slot)
+            if values is not None:
+                scored.append((-sum(values), self._keys[slot]))
+        return [key[1] for _, key in heapq.nsmallest(limit, scored)]
+
+
+def search_query(query: str, limit: int):
+    """Search from the database, for when the index is not loaded, matching
+    like the index does: every word of the query starts a word of the name
+    or location, or, for words long enough, resembles one (pg_trgm word
+    similarity). Texts are compared as folded by the station_search_text()
+    SQL function, lowercase without accents, on which the trigram indexes
+    are built."""
+    terms = list(dict.fromkeys(words(query)))
+    if not terms:
+        return select(*SNAPSHOT_COLUMNS).where(false())
+    name = func.station_search_text(Station.name)
+    location = func.station_search_text(Station.location)
+    conditions, name_prefixes, prefixes, scores = [], [], [], []
+    for term in terms:
+        # \m anchors at the start of a word; terms are word characters only
+        pattern = rf"\m{term}"
+        name_prefix = name.op("~")(pattern)
+        prefix = or_(name_prefix, location.op("~")(pattern))
+        name_prefixes.append(name_prefix)
+        prefixes.append(prefix)
+        if len(term) < FUZZY_MIN_LENGTH or term.isdigit():
+            conditions.append(prefix)
+            scores.append(literal(1.0))
+            continue
+        conditions.append(or_(
+            prefix, literal(term).op("<%")(name), literal(term).op("<%")(location)))
+        scores.append(case((prefix, 1.0), else_=func.greatest(
+            func.word_similarity(term, name), func.word_similarity(term, location))))
+    # Name matches, then name or location matches, then the others by the
+    # sum of their terms' scores, as in SearchIndex.search
+    group = case((and_(*name_prefixes), 0), (and_(*prefixes), 1), else_=2)
+    return (
+        select(*SNAPSHOT_COLUMNS)
+        .where(and_(*conditions))
+        .order_by(group, sum(scores[1:], scores[0]).desc(), name, Station.id)
+        .limit(limit)
+    )
+
+
+search_index = SearchIndex()
+station_events.subscribe(search_index.on_station_changes)
+
+
+async def reload_search_index() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await search_index.load(db)
+    except Exception as e:
+        logger.error(f"Error reloading the station search index: {e}")
+
+
+invalidation_bus.on_resync(reload_search_index)
@@ -0,0 +1,84 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+# Results kept after completion, across all keys
+MAX_CACHED_RESULTS = 1024
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """Runs one computation at a time per key: concurrent callers with the
+    same key await the running one and share its result, which is then kept
+    for SINGLE_FLIGHT_TTL_SECONDS.
+
+    Keys must identify the result completely (e.g. include the table
+    version), since cached results are not invalidated.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._results: Optional[TTLCache] = None
+        # name -> counters
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"executions": 0, "coalesced": 0, "cache_hits": 0, "failures": 0})
+
+    def _cache(self) -> Optional[TTLCache]:
+        if self._results is None and settings.SINGLE_FLIGHT_TTL_SECONDS > 0:
+            self._results = TTLCache(
+                maxsize=MAX_CACHED_RESULTS, ttl=settings.SINGLE_FLIGHT_TTL_SECONDS)
+        return self._results
+
+    async def run(self, name: str, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of compute for key, shared with identical concurrent calls"""
+        counters = self._counters[name]
+        full_key = (name, key)
+        results = self._cache()
+        if results is not None:
+            result = results.get(full_key, _MISSING)
+            if result is not _MISSING:
+                counters["cache_hits"] += 1
+                return result
+
+        task = self._in_flight.get(full_key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(full_key, compute))
+            # Retrieve the exception even when every caller has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._in_flight[full_key] = task
+        else:
+            counters["coalesced"] += 1
+        # A caller being cancelled must not cancel the others' computation
+        return await asyncio.shield(task)
+
+    async def _execute(self, full_key: Tuple[str, Hashable], compute: Callable[[], Awaitable[Any]]) -> Any:
+        counters = self._counters[full_key[0]]
+        counters["executions"] += 1
+        try:
+            result = await compute()
+            if self._results is not None:
+                self._results[full_key] = result
+            return result
+        except Exception:
+            counters["failures"] += 1
+            raise
+        finally:
+            del self._in_flight[full_key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "cached": len(self._results) if self._results is not None else 0,
+            "names": {
+                name: {**counters, "saved": counters["coalesced"] + counters["cache_hits"]}
+                for name, counters in self._counters.items()
+            },
+        }
+
+
+analytics_flights = SingleFlight()
@@ -0,0 +1,41 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """Wall-clock time spent in each phase of application startup"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.ready_after: Optional[float] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ready(self) -> None:
+        self.ready_after = time.perf_counter() - self.started
+        logger.info("Startup finished in %.1f ms (%s)", self.ready_after * 1000, ", ".join(
+            f"{name}: {seconds * 1000:.1f} ms" for name, seconds in self.phases.items()))
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "phases_ms": {name: seconds * 1000 for name, seconds in self.phases.items()},
+            "ready_after_ms": self.ready_after * 1000 if self.ready_after is not None else None,
+        }
+
+
+# Created on first import, i.e. as the first thing app.main does
+startup_profile = StartupProfile()
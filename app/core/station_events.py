@@ -0,0 +1,81 @@
+import logging
+import uuid
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from app.models.station import Station, StationStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StationSnapshot(NamedTuple):
+    """The station fields in-process state is derived from"""
+    id: uuid.UUID
+    name: str
+    location: str
+    max_capacity_kw: float
+    status: StationStatus
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+    @classmethod
+    def of(cls, station: Station) -> "StationSnapshot":
+        return cls(
+            id=station.id,
+            name=station.name,
+            location=station.location,
+            max_capacity_kw=station.max_capacity_kw,
+            status=StationStatus(station.status),
+            latitude=station.latitude,
+            longitude=station.longitude,
+        )
+
+
+# Columns to select for StationSnapshot(*row)
+SNAPSHOT_COLUMNS = (
+    Station.id,
+    Station.name,
+    Station.location,
+    Station.max_capacity_kw,
+    Station.status,
+    Station.latitude,
+    Station.longitude,
+)
+
+
+# (before, after): before is None for creates, after is None for deletes
+StationChange = Tuple[Optional[StationSnapshot], Optional[StationSnapshot]]
+StationListener = Callable[[List[StationChange]], None]
+
+_listeners: List[StationListener] = []
+# Notified of this process' changes only, to pass them on to other workers
+_forwarders: List[StationListener] = []
+
+
+def subscribe(listener: StationListener) -> None:
+    _listeners.append(listener)
+
+
+def forward(forwarder: StationListener) -> None:
+    _forwarders.append(forwarder)
+
+
+def _notify(listeners: List[StationListener], changes: List[StationChange]) -> None:
+    for listener in listeners:
+        try:
+            listener(changes)
+        except Exception:
+            logger.exception("Station listener %r failed", listener)
+
+
+def publish(changes: List[StationChange]) -> None:
+    """Notify listeners of station changes committed by this process"""
+    changes = [change for change in changes if change[0] != change[1]]
+    if not changes:
+        return
+    _notify(_listeners, changes)
+    _notify(_forwarders, changes)
+
+
+def receive(changes: List[StationChange]) -> None:
+    """Notify listeners of station changes committed by another worker"""
+    _notify(_listeners, changes)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Set
+
+from app.core import station_events
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.responses import dumps
+from app.core.station_events import StationChange, StationSnapshot
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+STATUS = "status"
+DELETED = "deleted"
+
+
+class StreamEvent(NamedTuple):
+    seq: int
+    type: str
+    station_id: uuid.UUID
+    location: str
+    # Location before the change, when it moved the station
+    previous_location: Optional[str]
+    # Server-sent event frame, encoded once and shared by all subscribers
+    frame: bytes
+
+    def matches(self, location: Optional[str]) -> bool:
+        """Whether a stream of location gets the event; a station moving
+        away is sent too, so the stream learns that it left"""
+        return location is None or location in (self.location, self.previous_location)
+
+
+def _event_type(before: Optional[StationSnapshot], after: Optional[StationSnapshot]) -> str:
+    if before is None:
+        return CREATED
+    if after is None:
+        return DELETED
+    if before._replace(status=after.status) == after:
+        return STATUS
+    return UPDATED
+
+
+def _merged_type(pending: str, new: str) -> str:
+    """Type of an event replacing a still undelivered one for the same station"""
+    if new == DELETED:
+        return DELETED
+    if pending == CREATED:
+        return CREATED
+    if UPDATED in (pending, new):
+        return UPDATED
+    return STATUS
+
+
+def sse_frame(event: str, data: Any, event_id: Optional[str] = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode() + b"data: " + dumps(data) + b"\n\n"
+
+
+class Subscriber:
+    """One stream's pending events, at most one per station.
+
+    A station changing again before its event was delivered replaces that
+    event, so a slow consumer receives the latest state rather than every
+    intermediate one. A subscriber with more than max_pending stations
+    pending is marked overflowed and has to resynchronize.
+    """
+    __slots__ = ("location", "max_pending", "pending", "ready", "overflowed")
+
+    def __init__(self, location: Optional[str], max_pending: int):
+        self.location = location
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[uuid.UUID, StreamEvent]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+    def offer(self, event: StreamEvent) -> int:
+        """Queue an event; returns 1 if it replaced a pending one"""
+        if self.overflowed:
+            return 0
+        current = self.pending.pop(event.station_id, None)
+        if current is not None:
+            merged = _merged_type(current.type, event.type)
+            if merged != event.type:
+                event = event._replace(
+                    type=merged, frame=event.frame.replace(
+                        f"event: {event.type}\n".encode(), f"event: {merged}\n".encode(), 1))
+        elif len(self.pending) >= self.max_pending:
+            self.overflowed = True
+            self.pending.clear()
+            self.ready.set()
+            return 0
+        self.pending[event.station_id] = event
+        self.ready.set()
+        return 1 if current is not None else 0
+
+    def drain(self) -> List[StreamEvent]:
+        events = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+        return events
+
+
+class StationBroker:
+    """Fans committed station changes out to the open streams of this worker.
+
+    Writers only queue their changes; a background task encodes them and
+    offers them to the subscribers, so a write does not pay for every open
+    stream. Each batch is handled without awaiting, so subscribing together
+    with replay_since sees a batch either entirely or not at all.
+
+    Events are numbered per process; stream ids are ``<epoch>-<seq>`` so a
+    client resuming against another worker or after a restart is detected
+    and gets a fresh snapshot instead of a gap. The last STREAM_REPLAY_SIZE
+    events are kept for resuming.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._replay: Optional[Deque[StreamEvent]] = None
+        self._subscribers: Set[Subscriber] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.coalesced = 0
+        self.overflows = 0
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    @property
+    def replay(self) -> Deque[StreamEvent]:
+        if self._replay is None:
+            self._replay = deque(maxlen=settings.STREAM_REPLAY_SIZE)
+        return self._replay
+
+    def on_station_changes(self, changes: List[StationChange]) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._publish(changes)
+            return
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._fan_out())
+        self._queue.put_nowait(changes)
+
+    async def _fan_out(self) -> None:
+        while True:
+            changes = await self._queue.get()
+            try:
+                self._publish(changes)
+            except Exception:
+                logger.exception("Station stream fan-out failed")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _publish(self, changes: List[StationChange]) -> None:
+        for before, after in changes:
+            self.seq += 1
+            current = after if after is not None else before
+            event_type = _event_type(before, after)
+            data = {"seq": self.seq, **current._asdict()}
+            previous_location = before.location if before is not None else None
+            event = StreamEvent(
+                self.seq, event_type, current.id, current.location,
+                previous_location if previous_location != current.location else None,
+                sse_frame(event_type, data, self.event_id(self.seq)))
+            self.replay.append(event)
+            self.published += 1
+
+            for subscriber in self._subscribers:
+                if event.matches(subscriber.location):
+                    was_overflowed = subscriber.overflowed
+                    self.coalesced += subscriber.offer(event)
+                    if subscriber.overflowed and not was_overflowed:
+                        self.overflows += 1
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= settings.STREAM_MAX_SUBSCRIBERS
+
+    def subscribe(self, location: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(location, settings.STREAM_QUEUE_SIZE)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def replay_since(self, event_id: str, location: Optional[str] = None) -> Optional[List[StreamEvent]]:
+        """Events after event_id, or None when they are no longer available"""
+        epoch, _, seq = event_id.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self.seq:
+            return None
+        oldest = self.replay[0].seq if self.replay else self.seq + 1
+        if seq < oldest - 1:
+            return None
+        return [event for event in self.replay if event.seq > seq and event.matches(location)]
+
+    def reset(self) -> None:
+        """Start a new epoch after changes may have been missed: open streams
+        are reset and resumed ones start over with a snapshot"""
+        self.epoch = uuid.uuid4().hex[:12]
+        self.replay.clear()
+        for subscriber in self._subscribers:
+            subscriber.overflowed = True
+            subscriber.pending.clear()
+            subscriber.ready.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "seq": self.seq,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "overflows": self.overflows,
+            "replay_size": len(self.replay),
+        }
+
+
+station_broker = StationBroker()
+station_events.subscribe(station_broker.on_station_changes)
+invalidation_bus.on_resync(station_broker.reset)
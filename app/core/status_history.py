@@ -0,0 +1,234 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Float, String, and_, case, cast, extract, func, or_, update
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.station_events import StationChange
+from app.db.expressions import in_array, unnest_rows
+from app.models.station import Station, StationStatus
+from app.models.status_history import (
+    AVAILABILITY_RESOLUTIONS,
+    StationAvailabilityRollup,
+    StationStatusEvent,
+)
+
+# (station_id, resolution, bucket start as epoch seconds)
+BucketKey = Tuple[uuid.UUID, str, int]
+
+# (resolution, first bucket start, end of the last bucket, weight)
+BucketRange = Tuple[str, datetime, datetime, float]
+
+DEFAULT_WINDOW = timedelta(days=7)
+
+
+def split_interval(start: datetime, end: datetime, width: int) -> Iterator[Tuple[int, float]]:
+    """Yield (bucket start epoch, seconds) for the parts of [start, end)
+    falling in each bucket of the given width"""
+    lower, upper = start.timestamp(), end.timestamp()
+    bucket = int(lower // width) * width
+    while bucket < upper:
+        yield bucket, min(upper, bucket + width) - max(lower, bucket)
+        bucket += width
+
+
+def availability_buckets(
+    intervals: Iterable[Tuple[uuid.UUID, StationStatus, datetime, datetime]]
+) -> Dict[BucketKey, List[float]]:
+    """Add closed status intervals into [active, inactive] seconds per
+    station, resolution and bucket"""
+    buckets: Dict[BucketKey, List[float]] = {}
+    for station_id, status, start, end in intervals:
+        slot = 0 if status == StationStatus.ACTIVE else 1
+        for resolution, width in AVAILABILITY_RESOLUTIONS.items():
+            for bucket, seconds in split_interval(start, end, width):
+                key = (station_id, resolution, bucket)
+                buckets.setdefault(key, [0.0, 0.0])[slot] += seconds
+    return buckets
+
+
+def availability_upsert(buckets: Dict[BucketKey, List[float]]):
+    keys = sorted(buckets)
+    rows = unnest_rows([
+        ("station_id", [key[0] for key in keys], UUID(as_uuid=True)),
+        ("resolution", [key[1] for key in keys], String),
+        ("bucket_start", [datetime.fromtimestamp(key[2], timezone.utc) for key in keys],
+         DateTime(timezone=True)),
+        ("active_seconds", [buckets[key][0] for key in keys], Float),
+        ("inactive_seconds", [buckets[key][1] for key in keys], Float),
+    ])
+    rollup = StationAvailabilityRollup
+    stmt = insert(rollup).from_select(list(rows.c.keys()), select(rows))
+    return stmt.on_conflict_do_update(
+        index_elements=[rollup.station_id, rollup.resolution, rollup.bucket_start],
+        set_={
+            "active_seconds": rollup.active_seconds + stmt.excluded.active_seconds,
+            "inactive_seconds": rollup.inactive_seconds + stmt.excluded.inactive_seconds,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def record_status_changes(
+    db: AsyncSession,
+    changes: List[StationChange],
+    source: str,
+    at: Optional[datetime] = None,
+) -> None:
+    """Append a status event per station whose status changed and add the
+    status interval it closes to the availability rollups.
+
+    Must run in the transaction that makes the changes, before commit.
+    """
+    changes = [
+        (before, after) for before, after in changes
+        if after is not None and (before is None or before.status != after.status)
+    ]
+    if not changes:
+        return
+    at = at or datetime.now(timezone.utc)
+
+    # Start the new interval, reading back where the previous one started
+    previous = (
+        select(Station.id, Station.status_since)
+        .where(in_array(Station.id, [after.id for _, after in changes], UUID(as_uuid=True)))
+        .cte("previous")
+    )
+    result = await db.execute(
+        update(Station)
+        .where(Station.id == previous.c.id)
+        .values(status_since=at)
+        .returning(Station.id, previous.c.status_since)
+        .execution_options(synchronize_session=False)
+    )
+    since = dict(result.all())
+
+    await db.execute(insert(StationStatusEvent), [{
+        "station_id": after.id,
+        "from_status": before.status if before is not None else None,
+        "to_status": after.status,
+        "changed_at": at,
+        "source": source,
+    } for before, after in changes])
+
+    buckets = availability_buckets(
+        (before.id, before.status, since[before.id], at)
+        for before, _ in changes
+        if before is not None and before.id in since and since[before.id] < at
+    )
+    if buckets:
+        await db.execute(availability_upsert(buckets))
+
+
+def availability_window(
+    start: Optional[datetime], end: Optional[datetime]
+) -> Tuple[datetime, datetime]:
+    """Resolve a [start, end) availability window, defaulting to the last
+    week; the window is cut off at the current time"""
+    now = datetime.now(timezone.utc)
+    if end is not None and end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    end = min(end or now, now)
+    start = start or end - DEFAULT_WINDOW
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(
+            status_code=400, detail="start must be before end and in the past")
+    return start, end
+
+
+def _floor(moment: datetime, width: int) -> datetime:
+    epoch = moment.timestamp()
+    return datetime.fromtimestamp(epoch - epoch % width, timezone.utc)
+
+
+def _ceil(moment: datetime, width: int) -> datetime:
+    floor = _floor(moment, width)
+    return floor if floor == moment else floor + timedelta(seconds=width)
+
+
+def bucket_ranges(start: datetime, end: datetime, now: datetime) -> List[BucketRange]:
+    """Cover [start, end) with the fewest rollup buckets: whole days in the
+    middle, whole hours around them, and the partial hours at either end
+    weighted by the fraction of their elapsed time inside the window.
+
+    A window ending now therefore counts the current hour in full.
+    """
+    hour, day = AVAILABILITY_RESOLUTIONS["1h"], AVAILABILITY_RESOLUTIONS["1d"]
+    one_hour = timedelta(seconds=hour)
+
+    def partial(bucket: datetime, lower: datetime, upper: datetime) -> BucketRange:
+        elapsed = (min(bucket + one_hour, now) - bucket).total_seconds()
+        return ("1h", bucket, bucket + one_hour, (upper - lower).total_seconds() / elapsed)
+
+    first_hour, last_hour = _ceil(start, hour), _floor(end, hour)
+    if first_hour > last_hour:
+        # start and end fall within the same hour
+        return [partial(_floor(start, hour), start, end)]
+
+    ranges = []
+    if start < first_hour:
+        ranges.append(partial(first_hour - one_hour, start, first_hour))
+    if last_hour < end:
+        ranges.append(partial(last_hour, last_hour, end))
+    first_day, last_day = _ceil(first_hour, day), _floor(last_hour, day)
+    if first_day < last_day:
+        ranges.append(("1d", first_day, last_day, 1.0))
+        if first_hour < first_day:
+            ranges.append(("1h", first_hour, first_day, 1.0))
+        if last_day < last_hour:
+            ranges.append(("1h", last_day, last_hour, 1.0))
+    elif first_hour < last_hour:
+        ranges.append(("1h", first_hour, last_hour, 1.0))
+    return ranges
+
+
+def availability_query(start: datetime, end: datetime):
+    """Per-station active and inactive seconds within [start, end): closed
+    intervals from the rollups plus the current, still open interval"""
+    rollup = StationAvailabilityRollup
+    now = datetime.now(timezone.utc)
+    ranges = bucket_ranges(start, end, now)
+    conditions = [
+        and_(rollup.resolution == resolution,
+             rollup.bucket_start >= lower,
+             rollup.bucket_start < upper)
+        for resolution, lower, upper, _ in ranges
+    ]
+    weight = case(
+        *((condition, weight) for condition, (_, _, _, weight) in zip(conditions, ranges)),
+        else_=0.0,
+    )
+    closed = (
+        select(
+            rollup.station_id,
+            func.sum(weight * rollup.active_seconds).label("active"),
+            func.sum(weight * rollup.inactive_seconds).label("inactive"),
+        )
+        .where(or_(*conditions))
+        .group_by(rollup.station_id)
+        .subquery()
+    )
+
+    open_seconds = func.greatest(0.0, cast(extract(
+        "epoch", func.least(end, now) - func.greatest(start, Station.status_since)), Float))
+    is_active = Station.status == StationStatus.ACTIVE
+    active = func.coalesce(closed.c.active, 0.0) + case((is_active, open_seconds), else_=0.0)
+    inactive = func.coalesce(closed.c.inactive, 0.0) + case((is_active, 0.0), else_=open_seconds)
+
+    return (
+        select(
+            Station.id,
+            Station.name,
+            Station.location,
+            Station.status,
+            active.label("active_seconds"),
+            inactive.label("inactive_seconds"),
+        )
+        .outerjoin(closed, closed.c.station_id == Station.id)
+    )
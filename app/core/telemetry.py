@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Float, Integer, String, func
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core import station_events
+from app.core.config import settings
+from app.core.station_events import StationChange
+from app.db.expressions import in_array, unnest_rows
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station
+from app.models.telemetry import ROLLUP_RESOLUTIONS, StationReading, StationTelemetryRollup
+
+logger = logging.getLogger(__name__)
+
+# (station_id, recorded_at, power_kw, energy_kwh), in READING_COLUMNS order
+Reading = Tuple[uuid.UUID, datetime, float, Optional[float]]
+READING_COLUMNS = ("station_id", "recorded_at", "power_kw", "energy_kwh")
+
+# (station_id, resolution, bucket start as epoch seconds)
+BucketKey = Tuple[uuid.UUID, str, int]
+
+# Widest window the rollup endpoints read, in buckets
+MAX_WINDOW_BUCKETS = 10000
+
+
+class TelemetryBufferFull(Exception):
+    """Raised when the ingestion buffer cannot take more readings"""
+
+
+def rollup_readings(readings: Iterable[Reading]) -> Dict[BucketKey, List[float]]:
+    """Aggregate readings into [samples, power sum, power max, energy] per
+    station, resolution and bucket"""
+    buckets: Dict[BucketKey, List[float]] = {}
+    for station_id, recorded_at, power_kw, energy_kwh in readings:
+        epoch = int(recorded_at.timestamp())
+        energy = energy_kwh or 0.0
+        for resolution, width in ROLLUP_RESOLUTIONS.items():
+            key = (station_id, resolution, epoch - epoch % width)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [1, power_kw, power_kw, energy]
+            else:
+                bucket[0] += 1
+                bucket[1] += power_kw
+                if power_kw > bucket[2]:
+                    bucket[2] = power_kw
+                bucket[3] += energy
+    return buckets
+
+
+def rollup_upsert(buckets: Dict[BucketKey, List[float]]):
+    """One INSERT ... SELECT FROM unnest(...) ON CONFLICT DO UPDATE that adds
+    the buckets to the stored rollups.
+
+    Rows are sorted by key so concurrent flushes lock them in the same order.
+    """
+    keys = sorted(buckets)
+    values = [buckets[key] for key in keys]
+    rows = unnest_rows([
+        ("station_id", [key[0] for key in keys], UUID(as_uuid=True)),
+        ("resolution", [key[1] for key in keys], String),
+        ("bucket_start", [datetime.fromtimestamp(key[2], timezone.utc) for key in keys],
+         DateTime(timezone=True)),
+        ("samples", [int(value[0]) for value in values], Integer),
+        ("power_sum_kw", [value[1] for value in values], Float),
+        ("power_max_kw", [value[2] for value in values], Float),
+        ("energy_kwh", [value[3] for value in values], Float),
+    ])
+
+    rollup = StationTelemetryRollup
+    stmt = insert(rollup).from_select(list(rows.c.keys()), select(rows))
+    return stmt.on_conflict_do_update(
+        index_elements=[rollup.station_id, rollup.resolution, rollup.bucket_start],
+        set_={
+            "samples": rollup.samples + stmt.excluded.samples,
+            "power_sum_kw": rollup.power_sum_kw + stmt.excluded.power_sum_kw,
+            "power_max_kw": func.greatest(rollup.power_max_kw, stmt.excluded.power_max_kw),
+            "energy_kwh": rollup.energy_kwh + stmt.excluded.energy_kwh,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def telemetry_window(
+    resolution: str, start: Optional[datetime], end: Optional[datetime]
+) -> Tuple[datetime, datetime]:
+    """Resolve a [start, end) rollup window, defaulting to the last day"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=1)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start).total_seconds() / ROLLUP_RESOLUTIONS[resolution] > MAX_WINDOW_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Window spans more than {MAX_WINDOW_BUCKETS} {resolution} buckets, "
+                   f"use a coarser resolution")
+    return start, end
+
+
+class TelemetryIngestor:
+    """Buffers readings in memory and flushes them in batches.
+
+    Each flush chunk is one transaction: the rollup buckets are upserted
+    with a single statement, then the raw readings are written with COPY.
+    Readings still buffered when the process dies are lost; ingestion
+    answers 202 for that reason.
+    """
+
+    def __init__(
+        self,
+        flush_rows: Optional[int] = None,
+        max_buffered: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        use_copy: bool = True,
+    ):
+        self.flush_rows = flush_rows
+        self.max_buffered = max_buffered
+        self.flush_seconds = flush_seconds
+        self.use_copy = use_copy
+        self._buffer: List[Reading] = []
+        # Stations known to exist; learnt on first use, kept current by
+        # station events
+        self._stations: Set[uuid.UUID] = set()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def start(self) -> None:
+        self.flush_rows = self.flush_rows or settings.TELEMETRY_FLUSH_ROWS
+        self.max_buffered = self.max_buffered or settings.TELEMETRY_BUFFER_MAX_ROWS
+        self.flush_seconds = self.flush_seconds or settings.TELEMETRY_FLUSH_SECONDS
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out what is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def unknown_stations(
+        self, db: AsyncSession, station_ids: Set[uuid.UUID]
+    ) -> Set[uuid.UUID]:
+        """Return the IDs that do not belong to an existing station"""
+        unknown = station_ids - self._stations
+        if unknown:
+            result = await db.execute(
+                select(Station.id).where(in_array(Station.id, unknown, UUID(as_uuid=True))))
+            found = set(result.scalars().all())
+            self._stations |= found
+            unknown -= found
+        return unknown
+
+    def on_station_changes(self, changes: List[StationChange]) -> None:
+        for before, after in changes:
+            if after is None:
+                self._stations.discard(before.id)
+            elif before is None:
+                self._stations.add(after.id)
+
+    def add(self, readings: List[Reading], rejected: int = 0) -> None:
+        """Buffer readings of existing stations"""
+        if len(self._buffer) + len(readings) > (self.max_buffered or 0):
+            raise TelemetryBufferFull()
+        self._buffer.extend(readings)
+        self.accepted += len(readings)
+        self.rejected += rejected
+        if self._wakeup is not None and len(self._buffer) >= self.flush_rows:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "known_stations": len(self._stations),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_seconds * 1000,
+            "max_flush_ms": self.max_flush_seconds * 1000,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write out everything buffered so far; returns the readings written"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            size = self.flush_rows or settings.TELEMETRY_FLUSH_ROWS
+            written = 0
+            for start in range(0, len(batch), size):
+                chunk = batch[start:start + size]
+                started = time.perf_counter()
+                try:
+                    written += await self._write(chunk)
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Error flushing telemetry: {e}")
+                    # Keep the unwritten readings for the next flush
+                    self._buffer[:0] = batch[start:]
+                    break
+                elapsed = time.perf_counter() - started
+                self.flushes += 1
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.written += written
+            return written
+
+    async def _write(self, readings: List[Reading]) -> int:
+        try:
+            await self._write_batch(readings)
+        except IntegrityError:
+            # A station was deleted after its readings were accepted. The
+            # rollup upsert runs first, so the foreign key violation
+            # surfaces there rather than in the COPY.
+            readings = await self._drop_deleted_stations(readings)
+            await self._write_batch(readings)
+        return len(readings)
+
+    async def _write_batch(self, readings: List[Reading]) -> None:
+        if not readings:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(rollup_upsert(rollup_readings(readings)))
+            if self.use_copy:
+                connection = await db.connection()
+                raw = await connection.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    StationReading.__tablename__,
+                    records=readings,
+                    columns=READING_COLUMNS,
+                )
+            else:
+                await db.execute(
+                    insert(StationReading),
+                    [dict(zip(READING_COLUMNS, reading)) for reading in readings])
+            await db.commit()
+
+    async def _drop_deleted_stations(self, readings: List[Reading]) -> List[Reading]:
+        async with AsyncSessionLocal() as db:
+            station_ids = {reading[0] for reading in readings}
+            result = await db.execute(
+                select(Station.id).where(in_array(Station.id, station_ids, UUID(as_uuid=True))))
+            existing = set(result.scalars().all())
+        self._stations -= station_ids - existing
+        kept = [reading for reading in readings if reading[0] in existing]
+        self.dropped += len(readings) - len(kept)
+        logger.warning(f"Dropped {len(readings) - len(kept)} readings of deleted stations")
+        return kept
+
+
+telemetry_ingestor = TelemetryIngestor()
+station_events.subscribe(telemetry_ingestor.on_station_changes)
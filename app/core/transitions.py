@@ -0,0 +1,498 @@
+import asyncio
+import heapq
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, delete, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core import station_events
+from app.core.etag import commit_version
+from app.core.invalidation import SCHEDULES, TRANSITIONS, invalidation_bus
+from app.core.station_events import SNAPSHOT_COLUMNS, StationChange, StationSnapshot
+from app.core.status_history import record_status_changes
+from app.db.expressions import in_array, unnest_rows
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station, StationStatus
+from app.models.station_schedule import StationStatusSchedule
+from app.models.station_transition import StationStatusTransition
+
+logger = logging.getLogger(__name__)
+
+# Delay before a batch that failed to apply is retried
+RETRY_DELAY = timedelta(seconds=5)
+
+# Crontab day-of-week numbers; APScheduler counts from Monday instead
+WEEKDAYS = ["sun", "mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def _weekday(day: str) -> int:
+    """Crontab number of a day of week, 0 to 7 with Sunday both ends"""
+    day = day.lower()
+    if day.isdigit() and int(day) < len(WEEKDAYS):
+        return int(day)
+    if day in WEEKDAYS:
+        return WEEKDAYS.index(day)
+    raise ValueError(f"Invalid day of week {day!r}")
+
+
+def _weekdays(field: str) -> str:
+    """List the days of a crontab day-of-week field by name.
+
+    APScheduler numbers days from Monday and steps through its own week, so
+    ranges and steps are expanded here, in crontab's Sunday-first week.
+    """
+    days = set()
+    for part in field.split(","):
+        span, slash, step = part.partition("/")
+        if span == "*":
+            first, last = 0, 6
+        else:
+            start, dash, end = span.partition("-")
+            first = _weekday(start)
+            # A single day with a step runs to the end of the week
+            last = _weekday(end) if dash else 6 if slash else first
+        if first > last:
+            raise ValueError(f"Invalid day of week range {span!r}")
+        if slash and (not step.isdigit() or int(step) == 0):
+            raise ValueError(f"Invalid day of week step {step!r}")
+        days.update(day % 7 for day in range(first, last + 1, int(step) if slash else 1))
+    return ",".join(WEEKDAYS[day] for day in sorted(days))
+
+
+def cron_trigger(cron: str, tz: str) -> Any:
+    """Parse a five-field crontab expression evaluated in the time zone tz.
+
+    Raises ValueError for an invalid expression and KeyError for an unknown
+    time zone.
+    """
+    from apscheduler.triggers.combining import OrTrigger
+    from apscheduler.triggers.cron import CronTrigger
+    fields = cron.split()
+    if len(fields) != 5:
+        raise ValueError(f"Wrong number of fields; got {len(fields)}, expected 5")
+    minute, hour, day, month, day_of_week = fields
+    day_of_week = _weekdays(day_of_week)
+
+    def trigger(day: str, day_of_week: str) -> CronTrigger:
+        return CronTrigger(minute=minute, hour=hour, day=day, month=month,
+                           day_of_week=day_of_week, timezone=tz)
+
+    # When both day fields are restricted, crontab runs on the days matching
+    # either, where APScheduler requires both
+    if not day.startswith("*") and not fields[4].startswith("*"):
+        return OrTrigger([trigger(day, "*"), trigger("*", day_of_week)])
+    return trigger(day, day_of_week)
+
+
+def next_run(schedule: StationStatusSchedule, after: datetime) -> Optional[datetime]:
+    """First run of a recurring schedule at or after the given time; None when
+    it runs once or ends before"""
+    if schedule.cron is None:
+        return None
+    run_at = cron_trigger(schedule.cron, schedule.timezone).get_next_fire_time(None, after)
+    if run_at is None or (schedule.ends_at is not None and run_at > schedule.ends_at):
+        return None
+    return run_at.astimezone(timezone.utc)
+
+
+def selector_filter(schedule: StationStatusSchedule) -> ColumnElement:
+    """Condition on Station matching the selector of a schedule"""
+    conditions = []
+    if schedule.location is not None:
+        conditions.append(Station.location == schedule.location)
+    if schedule.status is not None:
+        conditions.append(Station.status == schedule.status)
+    if schedule.min_capacity_kw is not None:
+        conditions.append(Station.max_capacity_kw >= schedule.min_capacity_kw)
+    if schedule.max_capacity_kw is not None:
+        conditions.append(Station.max_capacity_kw <= schedule.max_capacity_kw)
+    if schedule.station_ids is not None:
+        conditions.append(in_array(Station.id, schedule.station_ids, UUID(as_uuid=True)))
+    return and_(*conditions)
+
+
+async def supersede_transitions(
+    db: AsyncSession, transitions: List[StationStatusTransition]
+) -> None:
+    """Delete the pending transitions due at the same time, for the same
+    station, as the ones about to be added in the same transaction; the
+    engine skips them when they come due. Changes due at other times are
+    independent and kept."""
+    pending = unnest_rows([
+        ("station_id", [t.station_id for t in transitions], UUID(as_uuid=True)),
+        ("due_at", [t.due_at for t in transitions], DateTime(timezone=True)),
+    ])
+    await db.execute(
+        delete(StationStatusTransition)
+        .where(StationStatusTransition.station_id == pending.c.station_id,
+               StationStatusTransition.due_at == pending.c.due_at)
+    )
+
+
+async def _set_status(
+    db: AsyncSession,
+    condition: ColumnElement,
+    target_status: StationStatus,
+    net: Dict[uuid.UUID, StationChange],
+) -> List[StationSnapshot]:
+    """Set the status of the stations matching condition in one UPDATE.
+
+    Returns the snapshots of the stations changed, from before the change,
+    and folds the change into net, which keeps one change per station.
+    """
+    locked = (
+        select(*SNAPSHOT_COLUMNS)
+        .where(condition, Station.status != target_status)
+        .with_for_update()
+        .cte("locked")
+    )
+    result = await db.execute(
+        update(Station)
+        .where(Station.id == locked.c.id)
+        .values(status=target_status)
+        .returning(*locked.c)
+        .execution_options(synchronize_session=False)
+    )
+    before = [StationSnapshot(*row) for row in result.all()]
+    for snapshot in before:
+        first = net[snapshot.id][0] if snapshot.id in net else snapshot
+        net[snapshot.id] = (first, snapshot._replace(status=target_status))
+    return before
+
+
+class PendingTransition(NamedTuple):
+    due_at: datetime
+    id: uuid.UUID
+    station_id: uuid.UUID
+    target_status: StationStatus
+
+    @classmethod
+    def of(cls, transition: StationStatusTransition) -> "PendingTransition":
+        return cls(transition.due_at, transition.id,
+                   transition.station_id, StationStatus(transition.target_status))
+
+
+async def _apply_transitions(
+    db: AsyncSession,
+    latest: Dict[uuid.UUID, PendingTransition],
+    net: Dict[uuid.UUID, StationChange],
+) -> None:
+    by_status: Dict[StationStatus, List[uuid.UUID]] = defaultdict(list)
+    for transition in latest.values():
+        by_status[transition.target_status].append(transition.station_id)
+    for target_status, station_ids in by_status.items():
+        await _set_status(
+            db, in_array(Station.id, station_ids, UUID(as_uuid=True)), target_status, net)
+
+
+class PendingSchedule(NamedTuple):
+    due_at: datetime
+    id: uuid.UUID
+
+    @classmethod
+    def of(cls, schedule: StationStatusSchedule) -> "PendingSchedule":
+        return cls(schedule.next_run_at, schedule.id)
+
+
+class _ScheduleRun(NamedTuple):
+    run_at: datetime
+    schedule: StationStatusSchedule
+    # None when this was the last run
+    next_run_at: Optional[datetime]
+
+
+class TransitionEngine:
+    """Applies scheduled status changes in batches from in-memory min-heaps.
+
+    The station_status_transition and station_status_schedule tables are the
+    source of truth: they are loaded on start, and a transition or schedule
+    run is only applied by the worker that claims its row, so several workers
+    can run the engine. Every worker tracks every row: those added are sent
+    to the others on the invalidation bus, and the tables are loaded again
+    when messages may have been missed. Changes due together are applied in
+    due order and coalesced, so a station gets one status event for the
+    batch.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self._heap: List[PendingTransition] = []
+        self._schedules: List[PendingSchedule] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # What is tracked while the tables are being loaded
+        self._pending: Optional[Tuple[List[PendingTransition], List[PendingSchedule]]] = None
+        self.applied = 0
+        self.schedule_runs = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        await self._load()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Transition engine started with {len(self._heap)} pending "
+                    f"and {len(self._schedules)} schedules")
+
+    async def _load(self) -> None:
+        # Rows tracked while the tables are read are kept on top
+        self._pending = ([], [])
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(StationStatusTransition))
+                transitions = [PendingTransition.of(t) for t in result.scalars().all()]
+                result = await db.execute(select(StationStatusSchedule))
+                schedules = [PendingSchedule.of(s) for s in result.scalars().all()]
+            pending_transitions, pending_schedules = self._pending
+        finally:
+            self._pending = None
+        self._heap = list({*transitions, *pending_transitions})
+        self._schedules = list({*schedules, *pending_schedules})
+        heapq.heapify(self._heap)
+        heapq.heapify(self._schedules)
+        self._wakeup.set()
+
+    async def reload(self) -> None:
+        """Load the tables again, after messages may have been missed"""
+        if self._task is None:
+            return
+        try:
+            await self._load()
+        except Exception as e:
+            logger.error(f"Error reloading status transitions: {e}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def push(self, *transitions: PendingTransition) -> None:
+        """Track transitions that have been committed to the database, here
+        and in the other workers"""
+        self.track(transitions)
+        invalidation_bus.publish(TRANSITIONS, [
+            [t.due_at.isoformat(), str(t.id), str(t.station_id), t.target_status.value]
+            for t in transitions])
+
+    def push_schedule(self, *schedules: PendingSchedule) -> None:
+        """Track schedule runs that have been committed to the database, here
+        and in the other workers"""
+        self.track_schedules(schedules)
+        invalidation_bus.publish(SCHEDULES, [
+            [s.due_at.isoformat(), str(s.id)] for s in schedules])
+
+    def track(self, transitions: Iterable[PendingTransition]) -> None:
+        head = self._next_due()
+        for transition in transitions:
+            heapq.heappush(self._heap, transition)
+            if self._pending is not None:
+                self._pending[0].append(transition)
+        self._wake_if_sooner(head)
+
+    def track_schedules(self, schedules: Iterable[PendingSchedule]) -> None:
+        head = self._next_due()
+        for schedule in schedules:
+            heapq.heappush(self._schedules, schedule)
+            if self._pending is not None:
+                self._pending[1].append(schedule)
+        self._wake_if_sooner(head)
+
+    def _wake_if_sooner(self, head: Optional[datetime]) -> None:
+        if self._wakeup is not None and (head is None or self._next_due() < head):
+            self._wakeup.set()
+
+    def _next_due(self) -> Optional[datetime]:
+        heads = [heap[0].due_at for heap in (self._heap, self._schedules) if heap]
+        return min(heads) if heads else None
+
+    def stats(self) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        return {
+            "queue_depth": len(self._heap),
+            "next_due_at": self._heap[0].due_at.isoformat() if self._heap else None,
+            "overdue": sum(1 for t in self._heap if t.due_at <= now),
+            "schedules": len(self._schedules),
+            "next_schedule_run_at":
+                self._schedules[0].due_at.isoformat() if self._schedules else None,
+            "applied": self.applied,
+            "schedule_runs": self.schedule_runs,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_lag_seconds": self.last_lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            next_due = self._next_due()
+            if next_due is None:
+                await self._wakeup.wait()
+                continue
+
+            delay = (next_due - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = datetime.now(timezone.utc)
+            batch = []
+            while self._heap and self._heap[0].due_at <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._heap))
+            schedules = []
+            while self._schedules and self._schedules[0].due_at <= now:
+                schedules.append(heapq.heappop(self._schedules))
+
+            try:
+                await self._apply(batch, schedules)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Error applying status transitions: {e}")
+                retry_at = datetime.now(timezone.utc) + RETRY_DELAY
+                for transition in batch:
+                    heapq.heappush(self._heap, transition._replace(due_at=retry_at))
+                for schedule in schedules:
+                    heapq.heappush(self._schedules, schedule._replace(due_at=retry_at))
+
+    async def _claim(
+        self, db: AsyncSession, pending: PendingSchedule, now: datetime
+    ) -> Optional[_ScheduleRun]:
+        """Lock a due schedule and move it to its next run, or delete it after
+        its last one; None when it was cancelled or another worker runs it"""
+        result = await db.execute(
+            select(StationStatusSchedule)
+            .where(StationStatusSchedule.id == pending.id,
+                   StationStatusSchedule.next_run_at <= now)
+            .with_for_update(skip_locked=True)
+        )
+        schedule = result.scalars().first()
+        if schedule is None:
+            return None
+        run_at = schedule.next_run_at
+        # Runs missed while no worker was running collapse into this one
+        following = next_run(schedule, max(now, run_at) + timedelta(microseconds=1))
+        if following is None:
+            await db.delete(schedule)
+        else:
+            schedule.next_run_at = following
+            schedule.last_run_at = run_at
+        return _ScheduleRun(run_at, schedule, following)
+
+    async def _apply(
+        self, batch: List[PendingTransition], schedules: List[PendingSchedule]
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            claimed = set()
+            if batch:
+                # Claim the transitions; rows already applied by another
+                # worker or cancelled are simply not returned.
+                result = await db.execute(
+                    delete(StationStatusTransition)
+                    .where(in_array(StationStatusTransition.id,
+                                    [t.id for t in batch], UUID(as_uuid=True)))
+                    .returning(StationStatusTransition.id)
+                )
+                claimed = set(result.scalars().all())
+            runs = []
+            for pending in schedules:
+                run = await self._claim(db, pending, now)
+                if run is not None:
+                    runs.append(run)
+
+            # Apply in due order. Consecutive transitions are applied with one
+            # UPDATE per target status, the latest winning when a station has
+            # several; each schedule run is one UPDATE on its selector.
+            steps = sorted(
+                [(t.due_at, t) for t in batch if t.id in claimed]
+                + [(run.run_at, run) for run in runs],
+                key=lambda step: step[0])
+            net: Dict[uuid.UUID, StationChange] = {}
+            latest: Dict[uuid.UUID, PendingTransition] = {}
+            reverts = []
+            for _, step in steps:
+                if isinstance(step, PendingTransition):
+                    latest[step.station_id] = step
+                    continue
+                await _apply_transitions(db, latest, net)
+                latest = {}
+
+                schedule = step.schedule
+                changed = await _set_status(
+                    db, selector_filter(schedule), schedule.target_status, net)
+                schedule.last_run_count = len(changed)
+                if schedule.duration_seconds:
+                    # Change the stations back at the end of the window
+                    revert_at = step.run_at + timedelta(seconds=schedule.duration_seconds)
+                    reverts.extend(StationStatusTransition(
+                        id=uuid.uuid4(), station_id=snapshot.id,
+                        target_status=snapshot.status, due_at=revert_at,
+                    ) for snapshot in changed)
+            await _apply_transitions(db, latest, net)
+            if reverts:
+                # Runs changing a station back at the same time conflict;
+                # the latest wins
+                reverts = list({(t.station_id, t.due_at): t for t in reverts}.values())
+                await supersede_transitions(db, reverts)
+                db.add_all(reverts)
+
+            changes = [(before, after) for before, after in net.values()
+                       if before.status != after.status]
+            if changes:
+                await record_status_changes(db, changes, "schedule")
+                await commit_version(db)
+            else:
+                await db.commit()
+
+        station_events.publish(changes)
+        self.push(*(PendingTransition.of(transition) for transition in reverts))
+        self.push_schedule(*(PendingSchedule(run.next_run_at, run.schedule.id)
+                             for run in runs if run.next_run_at is not None))
+
+        now = datetime.now(timezone.utc)
+        self.batches += 1
+        self.applied += len(claimed)
+        self.schedule_runs += len(runs)
+        if steps:
+            lag = max((now - due_at).total_seconds() for due_at, _ in steps)
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+        logger.info(f"Applied {len(claimed)} status transitions and {len(runs)} "
+                    f"schedule runs, changing {len(changes)} stations")
+
+
+transition_engine = TransitionEngine()
+
+
+def _receive_transitions(items: List[Any]) -> None:
+    transition_engine.track(
+        PendingTransition(datetime.fromisoformat(due_at), uuid.UUID(id),
+                          uuid.UUID(station_id), StationStatus(status))
+        for due_at, id, station_id, status in items)
+
+
+def _receive_schedules(items: List[Any]) -> None:
+    transition_engine.track_schedules(
+        PendingSchedule(datetime.fromisoformat(due_at), uuid.UUID(id))
+        for due_at, id in items)
+
+
+invalidation_bus.on(TRANSITIONS, _receive_transitions)
+invalidation_bus.on(SCHEDULES, _receive_schedules)
+invalidation_bus.on_resync(transition_engine.reload)
@@ -2,3 +2,8 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.station import Station  # noqa
+from app.models.station_transition import StationStatusTransition  # noqa
+from app.models.station_schedule import StationStatusSchedule  # noqa
+from app.models.seed_state import SeedState  # noqa
+from app.models.telemetry import StationReading, StationTelemetryRollup  # noqa
+from app.models.status_history import StationStatusEvent, StationAvailabilityRollup  # noqa
@@ -0,0 +1,32 @@
+from typing import Any, Iterable, Sequence, Tuple
+
+from sqlalchemy import any_, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.elements import BindParameter, ColumnElement
+from sqlalchemy.sql.selectable import TableValuedAlias
+from sqlalchemy.types import TypeEngine
+
+
+def array_param(values: Iterable[Any], item_type: TypeEngine) -> BindParameter:
+    """Bind a list of values as a single typed array parameter"""
+    return bindparam(None, list(values), type_=ARRAY(item_type))
+
+
+def in_array(column: Any, values: Iterable[Any], item_type: TypeEngine) -> ColumnElement:
+    """Render ``column = ANY(:values)`` with a single array parameter.
+
+    Unlike an expanding ``IN`` this keeps one prepared statement regardless
+    of how many values are passed.
+    """
+    return column == any_(array_param(values, item_type))
+
+
+def unnest_rows(columns: Sequence[Tuple[str, Iterable[Any], TypeEngine]]) -> TableValuedAlias:
+    """Render ``unnest(:col1, :col2, ...) AS anon(col1, col2, ...)`` from one
+    array parameter per column, as a source for ``INSERT ... SELECT``.
+
+    Like in_array, the statement is the same whatever the number of rows.
+    """
+    return func.unnest(
+        *(array_param(values, item_type) for _, values, item_type in columns)
+    ).table_valued(*(name for name, _, _ in columns)).render_derived()
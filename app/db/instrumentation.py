@@ -0,0 +1,150 @@
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest checkout in the recent wait average, and how fast the
+# average fades once no checkout completes
+RECENT_WAIT_WEIGHT = 0.2
+RECENT_WAIT_HALF_LIFE = 1.0
+
+
+class DBStats:
+    """Pool and query counters collected from SQLAlchemy engine events"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.queries = 0
+        self.query_seconds_total = 0.0
+        self.slow_queries = 0
+        self.slow_query_threshold = 0.2
+        self._recent_wait = 0.0
+        self._recent_wait_at = 0.0
+        # Checkouts waiting for a connection: key -> start time
+        self._waiting: Dict[int, float] = {}
+        self._waiter_keys = itertools.count()
+
+    def start_wait(self, started: float) -> int:
+        key = next(self._waiter_keys)
+        self._waiting[key] = started
+        return key
+
+    def end_wait(self, key: int) -> None:
+        self._waiting.pop(key, None)
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+        now = time.perf_counter()
+        self._recent_wait = (self._faded_wait(now) * (1 - RECENT_WAIT_WEIGHT)
+                             + seconds * RECENT_WAIT_WEIGHT)
+        self._recent_wait_at = now
+
+    def _faded_wait(self, now: float) -> float:
+        return self._recent_wait * 0.5 ** ((now - self._recent_wait_at) / RECENT_WAIT_HALF_LIFE)
+
+    def current_wait(self) -> float:
+        """Seconds checkouts currently wait for a connection: the longest wait
+        in progress or the recent average, whichever is larger"""
+        now = time.perf_counter()
+        waiting = now - min(self._waiting.values()) if self._waiting else 0.0
+        return max(waiting, self._faded_wait(now))
+
+    def record_query(self, seconds: float, statement: str) -> None:
+        self.queries += 1
+        self.query_seconds_total += seconds
+        if seconds >= self.slow_query_threshold:
+            self.slow_queries += 1
+            logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {statement[:200]}")
+
+    def snapshot(self, pool: Any) -> Dict[str, Any]:
+        return {
+            "pool": {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            },
+            "checkouts": self.checkouts,
+            "waiting": len(self._waiting),
+            "current_wait_ms": self.current_wait() * 1000,
+            "checkout_timeouts": self.checkout_timeouts,
+            "wait_ms_avg": self.wait_seconds_total / self.checkouts * 1000
+            if self.checkouts else 0.0,
+            "wait_ms_max": self.wait_seconds_max * 1000,
+            "queries": self.queries,
+            "query_ms_avg": self.query_seconds_total / self.queries * 1000
+            if self.queries else 0.0,
+            "slow_queries": self.slow_queries,
+            "slow_query_threshold_ms": self.slow_query_threshold * 1000,
+        }
+
+
+db_stats = DBStats()
+
+
+class QueryUsage:
+    """DB round trips and time spent by a single request"""
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware for the duration of a request
+request_query_usage: ContextVar[Optional[QueryUsage]] = ContextVar(
+    "request_query_usage", default=None)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        key = db_stats.start_wait(started)
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            db_stats.checkout_timeouts += 1
+            raise
+        finally:
+            db_stats.end_wait(key)
+        db_stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement executed through a (sync) engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        db_stats.record_query(elapsed, statement)
+        usage = request_query_usage.get()
+        if usage is not None:
+            usage.queries += 1
+            usage.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            started = context.connection.info.get("query_start_time")
+            if started:
+                started.pop()
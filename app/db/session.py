@@ -1,10 +1,27 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.instrumentation import InstrumentedAsyncPool, db_stats, instrument_engine
+
+engine_options = settings.db_engine_options()
+db_stats.slow_query_threshold = settings.DB_SLOW_QUERY_MS / 1000
 
 # Crear motor asíncrono
 engine = create_async_engine(
-    str(settings.DATABASE_URL), future=True, echo=True)
+    str(settings.DATABASE_URL),
+    future=True,
+    echo=engine_options["echo"],
+    poolclass=InstrumentedAsyncPool,
+    pool_size=engine_options["pool_size"],
+    max_overflow=engine_options["max_overflow"],
+    pool_timeout=engine_options["pool_timeout"],
+    pool_recycle=engine_options["pool_recycle"],
+    pool_pre_ping=engine_options["pool_pre_ping"],
+    connect_args={
+        "prepared_statement_cache_size": engine_options["prepared_statement_cache_size"],
+    },
+)
+instrument_engine(engine.sync_engine)
 
 # Crear una fábrica de sesiones asíncronas
 AsyncSessionLocal = sessionmaker(
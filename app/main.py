@@ -1,36 +1,108 @@
+# Imported first so that its creation time marks the start of app imports
+from app.core.startup import startup_profile
+
+import time
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 
-from app.routes import oauth, auth, stations, analytics
+from app.routes import oauth, auth, stations, analytics, internal, telemetry
+from app.core.admission import AdmissionMiddleware, admit_route
 from app.core.config import settings
-from app.core.scheduler import scheduler
+from app.core.http import close_http_client
+from app.core.scheduler import get_scheduler
+from app.core.analytics_state import analytics_state, reconcile_analytics_state
+from app.core.geo_index import geo_index
 from app.core.init_data import init_sample_data
-from app.db.session import AsyncSessionLocal
+from app.core.invalidation import invalidation_bus
+from app.core.metrics import MetricsMiddleware, request_metrics
+from app.core.search_index import search_index
+from app.core.security import shutdown_password_hasher
+from app.core.station_stream import station_broker
+from app.core.telemetry import telemetry_ingestor
+from app.core.transitions import transition_engine
+from app.db.session import AsyncSessionLocal, engine
+
+startup_profile.record("imports", time.perf_counter() - startup_profile.started)
 
 prefix = "/api/v1"
 
 
+async def _load_data() -> None:
+    async with AsyncSessionLocal() as db:
+        if settings.SEED_ON_STARTUP:
+            with startup_profile.phase("seeding"):
+                await init_sample_data(db)
+        with startup_profile.phase("analytics_state"):
+            await analytics_state.load(db)
+        if settings.GEO_INDEX_ENABLED:
+            with startup_profile.phase("geo_index"):
+                await geo_index.load(db)
+        if settings.SEARCH_INDEX_ENABLED:
+            with startup_profile.phase("search_index"):
+                await search_index.load(db)
+
+
+async def _start_transition_engine() -> None:
+    with startup_profile.phase("transition_engine"):
+        await transition_engine.start()
+
+
+def _start_scheduler() -> None:
+    with startup_profile.phase("scheduler"):
+        scheduler = get_scheduler()
+        scheduler.start()
+        scheduler.add_job(
+            reconcile_analytics_state,
+            trigger="interval",
+            seconds=settings.ANALYTICS_RECONCILE_SECONDS,
+            id="reconcile_analytics_state",
+            replace_existing=True,
+        )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: start the scheduler
-    scheduler.start()
+    # Startup: open the first pool connection, then initialize the
+    # independent subsystems concurrently
+    with startup_profile.phase("db_connect"):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
 
-    # Initialize sample data
-    async with AsyncSessionLocal() as db:
-        await init_sample_data(db)
+    _start_scheduler()
+    # Listen before loading in-process state, so no change falls in between
+    with startup_profile.phase("invalidation_bus"):
+        await invalidation_bus.start()
+    await asyncio.gather(_load_data(), _start_transition_engine())
+    telemetry_ingestor.start()
+    startup_profile.ready()
 
     yield
     # Shutdown: shut down the scheduler
-    scheduler.shutdown()
+    await transition_engine.stop()
+    await telemetry_ingestor.stop()
+    await station_broker.stop()
+    await invalidation_bus.stop()
+    get_scheduler().shutdown()
+    shutdown_password_hasher()
+    await close_http_client()
 
 app = FastAPI(
     title="Charging Stations API",
     description="API for managing electric vehicle charging stations",
     version="1.0.0",
     lifespan=lifespan,
+    # Per-route admission, once the router has matched the route
+    dependencies=[Depends(admit_route)],
 )
 
+# Innermost of the middlewares, so rejections still get CORS headers and
+# are counted in the metrics
+app.add_middleware(AdmissionMiddleware)
+
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -41,10 +113,14 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router, prefix=prefix)
 app.include_router(oauth.router, prefix=prefix)
 app.include_router(stations.router, prefix=prefix)
 app.include_router(analytics.router, prefix=prefix)
+app.include_router(telemetry.router, prefix=prefix)
+app.include_router(internal.router, prefix=prefix)
 
 
 @app.get("/")
@@ -55,3 +131,10 @@ async def root():
 @app.get("/healthcheck")
 async def healthcheck():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics of this worker"""
+    return PlainTextResponse(
+        request_metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,11 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class SeedState(Base):
+    """Checksum of the last fixture file applied by the seeding pipeline"""
+    __tablename__ = "seed_state"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    checksum: Mapped[str] = mapped_column(String, nullable=False)
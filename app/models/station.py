@@ -1,6 +1,8 @@
 import enum
 import uuid
-from sqlalchemy import String, Float, Enum
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, String, Float, Enum, Index, UniqueConstraint, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base_class import Base
@@ -13,11 +15,39 @@ class StationStatus(str, enum.Enum):
 
 class Station(Base):
     __tablename__ = "station"
+    __table_args__ = (
+        UniqueConstraint("name", "location", name="uq_station_name_location"),
+        # Covering indexes for the analytics filters (status, location,
+        # capacity range), so filtered reads can use index-only scans
+        Index("ix_station_location_status_capacity",
+              "location", "status", "max_capacity_kw",
+              postgresql_include=["id", "name", "created_at"]),
+        Index("ix_station_status_capacity", "status", "max_capacity_kw",
+              postgresql_include=["id", "name", "location", "created_at"]),
+        Index("ix_station_max_capacity_kw", "max_capacity_kw"),
+        # Keyset pagination of GET /stations and filtered-data
+        Index("ix_station_created_at_id", "created_at", "id"),
+        # Bounding-box reads of /stations/nearby when the in-memory index
+        # is not available
+        Index("ix_station_latitude_longitude", "latitude", "longitude"),
+        # Word-prefix and word-similarity reads of /stations/search when the
+        # in-memory index is not available (pg_trgm), on the texts folded by
+        # the station_search_text() SQL function
+        Index("ix_station_name_search_trgm",
+              text("station_search_text(name) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_station_location_search_trgm",
+              text("station_search_text(location) gin_trgm_ops"), postgresql_using="gin"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     name: Mapped[str] = mapped_column(String, index=True, nullable=False)
     location: Mapped[str] = mapped_column(String, nullable=False)
     max_capacity_kw: Mapped[float] = mapped_column(Float, nullable=False)
+    latitude: Mapped[Optional[float]] = mapped_column(Float)
+    longitude: Mapped[Optional[float]] = mapped_column(Float)
     status: Mapped[StationStatus] = mapped_column(
         Enum(StationStatus), default=StationStatus.ACTIVE)
+    # Start of the current status interval, kept by app.core.status_history
+    status_since: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import DateTime, Enum, Float, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+from app.models.station import StationStatus
+
+
+class StationStatusSchedule(Base):
+    """A status change applied to every station matching a selector, once or
+    on a cron schedule; deleted after its last run"""
+    __tablename__ = "station_status_schedule"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    target_status: Mapped[StationStatus] = mapped_column(
+        Enum(StationStatus), nullable=False)
+
+    # Selector, resolved when the schedule runs; a station must match every
+    # criterion given
+    location: Mapped[Optional[str]] = mapped_column(String)
+    status: Mapped[Optional[StationStatus]] = mapped_column(Enum(StationStatus))
+    min_capacity_kw: Mapped[Optional[float]] = mapped_column(Float)
+    max_capacity_kw: Mapped[Optional[float]] = mapped_column(Float)
+    station_ids: Mapped[Optional[List[uuid.UUID]]] = mapped_column(
+        ARRAY(UUID(as_uuid=True)))
+
+    # Five-field crontab evaluated in timezone; None runs once
+    cron: Mapped[Optional[str]] = mapped_column(String)
+    timezone: Mapped[str] = mapped_column(String, nullable=False, default="UTC")
+    # Stations changed by a run are changed back after duration_seconds
+    duration_seconds: Mapped[Optional[int]] = mapped_column(Integer)
+    ends_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    next_run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=False)
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    # Number of stations changed by the last run
+    last_run_count: Mapped[Optional[int]] = mapped_column(Integer)
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, Enum, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+from app.models.station import StationStatus
+
+
+class StationStatusTransition(Base):
+    """A pending, scheduled status change; deleted once applied"""
+    __tablename__ = "station_status_transition"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    station_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("station.id", ondelete="CASCADE"),
+        index=True, nullable=False)
+    target_status: Mapped[StationStatus] = mapped_column(
+        Enum(StationStatus), nullable=False)
+    due_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=False)
@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, DateTime, Enum, Float, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+from app.models.station import StationStatus
+
+# Availability rollup resolutions and their bucket width in seconds
+AVAILABILITY_RESOLUTIONS = {"1h": 3600, "1d": 86400}
+
+
+class StationStatusEvent(Base):
+    """A status change of a station. Rows are only ever inserted"""
+    __tablename__ = "station_status_event"
+    __table_args__ = (
+        Index("ix_station_status_event_station_changed_at", "station_id", "changed_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    station_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("station.id", ondelete="CASCADE"), nullable=False)
+    # None when the station was created with to_status
+    from_status: Mapped[Optional[StationStatus]] = mapped_column(Enum(StationStatus))
+    to_status: Mapped[StationStatus] = mapped_column(Enum(StationStatus), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # What made the change: "api", "bulk" or "schedule"
+    source: Mapped[str] = mapped_column(String, nullable=False)
+
+
+class StationAvailabilityRollup(Base):
+    """Seconds a station spent active / inactive within a 1h or 1d bucket.
+
+    Only closed status intervals are added; the interval since
+    Station.status_since is accounted for at read time.
+    """
+    __tablename__ = "station_availability_rollup"
+    __table_args__ = (
+        Index("ix_station_availability_rollup_resolution_bucket", "resolution", "bucket_start"),
+    )
+
+    station_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("station.id", ondelete="CASCADE"), primary_key=True)
+    resolution: Mapped[str] = mapped_column(String(2), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    active_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    inactive_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
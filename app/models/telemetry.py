@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+# Rollup resolutions and their bucket width in seconds
+ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+
+class StationReading(Base):
+    """A raw telemetry sample; energy_kwh is the energy delivered since the
+    station's previous reading.
+
+    No foreign key, to keep bulk loads free of per-row trigger checks: the
+    rollup upsert written in the same transaction references the station.
+    """
+    __tablename__ = "station_reading"
+    __table_args__ = (
+        Index("ix_station_reading_station_recorded_at", "station_id", "recorded_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    station_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    power_kw: Mapped[float] = mapped_column(Float, nullable=False)
+    energy_kwh: Mapped[Optional[float]] = mapped_column(Float)
+
+
+class StationTelemetryRollup(Base):
+    """Readings of a station aggregated over a 1m, 1h or 1d bucket"""
+    __tablename__ = "station_telemetry_rollup"
+    __table_args__ = (
+        Index("ix_station_telemetry_rollup_resolution_bucket", "resolution", "bucket_start"),
+    )
+
+    station_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("station.id", ondelete="CASCADE"), primary_key=True)
+    resolution: Mapped[str] = mapped_column(String(2), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    power_sum_kw: Mapped[float] = mapped_column(Float, nullable=False)
+    power_max_kw: Mapped[float] = mapped_column(Float, nullable=False)
+    energy_kwh: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
@@ -1,23 +1,78 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func, and_, case
+from typing import Awaitable, Callable, List, Dict, Any, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Float, func, and_, case, tuple_
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.db.session import get_db
+from app.core.analytics_state import analytics_state
+from app.core.etag import check_content_not_modified, check_not_modified
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.responses import dumps, fast_json
+from app.core.single_flight import analytics_flights
+from app.core.status_history import availability_query, availability_window
+from app.core.telemetry import telemetry_window
+from app.core.histogram import (
+    format_distribution,
+    histogram_counts,
+    linear_edges,
+    log_edges,
+    validate_edges,
+)
+from app.db.session import AsyncSessionLocal, get_db
 from app.models.station import Station, StationStatus
+from app.models.telemetry import StationTelemetryRollup
 from app.routes.auth import get_current_user
+from app.schemas.status_history import LocationAvailability, StationAvailability
+from app.schemas.telemetry import LocationUtilization, StationUtilization
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
+async def _shared(
+    name: str,
+    db: AsyncSession,
+    response: Response,
+    read: Callable[[AsyncSession], Awaitable[Any]],
+) -> Any:
+    """Run a read once for concurrent identical requests, keyed by their
+    ETag (state version, path and query).
+
+    The read has its own session so that it outlives a caller going away;
+    the caller's connection goes back to the pool in the meantime.
+    """
+    await db.rollback()
+
+    async def run() -> Any:
+        async with AsyncSessionLocal() as shared_db:
+            return await read(shared_db)
+
+    return await analytics_flights.run(name, response.headers["ETag"], run)
+
+
 @router.get("/stations/status-summary")
 async def get_stations_status_summary(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ) -> Dict[str, int]:
     """Get summary of stations by status"""
+    if analytics_state.ready:
+        # Versioned by its content, which costs no query
+        summary = analytics_state.status_summary()
+        return check_content_not_modified(request, response, summary) or summary
+
+    not_modified = await check_not_modified(request, response, db)
+    if not_modified:
+        return not_modified
+    return await _shared("status-summary", db, response, _status_summary)
+
+
+async def _status_summary(db: AsyncSession) -> Dict[str, int]:
     result = await db.execute(
         select(Station.status, func.count(Station.id))
         .group_by(Station.status)
@@ -31,43 +86,115 @@ async def get_stations_status_summary(
     return status_counts
 
 
+async def _count_by_bucket(db: AsyncSession, edges: List[float]) -> List[int]:
+    """Bucket capacities against explicit edges, in SQL when possible"""
+    capacity = Station.max_capacity_kw
+    last = len(edges) - 1
+
+    if db.bind.dialect.name != "postgresql":
+        result = await db.execute(
+            select(capacity).where(capacity >= edges[0], capacity <= edges[-1]))
+        return histogram_counts(result.scalars().all(), edges)
+
+    # width_bucket puts values equal to the last edge in an overflow bucket;
+    # fold them into the last bin so the maximum is counted.
+    bucket = case(
+        (capacity == edges[-1], last),
+        else_=func.width_bucket(capacity, array(edges, type_=Float)),
+    )
+    result = await db.execute(
+        select(bucket, func.count())
+        .where(capacity >= edges[0], capacity <= edges[-1])
+        .group_by(bucket)
+    )
+    counts = [0] * last
+    for index, count in result.all():
+        counts[index - 1] = count
+    return counts
+
+
 @router.get("/stations/capacity-distribution")
 async def get_capacity_distribution(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user),
     bins: int = Query(
-        5, description="Number of capacity ranges to divide into")
+        5, ge=1, le=1000, description="Number of capacity ranges to divide into"),
+    scale: str = Query(
+        "linear", pattern="^(linear|log)$", description="Spacing of the capacity ranges"),
+    edges: Optional[List[float]] = Query(
+        None, description="Explicit, increasing range edges; overrides bins and scale"),
 ) -> List[Dict[str, Any]]:
     """Get distribution of stations by capacity ranges"""
-    result = await db.execute(select(Station.max_capacity_kw))
-    capacities = [row[0] for row in result.all()]
+    not_modified = await check_not_modified(request, response, db)
+    if not_modified:
+        return not_modified
+
+    if edges:
+        try:
+            validate_edges(edges)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await _shared(
+        "capacity-distribution", db, response,
+        lambda shared_db: _capacity_distribution(shared_db, bins, scale, edges))
 
-    if not capacities:
-        return []
 
-    min_capacity = min(capacities)
-    max_capacity = max(capacities)
-    bin_size = (max_capacity - min_capacity) / bins
+async def _capacity_distribution(
+    db: AsyncSession, bins: int, scale: str, edges: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    if not edges:
+        result = await db.execute(
+            select(func.min(Station.max_capacity_kw), func.max(Station.max_capacity_kw)))
+        min_capacity, max_capacity = result.one()
+
+        if min_capacity is None:
+            return []
+        if min_capacity == max_capacity:
+            # A single capacity value: everything falls in one range
+            edges = [min_capacity, max_capacity]
+            counts = await db.execute(select(func.count(Station.id)))
+            return format_distribution(edges, [counts.scalar_one()])
 
-    distribution = []
-    for i in range(bins):
-        lower = min_capacity + (i * bin_size)
-        upper = lower + bin_size
-        count = sum(1 for c in capacities if lower <= c < upper)
-        distribution.append({
-            "range": f"{lower:.1f} - {upper:.1f} kW",
-            "count": count
-        })
+        try:
+            if scale == "log":
+                edges = log_edges(min_capacity, max_capacity, bins)
+            else:
+                edges = linear_edges(min_capacity, max_capacity, bins)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    return distribution
+    counts = await _count_by_bucket(db, edges)
+    return format_distribution(edges, counts)
 
 
 @router.get("/stations/location-stats")
 async def get_location_stats(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user)
 ) -> List[Dict[str, Any]]:
     """Get statistics by location"""
+    if analytics_state.ready:
+        # Versioned by its content, which costs no query
+        stats = analytics_state.location_stats()
+        not_modified = check_content_not_modified(request, response, stats)
+        if not_modified:
+            return not_modified
+        if settings.FAST_JSON_RESPONSES:
+            return fast_json(stats, response)
+        return stats
+
+    not_modified = await check_not_modified(request, response, db)
+    if not_modified:
+        return not_modified
+    return await _shared("location-stats", db, response, _location_stats)
+
+
+async def _location_stats(db: AsyncSession) -> List[Dict[str, Any]]:
     result = await db.execute(
         select(
             Station.location,
@@ -91,15 +218,33 @@ async def get_location_stats(
 
 @router.get("/stations/filtered-data")
 async def get_filtered_station_data(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(get_current_user),
     status: StationStatus = None,
     min_capacity: float = None,
     max_capacity: float = None,
-    location: str = None
+    location: str = None,
+    limit: Optional[int] = Query(
+        None, ge=1, le=10000, description="Maximum number of stations to return"),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor taken from the X-Next-Cursor header"),
 ) -> List[Dict[str, Any]]:
     """Get filtered station data for interactive charts"""
-    query = select(Station)
+    not_modified = await check_not_modified(request, response, db)
+    if not_modified:
+        return not_modified
+
+    # Only the needed columns: rows are plain tuples, no ORM identity map
+    query = select(
+        Station.id,
+        Station.name,
+        Station.location,
+        Station.max_capacity_kw,
+        Station.status,
+        Station.created_at,
+    )
     filters = []
 
     if status:
@@ -114,13 +259,201 @@ async def get_filtered_station_data(
     if filters:
         query = query.where(and_(*filters))
 
+    if limit is not None or cursor:
+        position = decode_cursor(cursor)
+        if position:
+            query = query.where(tuple_(Station.created_at, Station.id) > position)
+        query = query.order_by(Station.created_at, Station.id)
+        if limit is not None:
+            query = query.limit(limit)
+
     result = await db.execute(query)
-    stations = result.scalars().all()
+    rows = result.all()
+
+    headers = {"ETag": response.headers["ETag"]}
+    if limit is not None and len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    # Encoded straight from the rows, skipping response_model validation.
+    # Through dumps, not orjson.dumps: the ids are asyncpg UUIDs, which
+    # orjson alone cannot encode
+    content = dumps([{
+        "id": row.id,
+        "name": row.name,
+        "location": row.location,
+        "max_capacity_kw": row.max_capacity_kw,
+        "status": row.status
+    } for row in rows])
+    return Response(content=content, media_type="application/json", headers=headers)
+
 
+def _rollup_window(resolution: str, start: datetime, end: datetime) -> List:
+    rollup = StationTelemetryRollup
+    return [
+        rollup.station_id == Station.id,
+        rollup.resolution == resolution,
+        rollup.bucket_start >= start,
+        rollup.bucket_start < end,
+    ]
+
+
+@router.get("/stations/utilization", response_model=List[StationUtilization])
+async def get_station_utilization(
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user),
+    resolution: Literal["1m", "1h", "1d"] = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location: str = None,
+    limit: int = Query(100, ge=1, le=10000),
+):
+    """Get delivered power versus max_capacity_kw per station over
+    [start, end), most utilized first"""
+    start, end = telemetry_window(resolution, start, end)
+    rollup = StationTelemetryRollup
+    samples = func.sum(rollup.samples)
+    avg_power = func.sum(rollup.power_sum_kw) / samples
+    query = (
+        select(
+            Station.id,
+            Station.name,
+            Station.location,
+            Station.max_capacity_kw,
+            samples.label("samples"),
+            avg_power.label("avg_power_kw"),
+            func.max(rollup.power_max_kw).label("peak_power_kw"),
+            func.sum(rollup.energy_kwh).label("energy_kwh"),
+        )
+        .join(rollup, and_(*_rollup_window(resolution, start, end)))
+        .group_by(Station.id)
+        .order_by((avg_power / func.nullif(Station.max_capacity_kw, 0)).desc().nulls_last())
+        .limit(limit)
+    )
+    if location:
+        query = query.where(Station.location == location)
+
+    result = await db.execute(query)
+    return [{
+        "station_id": row.id,
+        "name": row.name,
+        "location": row.location,
+        "max_capacity_kw": row.max_capacity_kw,
+        "samples": row.samples,
+        "avg_power_kw": row.avg_power_kw,
+        "peak_power_kw": row.peak_power_kw,
+        "energy_kwh": row.energy_kwh,
+        "utilization": row.avg_power_kw / row.max_capacity_kw if row.max_capacity_kw else 0.0,
+        "peak_utilization": row.peak_power_kw / row.max_capacity_kw if row.max_capacity_kw else 0.0,
+    } for row in result.all()]
+
+
+@router.get("/stations/location-utilization", response_model=List[LocationUtilization])
+async def get_location_utilization(
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user),
+    resolution: Literal["1m", "1h", "1d"] = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Get delivered power versus installed capacity per location over
+    [start, end), counting the stations that reported telemetry"""
+    start, end = telemetry_window(resolution, start, end)
+    rollup = StationTelemetryRollup
+    per_station = (
+        select(
+            Station.location,
+            Station.max_capacity_kw.label("capacity"),
+            (func.sum(rollup.power_sum_kw) / func.sum(rollup.samples)).label("avg_power"),
+            func.sum(rollup.energy_kwh).label("energy"),
+        )
+        .join(rollup, and_(*_rollup_window(resolution, start, end)))
+        .group_by(Station.id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            per_station.c.location,
+            func.count(),
+            func.sum(per_station.c.capacity),
+            func.sum(per_station.c.avg_power),
+            func.sum(per_station.c.energy),
+        )
+        .group_by(per_station.c.location)
+        .order_by(per_station.c.location)
+    )
+    return [{
+        "location": location,
+        "reporting_stations": stations,
+        "capacity_kw": capacity,
+        "avg_power_kw": avg_power,
+        "energy_kwh": energy,
+        "utilization": avg_power / capacity if capacity else 0.0,
+    } for location, stations, capacity, avg_power, energy in result.all()]
+
+
+@router.get("/stations/availability", response_model=List[StationAvailability])
+async def get_station_availability(
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location: str = None,
+    limit: int = Query(100, ge=1, le=10000),
+):
+    """Get the time each station spent active and inactive over [start, end),
+    by default the last week, least available first.
+
+    Reads hourly and daily availability buckets; hours cut by the window
+    edges count pro rata."""
+    start, end = availability_window(start, end)
+    query = availability_query(start, end)
+    if location:
+        query = query.where(Station.location == location)
+    per_station = query.subquery()
+    availability = per_station.c.active_seconds / func.nullif(
+        per_station.c.active_seconds + per_station.c.inactive_seconds, 0)
+
+    result = await db.execute(
+        select(per_station, availability.label("availability"))
+        .order_by(availability.asc().nulls_last(), per_station.c.id)
+        .limit(limit)
+    )
+    return [{
+        "station_id": row.id,
+        "name": row.name,
+        "location": row.location,
+        "status": row.status,
+        "active_seconds": row.active_seconds,
+        "inactive_seconds": row.inactive_seconds,
+        "availability": row.availability,
+    } for row in result.all()]
+
+
+@router.get("/stations/location-availability", response_model=List[LocationAvailability])
+async def get_location_availability(
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Get the time stations of each location spent active and inactive over
+    [start, end), by default the last week"""
+    start, end = availability_window(start, end)
+    per_station = availability_query(start, end).subquery()
+    result = await db.execute(
+        select(
+            per_station.c.location,
+            func.count(),
+            func.sum(per_station.c.active_seconds),
+            func.sum(per_station.c.inactive_seconds),
+        )
+        .group_by(per_station.c.location)
+        .order_by(per_station.c.location)
+    )
     return [{
-        "id": str(station.id),
-        "name": station.name,
-        "location": station.location,
-        "max_capacity_kw": station.max_capacity_kw,
-        "status": station.status.value
-    } for station in stations]
+        "location": location,
+        "stations": stations,
+        "active_seconds": active,
+        "inactive_seconds": inactive,
+        "availability": active / (active + inactive) if active + inactive else None,
+    } for location, stations, active, inactive in result.all()]
@@ -4,10 +4,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from jose import JWTError, jwt
 
+from app.core.auth_cache import auth_cache, invalidate_user, token_subject
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    get_password_hash_async,
+    verify_password_async,
+)
 from app.schemas.token import Token
 from app.schemas.user import User, UserCreate
 from app.models.user import User as UserModel
@@ -18,6 +23,12 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"/api/v1/auth/login")
 
+password_hasher_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many authentication requests, please retry",
+    headers={"Retry-After": "1"},
+)
+
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
@@ -27,21 +38,22 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    username = token_subject(token)
+    if username is None:
         raise credentials_exception
 
+    user = auth_cache.get_user(username)
+    if user is not None:
+        return user
+
     result = await db.execute(select(UserModel).where(UserModel.email == username))
     user = result.scalars().first()
 
     if user is None:
         raise credentials_exception
+
+    user = User.model_validate(user)
+    auth_cache.set_user(username, user)
     return user
 
 
@@ -55,7 +67,14 @@ async def login_access_token(
     result = await db.execute(select(UserModel).where(UserModel.email == form_data.username))
     user = result.scalars().first()
 
-    if user is None or not verify_password(form_data.password, user.password):
+    valid = False
+    if user is not None and user.password is not None:
+        try:
+            valid = await verify_password_async(form_data.password, user.password)
+        except PasswordHasherBusy:
+            raise password_hasher_busy_exception
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -90,12 +109,18 @@ async def create_user(
             detail="The user with this email already exists in the system.",
         )
 
+    try:
+        hashed_password = await get_password_hash_async(user_in.password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception
+
     user = UserModel(
         email=user_in.email,
-        password=get_password_hash(user_in.password),
+        password=hashed_password,
         full_name=user_in.full_name,
     )
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    invalidate_user(user.email)
     return user
@@ -0,0 +1,88 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+
+from app.core.admission import admission_control
+from app.core.auth_cache import auth_cache
+from app.core.invalidation import invalidation_bus
+from app.core.single_flight import analytics_flights
+from app.core.startup import startup_profile
+from app.core.station_stream import station_broker
+from app.core.telemetry import telemetry_ingestor
+from app.core.transitions import transition_engine
+from app.db.instrumentation import db_stats
+from app.db.session import engine
+from app.routes.auth import get_current_user
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+@router.get("/auth-cache")
+async def get_auth_cache_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, int]:
+    """Get hit/miss counters of the authentication cache"""
+    return auth_cache.stats()
+
+
+@router.get("/transitions")
+async def get_transition_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get queue depth and lag of the status transition engine"""
+    return transition_engine.stats()
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get live pool checkouts, checkout wait times and slow-query counts"""
+    return db_stats.snapshot(engine.pool)
+
+
+@router.get("/startup")
+async def get_startup_report(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the time spent in each startup phase of this worker"""
+    return startup_profile.report()
+
+
+@router.get("/telemetry")
+async def get_telemetry_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get buffer depth and flush timings of telemetry ingestion"""
+    return telemetry_ingestor.stats()
+
+
+@router.get("/stream")
+async def get_stream_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get subscriber count and delivery counters of station streams"""
+    return station_broker.stats()
+
+
+@router.get("/invalidation")
+async def get_invalidation_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get connection state and message counters of the invalidation bus"""
+    return invalidation_bus.stats()
+
+
+@router.get("/admission")
+async def get_admission_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get rejection counters and in-flight expensive requests"""
+    return admission_control.stats()
+
+
+@router.get("/single-flight")
+async def get_single_flight_stats(
+    _: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get DB executions and those saved by sharing analytics reads"""
+    return analytics_flights.stats()
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from google.oauth2 import id_token
-from google.auth.transport.requests import Request as GoogleRequest
-import httpx
 
+from app.core.auth_cache import invalidate_user
 from app.core.config import settings
+from app.core.google_jwks import GoogleKeysUnavailable, google_jwks
+from app.core.http import get_http_client
 from app.core.security import create_access_token
 from app.models.user import User as UserModel
 from app.db.session import get_db
@@ -48,7 +48,6 @@ async def google_callback(code: str, db: AsyncSession = Depends(get_db)):
         )
 
     # Exchange code for tokens
-    token_url = "https://oauth2.googleapis.com/token"
     data = {
         "client_id": settings.GOOGLE_CLIENT_ID,
         "client_secret": settings.GOOGLE_CLIENT_SECRET,
@@ -57,27 +56,30 @@ async def google_callback(code: str, db: AsyncSession = Depends(get_db)):
         "redirect_uri": settings.GOOGLE_REDIRECT_URI,
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(token_url, data=data)
+    response = await get_http_client().post(settings.GOOGLE_TOKEN_URL, data=data)
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=400, detail="Failed to fetch Google token")
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=400, detail="Failed to fetch Google token")
 
-        tokens = response.json()
-        id_token_str = tokens.get("id_token")
+    tokens = response.json()
+    id_token_str = tokens.get("id_token")
 
-        if not id_token_str:
-            raise HTTPException(
-                status_code=400, detail="Invalid token response from Google")
+    if not id_token_str:
+        raise HTTPException(
+            status_code=400, detail="Invalid token response from Google")
 
-    # Verify the ID token
+    # Verify the ID token against Google's cached signing keys
     try:
-        id_info = id_token.verify_oauth2_token(
-            id_token_str, GoogleRequest(), settings.GOOGLE_CLIENT_ID)
+        id_info = await google_jwks.verify_id_token(
+            id_token_str, settings.GOOGLE_CLIENT_ID,
+            access_token=tokens.get("access_token"))
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"Invalid ID token: {str(e)}")
+    except GoogleKeysUnavailable:
+        raise HTTPException(
+            status_code=502, detail="Could not fetch Google signing keys")
 
     user_email = id_info.get("email")
     user_name = id_info.get("name", "")
@@ -110,6 +112,7 @@ async def google_callback(code: str, db: AsyncSession = Depends(get_db)):
 
     await db.commit()
     await db.refresh(user)
+    invalidate_user(user.email)
 
     # Create JWT token
     access_token = create_access_token(subject=user.email)
@@ -1,27 +1,232 @@
-from datetime import datetime, timedelta
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, tuple_, update
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.db.session import get_db
-from app.models.station import Station
+from app.core import station_events
+from app.core.config import settings
+from app.core.geo_index import geo_index, nearest_from_db
+from app.core.search_index import search_index, search_query
+from app.core.etag import check_not_modified, commit_version
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.responses import STATION_FIELDS, STATION_COLUMNS, dumps, fast_json, station_rows
+from app.core.station_events import SNAPSHOT_COLUMNS, StationSnapshot
+from app.core.station_stream import sse_frame, station_broker
+from app.core.status_history import record_status_changes
+from app.db.expressions import in_array
+from app.db.session import AsyncSessionLocal, get_db
+from app.models.station import Station, StationStatus
 from app.schemas.station import StationCreate, Station as StationSchema, StationUpdate, StationStatusUpdate, StationScheduledStatusChange
+from app.schemas.station import StationNearby, StationSearchResult, StationBulkResult, StationBulkStatusUpdate, StationBulkUpdate
+from app.schemas.station import StationSelector, StationScheduleCreate, StationSchedule as StationScheduleSchema, StationPendingStatusChange
+from app.schemas.status_history import StationStatusEvent as StationStatusEventSchema
 from app.routes.auth import get_current_user
-
-from app.core.scheduler import scheduler, scheduled_status_change
+from app.core.transitions import PendingSchedule, PendingTransition, next_run, supersede_transitions, transition_engine
+from app.models.station_schedule import StationStatusSchedule
+from app.models.station_transition import StationStatusTransition
+from app.models.status_history import StationStatusEvent
 
 router = APIRouter(prefix="/stations", tags=["stations"])
 
+# Reconnection delay suggested to stream clients
+STREAM_RETRY_MS = 3000
+
+station_conflict_exception = HTTPException(
+    status_code=409,
+    detail="A station with this name and location already exists",
+)
+
+
+def _is_station_conflict(error: IntegrityError) -> bool:
+    """Whether the error is a duplicate station name and location; other
+    integrity errors are bugs, not conflicts"""
+    # The asyncpg exception behind the DBAPI one names the constraint
+    cause = error.orig.__cause__
+    return (getattr(error.orig, "sqlstate", None) == "23505"
+            and getattr(cause, "constraint_name", None) == "uq_station_name_location")
+
+
+async def _stream_stations(query) -> AsyncIterator[str]:
+    # The request-scoped session is closed before the response body is sent,
+    # so streaming uses its own session and a server-side cursor.
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(
+            query.execution_options(yield_per=500))
+        async for station in result:
+            yield StationSchema.model_validate(station).model_dump_json() + "\n"
+
+
+async def _stream_station_rows(query) -> AsyncIterator[bytes]:
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=500))
+        async for row in result:
+            yield dumps(dict(zip(STATION_FIELDS, row))) + b"\n"
+
 
 @router.get("/", response_model=List[StationSchema])
-async def get_stations(db: AsyncSession = Depends(get_db)):
-    """Get all charging stations"""
-    result = await db.execute(select(Station))
-    stations = result.scalars().all()
+async def get_stations(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Maximum number of stations to return"),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor taken from the X-Next-Cursor header"),
+    stream: bool = Query(
+        False, description="Stream stations as NDJSON instead of a JSON list"),
+):
+    """Get all charging stations, ordered by (created_at, id)"""
+    not_modified = await check_not_modified(request, response, db)
+    if not_modified:
+        return not_modified
+
+    fast = settings.FAST_JSON_RESPONSES
+    columns = STATION_COLUMNS if fast else (Station,)
+    query = select(*columns).order_by(Station.created_at, Station.id)
+
+    position = decode_cursor(cursor)
+    if position:
+        query = query.where(tuple_(Station.created_at, Station.id) > position)
+    if limit is not None:
+        query = query.limit(limit)
+
+    if stream:
+        return StreamingResponse(
+            _stream_station_rows(query) if fast else _stream_stations(query),
+            media_type="application/x-ndjson",
+            headers={"ETag": response.headers["ETag"]})
+
+    result = await db.execute(query)
+    stations = result.all() if fast else result.scalars().all()
+
+    if limit is not None and len(stations) == limit:
+        last = stations[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.created_at, last.id)
+    if fast:
+        return fast_json(station_rows(stations), response)
     return stations
 
 
+@router.get("/nearby", response_model=List[StationNearby])
+async def get_nearby_stations(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: Optional[float] = Query(
+        None, gt=0, le=20000, description="Only stations within this many km"),
+    status: Optional[StationStatus] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get the stations nearest to a point, nearest first; stations without
+    coordinates are left out"""
+    if geo_index.ready:
+        nearest = geo_index.nearest(lat, lon, limit, radius, status)
+    else:
+        nearest = await nearest_from_db(db, lat, lon, limit, radius, status)
+    return [
+        {**station._asdict(), "distance_km": distance}
+        for station, distance in nearest
+    ]
+
+
+@router.get("/search", response_model=List[StationSearchResult])
+async def search_stations(
+    q: str = Query(..., min_length=1, max_length=100,
+                   description="Words, or beginnings of words, of a station's name or location"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Search stations by name and location for type-ahead, best matches
+    first; tolerates accents, case and small typos"""
+    if search_index.ready:
+        stations = search_index.search(q, limit)
+    else:
+        result = await db.execute(search_query(q, limit))
+        stations = [StationSnapshot(*row) for row in result.all()]
+    return [station._asdict() for station in stations]
+
+
+async def _station_stream(
+    location: Optional[str],
+    snapshot: bool,
+    last_event_id: Optional[str],
+) -> AsyncIterator[bytes]:
+    # Subscribing and reading the replay happen together, before any await,
+    # so the replayed and the live events neither overlap nor leave a gap
+    subscriber = station_broker.subscribe(location)
+    seq = station_broker.seq
+    replay = station_broker.replay_since(last_event_id, location) if last_event_id else None
+    resumed = replay is not None
+    if not resumed and not snapshot and not last_event_id:
+        replay = []
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n".encode()
+        if replay is not None:
+            if replay:
+                yield b"".join(event.frame for event in replay)
+        else:
+            query = select(*STATION_COLUMNS).order_by(Station.created_at, Station.id)
+            if location is not None:
+                query = query.where(Station.location == location)
+            async with AsyncSessionLocal() as db:
+                result = await db.stream(query.execution_options(yield_per=500))
+                async for rows in result.partitions():
+                    yield sse_frame("snapshot", station_rows(rows))
+        yield sse_frame("ready", {"seq": seq, "resumed": resumed},
+                        station_broker.event_id(seq))
+
+        heartbeat = settings.STREAM_HEARTBEAT_SECONDS
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.ready.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if subscriber.overflowed:
+                # Too far behind: the client reconnects with its
+                # Last-Event-ID and is replayed or resnapshotted
+                yield sse_frame("reset", {"reason": "slow consumer"})
+                return
+            yield b"".join(event.frame for event in subscriber.drain())
+    finally:
+        station_broker.unsubscribe(subscriber)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_stations(
+    request: Request,
+    location: Optional[str] = Query(
+        None, description="Only stream stations at this location"),
+    snapshot: bool = Query(
+        True, description="Start with the current stations as snapshot events"),
+    last_event_id: Optional[str] = Query(
+        None, description="Resume after this event id; the Last-Event-ID header takes precedence"),
+):
+    """Stream station creates, updates and status changes as server-sent events.
+
+    Events pending for a slow client are coalesced to the latest state per
+    station. A resumed stream replays the missed events, or starts over with
+    a snapshot when they are no longer available.
+    """
+    if station_broker.full:
+        raise HTTPException(
+            status_code=503, detail="Too many open station streams",
+            headers={"Retry-After": str(STREAM_RETRY_MS // 1000)})
+    return StreamingResponse(
+        _station_stream(
+            location, snapshot, request.headers.get("last-event-id") or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @router.post("/", response_model=StationSchema)
 async def create_station(
     *,
@@ -33,14 +238,188 @@ async def create_station(
     station = Station(
         name=station_in.name,
         location=station_in.location,
-        max_capacity_kw=station_in.max_capacity_kw
+        max_capacity_kw=station_in.max_capacity_kw,
+        latitude=station_in.latitude,
+        longitude=station_in.longitude,
     )
     db.add(station)
-    await db.commit()
+    try:
+        await db.flush()
+        await record_status_changes(db, [(None, StationSnapshot.of(station))], "api")
+        await commit_version(db)
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_station_conflict(e):
+            raise station_conflict_exception
+        raise
     await db.refresh(station)
+    station_events.publish([(None, StationSnapshot.of(station))])
     return station
 
 
+def _check_coordinates(snapshot: StationSnapshot, item: Optional[int] = None) -> None:
+    """Updates may set one coordinate only when the station already has the
+    other one: a station has both or neither"""
+    if (snapshot.latitude is None) != (snapshot.longitude is None):
+        prefix = f"Item {item}: " if item is not None else ""
+        raise HTTPException(
+            status_code=422, detail=f"{prefix}latitude and longitude must be given together")
+
+
+def _check_bulk_size(items: list) -> None:
+    if len(items) > settings.STATIONS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.STATIONS_BULK_MAX_ITEMS} items per request")
+
+
+@router.post("/bulk", response_model=List[StationBulkResult])
+async def create_stations_bulk(
+    *,
+    db: AsyncSession = Depends(get_db),
+    stations_in: List[StationCreate],
+    _: dict = Depends(get_current_user)
+):
+    """Create many charging stations with a single multi-row INSERT"""
+    _check_bulk_size(stations_in)
+    if not stations_in:
+        return []
+
+    # Rows that clash with an existing (name, location) are skipped and
+    # reported as conflicts; RETURNING only yields the inserted ones.
+    result = await db.scalars(
+        insert(Station)
+        .on_conflict_do_nothing(constraint="uq_station_name_location")
+        .returning(Station),
+        [station_in.model_dump() for station_in in stations_in],
+    )
+    created = {(station.name, station.location): station for station in result.all()}
+    changes = [(None, StationSnapshot.of(station)) for station in created.values()]
+    if created:
+        await record_status_changes(db, changes, "bulk")
+    if created:
+        await commit_version(db)
+    else:
+        await db.commit()
+
+    station_events.publish(changes)
+    results = []
+    for index, station_in in enumerate(stations_in):
+        station = created.pop((station_in.name, station_in.location), None)
+        if station is None:
+            results.append(StationBulkResult(index=index, result="conflict"))
+        else:
+            results.append(StationBulkResult(
+                index=index, id=station.id, result="created",
+                station=StationSchema.model_validate(station)))
+    return results
+
+
+@router.patch("/bulk", response_model=List[StationBulkResult])
+async def update_stations_bulk(
+    *,
+    db: AsyncSession = Depends(get_db),
+    stations_in: List[StationBulkUpdate],
+    _: dict = Depends(get_current_user)
+):
+    """Update many charging stations in one transaction"""
+    _check_bulk_size(stations_in)
+    ids = {station_in.id for station_in in stations_in}
+
+    result = await db.execute(
+        select(Station).where(in_array(Station.id, ids, UUID(as_uuid=True)))
+        .with_for_update()
+    )
+    before = {station.id: StationSnapshot.of(station)
+              for station in result.scalars().all()}
+
+    params = []
+    for index, station_in in enumerate(stations_in):
+        if station_in.id not in before:
+            continue
+        values = station_in.model_dump(exclude_unset=True)
+        _check_coordinates(before[station_in.id]._replace(**{
+            field: values[field] for field in ("latitude", "longitude") if field in values
+        }), index)
+        if len(values) > 1:
+            params.append(values)
+    if params:
+        # ORM bulk UPDATE by primary key, executed as an executemany
+        try:
+            await db.execute(update(Station), params)
+        except IntegrityError as e:
+            await db.rollback()
+            if _is_station_conflict(e):
+                raise station_conflict_exception
+            raise
+
+    result = await db.execute(
+        select(Station).where(in_array(Station.id, before, UUID(as_uuid=True)))
+        .execution_options(populate_existing=True)
+    )
+    updated = {station.id: station for station in result.scalars().all()}
+    changes = [
+        (snapshot, StationSnapshot.of(updated[id]))
+        for id, snapshot in before.items() if id in updated
+    ]
+    await record_status_changes(db, changes, "bulk")
+    await commit_version(db)
+
+    station_events.publish(changes)
+    return [
+        StationBulkResult(
+            index=index, id=station_in.id,
+            result="updated" if station_in.id in updated else "not_found",
+            station=StationSchema.model_validate(updated[station_in.id])
+            if station_in.id in updated else None)
+        for index, station_in in enumerate(stations_in)
+    ]
+
+
+@router.patch("/bulk/status", response_model=List[StationBulkResult])
+async def update_stations_status_bulk(
+    *,
+    db: AsyncSession = Depends(get_db),
+    status_in: StationBulkStatusUpdate,
+    _: dict = Depends(get_current_user)
+):
+    """Set the status of many charging stations with a single UPDATE"""
+    _check_bulk_size(status_in.ids)
+    id_filter = in_array(Station.id, set(status_in.ids), UUID(as_uuid=True))
+
+    result = await db.execute(
+        select(*SNAPSHOT_COLUMNS)
+        .where(id_filter)
+        .with_for_update()
+    )
+    before = {row.id: StationSnapshot(*row) for row in result.all()}
+
+    result = await db.scalars(
+        update(Station)
+        .where(id_filter)
+        .values(status=status_in.status)
+        .returning(Station)
+        .execution_options(populate_existing=True, synchronize_session=False)
+    )
+    updated = {station.id: station for station in result.all()}
+    changes = [
+        (snapshot, StationSnapshot.of(updated[id]))
+        for id, snapshot in before.items() if id in updated
+    ]
+    await record_status_changes(db, changes, "bulk")
+    await commit_version(db)
+
+    station_events.publish(changes)
+    return [
+        StationBulkResult(
+            index=index, id=id,
+            result="updated" if id in updated else "not_found",
+            station=StationSchema.model_validate(updated[id])
+            if id in updated else None)
+        for index, id in enumerate(status_in.ids)
+    ]
+
+
 @router.patch("/{station_id}", response_model=StationSchema)
 async def update_station(
     *,
@@ -50,17 +429,30 @@ async def update_station(
     _: dict = Depends(get_current_user)
 ):
     """Update a charging station"""
-    result = await db.execute(select(Station).where(Station.id == station_id))
+    # Locked, so the before snapshot cannot be overtaken by a concurrent
+    # write: history and station events would record a wrong transition
+    result = await db.execute(
+        select(Station).where(Station.id == station_id).with_for_update())
     station = result.scalars().first()
 
     if not station:
         raise HTTPException(status_code=404, detail="Station not found")
 
+    before = StationSnapshot.of(station)
     for field, value in station_in.dict(exclude_unset=True).items():
         setattr(station, field, value)
+    _check_coordinates(StationSnapshot.of(station))
 
-    await db.commit()
+    try:
+        await record_status_changes(db, [(before, StationSnapshot.of(station))], "api")
+        await commit_version(db)
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_station_conflict(e):
+            raise station_conflict_exception
+        raise
     await db.refresh(station)
+    station_events.publish([(before, StationSnapshot.of(station))])
     return station
 
 
@@ -73,18 +465,45 @@ async def update_station_status(
     _: dict = Depends(get_current_user)
 ):
     """Update a station's status"""
-    result = await db.execute(select(Station).where(Station.id == station_id))
+    result = await db.execute(
+        select(Station).where(Station.id == station_id).with_for_update())
     station = result.scalars().first()
 
     if not station:
         raise HTTPException(status_code=404, detail="Station not found")
 
+    before = StationSnapshot.of(station)
     station.status = status_in.status
-    await db.commit()
+    await record_status_changes(db, [(before, StationSnapshot.of(station))], "api")
+    await commit_version(db)
     await db.refresh(station)
+    station_events.publish([(before, StationSnapshot.of(station))])
     return station
 
 
+@router.get("/{station_id}/status-history", response_model=List[StationStatusEventSchema])
+async def get_station_status_history(
+    station_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    before: Optional[datetime] = Query(
+        None, description="Only events before this time, to page back in history"),
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Get a station's status changes, most recent first"""
+    result = await db.execute(select(Station.id).where(Station.id == station_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Station not found")
+
+    query = select(StationStatusEvent).where(StationStatusEvent.station_id == station_id)
+    if before is not None:
+        query = query.where(StationStatusEvent.changed_at < before)
+    result = await db.execute(
+        query.order_by(StationStatusEvent.changed_at.desc(), StationStatusEvent.id.desc())
+        .limit(limit))
+    return result.scalars().all()
+
+
 @router.post("/{station_id}/schedule-status-change")
 async def schedule_status_change(
     station_id: str,
@@ -97,19 +516,161 @@ async def schedule_status_change(
     station = result.scalars().first()
     if not station:
         raise HTTPException(status_code=404, detail="Station not found")
-    run_date = datetime.utcnow() + timedelta(seconds=status_change.delay_seconds)
-    print(f"run_date: {run_date}")
-    job = scheduler.add_job(
-        scheduled_status_change,
-        trigger="date",
-        run_date=run_date,
-        args=[station_id, status_change.status],
-        id=f"change_status_{station_id}_{run_date.timestamp()}",
-        replace_existing=True
+    run_date = datetime.now(timezone.utc) + \
+        timedelta(seconds=status_change.delay_seconds)
+    transition = StationStatusTransition(
+        station_id=station.id,
+        target_status=status_change.status,
+        due_at=run_date,
     )
+    # Replaces a pending change of the station due at the same time
+    await supersede_transitions(db, [transition])
+    db.add(transition)
+    await db.commit()
+    transition_engine.push(PendingTransition.of(transition))
 
     return {
-        "job_id": job.id,
+        "job_id": str(transition.id),
         "scheduled_run": run_date.isoformat(),
         "message": f"Status change for station {station_id} scheduled to {status_change.status}"
     }
+
+
+def _utc(moment: Optional[datetime]) -> Optional[datetime]:
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def _schedule_response(schedule: StationStatusSchedule) -> StationScheduleSchema:
+    return StationScheduleSchema(
+        id=schedule.id,
+        status=schedule.target_status,
+        selector=StationSelector(
+            location=schedule.location,
+            status=schedule.status,
+            min_capacity_kw=schedule.min_capacity_kw,
+            max_capacity_kw=schedule.max_capacity_kw,
+            ids=schedule.station_ids,
+        ),
+        cron=schedule.cron,
+        timezone=schedule.timezone,
+        duration_seconds=schedule.duration_seconds,
+        ends_at=schedule.ends_at,
+        next_run_at=schedule.next_run_at,
+        last_run_at=schedule.last_run_at,
+        last_run_count=schedule.last_run_count,
+        created_at=schedule.created_at,
+    )
+
+
+@router.post("/schedules", response_model=StationScheduleSchema)
+async def create_station_schedule(
+    payload: StationScheduleCreate,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Schedule a status change of the stations matching a selector, once or
+    on a cron schedule. The selector is resolved each time it runs"""
+    selector = payload.selector
+    schedule = StationStatusSchedule(
+        target_status=payload.status,
+        location=selector.location,
+        status=selector.status,
+        min_capacity_kw=selector.min_capacity_kw,
+        max_capacity_kw=selector.max_capacity_kw,
+        station_ids=selector.ids,
+        cron=payload.cron,
+        timezone=payload.timezone,
+        duration_seconds=payload.duration_seconds,
+        ends_at=_utc(payload.ends_at),
+    )
+    now = datetime.now(timezone.utc)
+    first_run = max(now, _utc(payload.starts_at) or now)
+    if payload.cron is None:
+        schedule.next_run_at = first_run
+    else:
+        try:
+            schedule.next_run_at = next_run(schedule, first_run)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid cron expression: {e}")
+        except KeyError:
+            raise HTTPException(status_code=422, detail=f"Unknown time zone {payload.timezone!r}")
+    if schedule.next_run_at is None or (
+            schedule.ends_at is not None and schedule.next_run_at > schedule.ends_at):
+        raise HTTPException(status_code=422, detail="The schedule never runs before ends_at")
+
+    db.add(schedule)
+    await db.commit()
+    await db.refresh(schedule)
+    transition_engine.push_schedule(PendingSchedule.of(schedule))
+    return _schedule_response(schedule)
+
+
+@router.get("/schedules", response_model=List[StationScheduleSchema])
+async def get_station_schedules(
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """List the schedules still to run, the next one first"""
+    result = await db.execute(
+        select(StationStatusSchedule).order_by(StationStatusSchedule.next_run_at))
+    return [_schedule_response(schedule) for schedule in result.scalars().all()]
+
+
+@router.delete("/schedules/{schedule_id}", status_code=204)
+async def cancel_station_schedule(
+    schedule_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Cancel a schedule. Stations of a window already started are still
+    changed back at its end"""
+    result = await db.execute(
+        delete(StationStatusSchedule)
+        .where(StationStatusSchedule.id == schedule_id)
+        .returning(StationStatusSchedule.id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    await db.commit()
+    return Response(status_code=204)
+
+
+@router.get("/scheduled-changes", response_model=List[StationPendingStatusChange])
+async def get_scheduled_status_changes(
+    station_id: Optional[uuid.UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """List pending status changes of single stations, the next one first"""
+    query = select(StationStatusTransition)
+    if station_id is not None:
+        query = query.where(StationStatusTransition.station_id == station_id)
+    result = await db.execute(
+        query.order_by(StationStatusTransition.due_at, StationStatusTransition.id)
+        .limit(limit))
+    return [StationPendingStatusChange(
+        id=transition.id,
+        station_id=transition.station_id,
+        status=transition.target_status,
+        due_at=transition.due_at,
+    ) for transition in result.scalars().all()]
+
+
+@router.delete("/scheduled-changes/{change_id}", status_code=204)
+async def cancel_scheduled_status_change(
+    change_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Cancel a pending status change, e.g. by the job_id returned when it
+    was scheduled"""
+    result = await db.execute(
+        delete(StationStatusTransition)
+        .where(StationStatusTransition.id == change_id)
+        .returning(StationStatusTransition.id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Scheduled change not found")
+    await db.commit()
+    return Response(status_code=204)
@@ -0,0 +1,128 @@
+import uuid
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.telemetry import TelemetryBufferFull, telemetry_ingestor, telemetry_window
+from app.db.session import get_db
+from app.models.station import Station
+from app.models.telemetry import StationTelemetryRollup
+from app.routes.auth import get_current_user
+from app.schemas.telemetry import TelemetryBucket, TelemetryIngestResult, TelemetryReading
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+telemetry_busy_exception = HTTPException(
+    status_code=503,
+    detail="Telemetry buffer is full, please retry",
+    headers={"Retry-After": "1"},
+)
+
+_readings = TypeAdapter(List[TelemetryReading])
+
+_reading_schema = TelemetryReading.model_json_schema()
+_request_body = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": {"type": "array", "items": _reading_schema}},
+        "application/x-ndjson": {"schema": _reading_schema},
+    },
+}
+
+
+def _parse_readings(body: bytes, content_type: str) -> List[TelemetryReading]:
+    """Validate a JSON array or NDJSON body in a single pass"""
+    if content_type.startswith(NDJSON_MEDIA_TYPES):
+        body = b"[" + b",".join(line for line in body.splitlines() if line.strip()) + b"]"
+    try:
+        return _readings.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+@router.post(
+    "/readings",
+    response_model=TelemetryIngestResult,
+    status_code=202,
+    openapi_extra={"requestBody": _request_body},
+)
+async def ingest_readings(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Accept power/energy readings for any number of stations; they are
+    written to the database asynchronously"""
+    readings = _parse_readings(
+        await request.body(), request.headers.get("content-type", ""))
+    if len(readings) > settings.TELEMETRY_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.TELEMETRY_BATCH_MAX_ITEMS} readings per request")
+
+    unknown = await telemetry_ingestor.unknown_stations(
+        db, {reading.station_id for reading in readings})
+    rows = [(
+        reading.station_id,
+        reading.recorded_at if reading.recorded_at.tzinfo
+        else reading.recorded_at.replace(tzinfo=timezone.utc),
+        reading.power_kw,
+        reading.energy_kwh,
+    ) for reading in readings if reading.station_id not in unknown]
+
+    try:
+        telemetry_ingestor.add(rows, rejected=len(readings) - len(rows))
+    except TelemetryBufferFull:
+        raise telemetry_busy_exception
+
+    return TelemetryIngestResult(
+        accepted=len(rows),
+        rejected=len(readings) - len(rows),
+        unknown_station_ids=list(unknown),
+    )
+
+
+@router.get("/stations/{station_id}/rollups", response_model=List[TelemetryBucket])
+async def get_station_rollups(
+    station_id: uuid.UUID,
+    resolution: Literal["1m", "1h", "1d"] = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user)
+):
+    """Get a station's telemetry buckets in [start, end), by default the last day"""
+    start, end = telemetry_window(resolution, start, end)
+    result = await db.execute(
+        select(Station.max_capacity_kw).where(Station.id == station_id))
+    capacity = result.scalar_one_or_none()
+    if capacity is None:
+        raise HTTPException(status_code=404, detail="Station not found")
+
+    rollup = StationTelemetryRollup
+    result = await db.execute(
+        select(rollup.bucket_start, rollup.samples, rollup.power_sum_kw,
+               rollup.power_max_kw, rollup.energy_kwh)
+        .where(
+            rollup.station_id == station_id,
+            rollup.resolution == resolution,
+            rollup.bucket_start >= start,
+            rollup.bucket_start < end,
+        )
+        .order_by(rollup.bucket_start)
+    )
+    return [{
+        "bucket_start": row.bucket_start,
+        "samples": row.samples,
+        "avg_power_kw": row.power_sum_kw / row.samples,
+        "peak_power_kw": row.power_max_kw,
+        "energy_kwh": row.energy_kwh,
+        "utilization": row.power_sum_kw / row.samples / capacity if capacity else 0.0,
+    } for row in result.all()]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional
 from datetime import datetime
 from app.models.station import StationStatus
 import uuid
@@ -9,18 +9,34 @@ class StationBase(BaseModel):
     name: str
     location: str
     max_capacity_kw: float
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class StationCreate(StationBase):
-    pass
+    @model_validator(mode="after")
+    def check_coordinates(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
 
 
 class StationUpdate(BaseModel):
     name: Optional[str] = None
     location: Optional[str] = None
     max_capacity_kw: Optional[float] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     status: Optional[StationStatus] = None
 
+    @field_validator("name", "location", "max_capacity_kw", "status")
+    @classmethod
+    def check_not_null(cls, value):
+        # Fields may be left out, but only the coordinates can be cleared
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
 
 class StationStatusUpdate(BaseModel):
     status: StationStatus
@@ -43,3 +59,89 @@ class StationInDBBase(StationBase):
 
 class Station(StationInDBBase):
     pass
+
+
+class StationBulkUpdate(StationUpdate):
+    id: uuid.UUID
+
+
+class StationBulkStatusUpdate(BaseModel):
+    ids: List[uuid.UUID]
+    status: StationStatus
+
+
+class StationBulkResult(BaseModel):
+    index: int
+    id: Optional[uuid.UUID] = None
+    result: str  # "created", "updated", "not_found" or "conflict"
+    station: Optional[Station] = None
+
+
+class StationNearby(BaseModel):
+    id: uuid.UUID
+    name: str
+    location: str
+    max_capacity_kw: float
+    status: StationStatus
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class StationSearchResult(BaseModel):
+    id: uuid.UUID
+    name: str
+    location: str
+    max_capacity_kw: float
+    status: StationStatus
+
+
+class StationSelector(BaseModel):
+    """Stations matching every criterion given"""
+    location: Optional[str] = None
+    status: Optional[StationStatus] = None
+    min_capacity_kw: Optional[float] = None
+    max_capacity_kw: Optional[float] = None
+    ids: Optional[List[uuid.UUID]] = None
+
+    @model_validator(mode="after")
+    def check_criteria(self):
+        if all(value is None for value in self.model_dump().values()):
+            raise ValueError("the selector needs at least one criterion")
+        if (self.min_capacity_kw is not None and self.max_capacity_kw is not None
+                and self.min_capacity_kw > self.max_capacity_kw):
+            raise ValueError("min_capacity_kw must not exceed max_capacity_kw")
+        return self
+
+
+class StationScheduleCreate(BaseModel):
+    status: StationStatus
+    selector: StationSelector
+    # Five-field crontab, e.g. "0 22 * * 0"; without it the change runs once
+    cron: Optional[str] = None
+    timezone: str = "UTC"
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    # Change the stations back this long after each run
+    duration_seconds: Optional[int] = Field(None, gt=0)
+
+
+class StationSchedule(BaseModel):
+    id: uuid.UUID
+    status: StationStatus
+    selector: StationSelector
+    cron: Optional[str] = None
+    timezone: str
+    duration_seconds: Optional[int] = None
+    ends_at: Optional[datetime] = None
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    last_run_count: Optional[int] = None
+    created_at: datetime
+
+
+class StationPendingStatusChange(BaseModel):
+    id: uuid.UUID
+    station_id: uuid.UUID
+    status: StationStatus
+    due_at: datetime
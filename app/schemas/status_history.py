@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.station import StationStatus
+import uuid
+
+
+class StationStatusEvent(BaseModel):
+    from_status: Optional[StationStatus] = None
+    to_status: StationStatus
+    changed_at: datetime
+    source: str
+
+    class Config:
+        from_attributes = True
+
+
+class StationAvailability(BaseModel):
+    station_id: uuid.UUID
+    name: str
+    location: str
+    status: StationStatus
+    active_seconds: float
+    inactive_seconds: float
+    # Share of the observed time spent active; None when the station has no
+    # recorded time in the window
+    availability: Optional[float] = None
+
+
+class LocationAvailability(BaseModel):
+    location: str
+    stations: int
+    active_seconds: float
+    inactive_seconds: float
+    availability: Optional[float] = None
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+import uuid
+
+
+class TelemetryReading(BaseModel):
+    station_id: uuid.UUID
+    # Naive timestamps are taken as UTC
+    recorded_at: datetime
+    power_kw: float = Field(ge=0)
+    # Energy delivered since the station's previous reading
+    energy_kwh: Optional[float] = Field(default=None, ge=0)
+
+
+class TelemetryIngestResult(BaseModel):
+    accepted: int
+    rejected: int
+    unknown_station_ids: List[uuid.UUID] = []
+
+
+class TelemetryBucket(BaseModel):
+    bucket_start: datetime
+    samples: int
+    avg_power_kw: float
+    peak_power_kw: float
+    energy_kwh: float
+    utilization: float
+
+
+class StationUtilization(BaseModel):
+    station_id: uuid.UUID
+    name: str
+    location: str
+    max_capacity_kw: float
+    samples: int
+    avg_power_kw: float
+    peak_power_kw: float
+    energy_kwh: float
+    # Average and peak delivered power relative to max_capacity_kw
+    utilization: float
+    peak_utilization: float
+
+
+class LocationUtilization(BaseModel):
+    location: str
+    reporting_stations: int
+    capacity_kw: float
+    avg_power_kw: float
+    energy_kwh: float
+    utilization: float
@@ -0,0 +1,355 @@
+"""Load test of the API with a mix of reads and writes, with a baseline.
+
+Seeds synthetic stations (location prefix "Bench load ") and users
+(bench-load-N@example.com) through the API, skipping those already there,
+then sends a weighted mix of requests from concurrent clients and reports
+throughput and latency percentiles per kind of request. The app is either
+run in-process (requests go through httpx's ASGI transport in this
+process, with the app's startup and shutdown) or reached over HTTP:
+
+    DB_PROFILE=prod python -m benchmarks.api_load --stations 10000 --users 20 \\
+        --concurrency 32 --requests 5000 --save-baseline /tmp/api_load.json
+    DB_PROFILE=prod python -m benchmarks.api_load --stations 10000 --users 20 \\
+        --concurrency 32 --requests 5000 --baseline /tmp/api_load.json
+    python -m benchmarks.api_load --base-url http://localhost:8000 --mix list=1,login=1
+
+With --baseline, the run fails (exit status 1) when a kind of request is
+slower at p95 or p99, or has lower throughput, than the baseline by more
+than --tolerance, or when more than --max-error-rate of its requests fail.
+Percentiles are only compared with at least 10 samples above them (200
+requests of a kind for p95, 1000 for p99).
+Both modes read and clean up the seeded rows through DATABASE_URL; --cleanup
+deletes them after the run (a running server keeps deleted stations in its
+in-memory indexes until it restarts).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import print_table, summarize
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.station import Station, StationStatus
+from app.models.user import User
+
+PREFIX = "/api/v1"
+LOCATION = "Bench load"
+LOCATIONS = 50
+PASSWORD = "bench-load-password"
+BULK_ITEMS = 1000
+
+DEFAULT_MIX = "list=30,filter=25,analytics=20,login=5,status=15,schedule=5"
+ANALYTICS = ["status-summary", "capacity-distribution", "location-stats"]
+# Measures compared with the baseline and the fraction of samples above
+# them; higher is worse except for throughput
+COMPARED = {"rps": 1.0, "p95_ms": 0.05, "p99_ms": 0.01}
+HIGHER_IS_BETTER = {"rps"}
+# A percentile is only compared with this many samples above it in both
+# runs, below which it is mostly noise
+TAIL_SAMPLES = 10
+
+
+def _email(i: int) -> str:
+    return f"bench-load-{i}@example.com"
+
+
+def _mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown request kind {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+@asynccontextmanager
+async def _client(base_url: Optional[str], concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    if base_url:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            yield client
+        return
+    # Imported here: the app reads its settings and builds its state on import
+    from app.main import app, lifespan
+
+    # Queries also wait for the event loop shared with the clients; their
+    # slow-query warnings would bury the report
+    logging.getLogger("app.db.instrumentation").setLevel(logging.ERROR)
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+async def _login(client: httpx.AsyncClient, email: str) -> str:
+    response = await client.post(f"{PREFIX}/auth/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _seed(client: httpx.AsyncClient, stations: int, users: int, seed: int) -> Tuple[List[str], List[str]]:
+    """Create the missing bench users and stations; the ids of the stations
+    and a token of each user"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.email).where(User.email.like("bench-load-%@example.com")))
+        emails = set(result.scalars().all())
+        result = await db.execute(select(Station.name).where(Station.location.like(f"{LOCATION} %")))
+        names = set(result.scalars().all())
+
+    missing = [_email(i) for i in range(users) if _email(i) not in emails]
+    for email in missing:
+        response = await client.post(f"{PREFIX}/auth/signup", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+    tokens = [await _login(client, _email(i)) for i in range(users)]
+
+    rng = random.Random(seed)
+    # Capacities are drawn for every station so they do not depend on
+    # which stations already exist
+    items = [{
+        "name": f"{LOCATION} {i}",
+        "location": f"{LOCATION} {i % LOCATIONS}",
+        "max_capacity_kw": float(rng.randint(50, 350)),
+    } for i in range(stations)]
+    items = [item for item in items if item["name"] not in names]
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+    for start in range(0, len(items), BULK_ITEMS):
+        response = await client.post(
+            f"{PREFIX}/stations/bulk", json=items[start:start + BULK_ITEMS], headers=headers)
+        response.raise_for_status()
+    print(f"seeded {len(missing)} users and {len(items)} stations")
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Station.id).where(Station.location.like(f"{LOCATION} %")).order_by(Station.name))
+        ids = [str(station_id) for station_id in result.scalars().all()]
+    return ids[:stations], tokens
+
+
+async def _cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Station).where(Station.location.like(f"{LOCATION} %")))
+        await db.execute(delete(User).where(User.email.like("bench-load-%@example.com")))
+        await db.commit()
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random, token: str,
+                 stations: List[str], users: int, schedule_delay: int):
+        self.client = client
+        self.rng = rng
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.stations = stations
+        self.users = users
+        self.schedule_delay = schedule_delay
+
+
+async def _list(ctx: Context) -> httpx.Response:
+    return await ctx.client.get(f"{PREFIX}/stations/", params={"limit": 100})
+
+
+async def _filter(ctx: Context) -> httpx.Response:
+    params = {"location": f"{LOCATION} {ctx.rng.randrange(LOCATIONS)}"}
+    if ctx.rng.random() < 0.5:
+        params["status"] = ctx.rng.choice(list(StationStatus)).value
+    return await ctx.client.get(
+        f"{PREFIX}/analytics/stations/filtered-data", params=params, headers=ctx.headers)
+
+
+async def _analytics(ctx: Context) -> httpx.Response:
+    return await ctx.client.get(
+        f"{PREFIX}/analytics/stations/{ctx.rng.choice(ANALYTICS)}", headers=ctx.headers)
+
+
+async def _login_request(ctx: Context) -> httpx.Response:
+    return await ctx.client.post(f"{PREFIX}/auth/login", data={
+        "username": _email(ctx.rng.randrange(ctx.users)), "password": PASSWORD})
+
+
+async def _status(ctx: Context) -> httpx.Response:
+    return await ctx.client.patch(
+        f"{PREFIX}/stations/{ctx.rng.choice(ctx.stations)}/status",
+        json={"status": ctx.rng.choice(list(StationStatus)).value}, headers=ctx.headers)
+
+
+async def _schedule(ctx: Context) -> httpx.Response:
+    return await ctx.client.post(
+        f"{PREFIX}/stations/{ctx.rng.choice(ctx.stations)}/schedule-status-change",
+        json={"status": ctx.rng.choice(list(StationStatus)).value,
+              "delay_seconds": ctx.schedule_delay},
+        headers=ctx.headers)
+
+
+OPERATIONS = {
+    "list": _list,
+    "filter": _filter,
+    "analytics": _analytics,
+    "login": _login_request,
+    "status": _status,
+    "schedule": _schedule,
+}
+
+
+async def _run(
+    contexts: List[Context], mix: Dict[str, float], requests: int
+) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """Send `requests` requests from one client per context; latencies of
+    the successful ones and error counts per kind, and the elapsed time"""
+    latencies: Dict[str, List[float]] = {name: [] for name in mix}
+    errors: Dict[str, int] = {name: 0 for name in mix}
+    names, weights = list(mix), list(mix.values())
+    remaining = requests
+
+    async def worker(ctx: Context) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            name = ctx.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await OPERATIONS[name](ctx)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if failed:
+                errors[name] += 1
+            else:
+                latencies[name].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(ctx) for ctx in contexts))
+    return latencies, errors, time.perf_counter() - started
+
+
+def _report(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> Dict[str, Dict]:
+    results = {}
+    everything: List[float] = []
+    for name, samples in latencies.items():
+        everything += samples
+        summary = summarize(samples)
+        results[name] = {
+            "count": len(samples),
+            "errors": errors[name],
+            "rps": len(samples) / elapsed,
+            **{key: summary[key] for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")},
+        }
+    summary = summarize(everything)
+    results["all"] = {
+        "count": len(everything),
+        "errors": sum(errors.values()),
+        "rps": len(everything) / elapsed,
+        **{key: summary[key] for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")},
+    }
+    return results
+
+
+def _compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+             tolerance: float) -> Tuple[Dict[str, Dict], List[str]]:
+    """Current / baseline ratios of the compared measures, and regressions"""
+    ratios = {}
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratios[name] = {}
+        for measure, tail in COMPARED.items():
+            if not before[measure] or min(current["count"], before["count"]) * tail < TAIL_SAMPLES:
+                ratios[name][measure] = "-"
+                continue
+            ratio = current[measure] / before[measure]
+            ratios[name][measure] = ratio
+            worse = ratio < 1 - tolerance if measure in HIGHER_IS_BETTER else ratio > 1 + tolerance
+            if worse:
+                regressions.append(
+                    f"{name} {measure}: {current[measure]:.2f} vs {before[measure]:.2f} in the baseline")
+    return ratios, regressions
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Load a running server instead of the app in-process")
+    parser.add_argument("--stations", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200, help="Requests sent before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights of the kinds of request")
+    parser.add_argument("--schedule-delay", type=int, default=60,
+                        help="Seconds until the scheduled status changes are due")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--save-baseline", help="Write the results as JSON here")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative change from the baseline")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded rows afterwards")
+    args = parser.parse_args()
+    mix = _mix(args.mix)
+    config = {
+        "target": "http" if args.base_url else "asgi",
+        "stations": args.stations,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "mix": mix,
+    }
+
+    try:
+        async with _client(args.base_url, args.concurrency) as client:
+            stations, tokens = await _seed(client, args.stations, args.users, args.seed)
+
+            def contexts(phase: str) -> List[Context]:
+                # Each client draws its own reproducible sequence of requests,
+                # as one of the users (rate limits are per user)
+                return [Context(client, random.Random(f"{args.seed}-{phase}-{i}"),
+                                tokens[i % len(tokens)], stations, args.users, args.schedule_delay)
+                        for i in range(args.concurrency)]
+
+            await _run(contexts("warmup"), mix, args.warmup)
+            latencies, errors, elapsed = await _run(contexts("run"), mix, args.requests)
+    finally:
+        if args.cleanup:
+            await _cleanup()
+        await engine.dispose()
+
+    results = _report(latencies, errors, elapsed)
+    print_table(
+        f"{config['target']}, {args.stations} stations, {args.concurrency} clients, "
+        f"{args.requests} requests in {elapsed:.1f}s", results)
+
+    failures = [
+        f"{name}: {row['errors']} of {row['count'] + row['errors']} requests failed"
+        for name, row in results.items()
+        if row["errors"] > args.max_error_rate * (row["count"] + row["errors"])
+    ]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            print(f"\nwarning: the baseline was run with {baseline['config']}")
+        ratios, regressions = _compare(results, baseline["results"], args.tolerance)
+        print_table("current / baseline", ratios)
+        failures += regressions
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
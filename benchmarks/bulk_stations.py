@@ -0,0 +1,80 @@
+"""Single-item loop vs bulk endpoints, against a running API.
+
+    python -m benchmarks.bulk_stations --base-url http://localhost:8000 \\
+        --email bench@example.com --password secret --items 500
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import print_table
+
+PREFIX = "/api/v1"
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    await client.post(f"{PREFIX}/auth/signup",
+                      json={"email": email, "password": password})
+    response = await client.post(f"{PREFIX}/auth/login",
+                                 data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def _stations(items: int, tag: str) -> list:
+    return [{
+        "name": f"Bench {tag} {i}",
+        "location": f"Bench {tag} {i % 20}",
+        "max_capacity_kw": 50.0 + i % 250,
+    } for i in range(items)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        token = await _login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        tag = uuid.uuid4().hex[:8]
+        rows = {}
+
+        started = time.perf_counter()
+        ids = []
+        for station in _stations(args.items, f"{tag}-single"):
+            response = await client.post(f"{PREFIX}/stations/", json=station)
+            ids.append(response.json()["id"])
+        rows["create (loop)"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = await client.post(
+            f"{PREFIX}/stations/bulk", json=_stations(args.items, f"{tag}-bulk"))
+        bulk_ids = [item["id"] for item in response.json()]
+        rows["create (bulk)"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for id in ids:
+            await client.patch(f"{PREFIX}/stations/{id}/status",
+                               json={"status": "inactive"})
+        rows["status (loop)"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await client.patch(f"{PREFIX}/stations/bulk/status",
+                           json={"ids": bulk_ids, "status": "inactive"})
+        rows["status (bulk)"] = time.perf_counter() - started
+
+    print_table(f"{args.items} stations", {
+        name: {"seconds": elapsed, "items_per_s": args.items / elapsed}
+        for name, elapsed in rows.items()
+    })
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
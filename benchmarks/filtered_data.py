@@ -0,0 +1,119 @@
+"""Latency of /analytics/stations/filtered-data queries at increasing fleet sizes.
+
+Seeds synthetic stations (location prefix "Bench ") into the configured
+database, times the previous ORM query and the projection query for a few
+filter combinations, then deletes the synthetic stations again. Run
+``alembic upgrade head`` first so the filter indexes exist, and use a
+non-echoing DB profile:
+
+    DB_PROFILE=prod python -m benchmarks.filtered_data --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict, List
+
+from benchmarks.common import print_table, summarize
+
+import orjson
+from sqlalchemy import and_, delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from app.db.session import AsyncSessionLocal, engine
+from app.models.station import Station, StationStatus
+
+LOCATIONS = [f"Bench {i}" for i in range(200)]
+CHUNK = 5000
+
+FILTERS = {
+    "location": lambda: [Station.location == random.choice(LOCATIONS)],
+    "status+range": lambda: [Station.status == StationStatus.ACTIVE,
+                             Station.max_capacity_kw >= 100,
+                             Station.max_capacity_kw <= 120],
+    "location+status": lambda: [Station.location == random.choice(LOCATIONS),
+                                Station.status == StationStatus.INACTIVE],
+}
+
+
+async def _seed(count: int, existing: int) -> None:
+    async with AsyncSessionLocal() as db:
+        for start in range(existing, count, CHUNK):
+            await db.execute(insert(Station).values([{
+                "id": uuid.uuid4(),
+                "name": f"Bench station {i}",
+                "location": LOCATIONS[i % len(LOCATIONS)],
+                "max_capacity_kw": float(random.randint(50, 350)),
+                "status": random.choice(list(StationStatus)),
+            } for i in range(start, min(start + CHUNK, count))]))
+        await db.commit()
+        await db.execute(text("ANALYZE station"))
+
+
+async def _orm_query(filters: List) -> bytes:
+    """The previous implementation: full ORM objects, dicts, stdlib JSON"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Station).where(and_(*filters)))
+        return json.dumps([{
+            "id": str(station.id),
+            "name": station.name,
+            "location": station.location,
+            "max_capacity_kw": station.max_capacity_kw,
+            "status": station.status.value
+        } for station in result.scalars().all()]).encode()
+
+
+async def _projection_query(filters: List) -> bytes:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Station.id, Station.name, Station.location,
+                   Station.max_capacity_kw, Station.status)
+            .where(and_(*filters)))
+        return orjson.dumps([{
+            "id": row.id,
+            "name": row.name,
+            "location": row.location,
+            "max_capacity_kw": row.max_capacity_kw,
+            "status": row.status
+        } for row in result.all()])
+
+
+async def _time(query, filters, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await query(filters())
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    seeded = 0
+    try:
+        for size in sorted(args.sizes):
+            await _seed(size, seeded)
+            seeded = size
+            rows: Dict[str, Dict[str, float]] = {}
+            for name, filters in FILTERS.items():
+                for label, query in (("orm", _orm_query), ("projection", _projection_query)):
+                    summary = summarize(await _time(query, filters, args.repeat))
+                    rows[f"{name} ({label})"] = {
+                        k: summary[k] for k in ("p50_ms", "p95_ms", "p99_ms")}
+            print_table(f"{size} stations", rows)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Station).where(Station.location.like("Bench %")))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""Nearest-station queries on the in-memory grid index vs a linear scan.
+
+Builds a GeoIndex of synthetic stations spread over Mexico's bounding box
+(no database needed) and times k-nearest and radius queries at random
+points, checking a sample of the answers against the linear scan:
+
+    python -m benchmarks.nearby --stations 100000 --queries 2000 --k 10
+"""
+import argparse
+import math
+import random
+import time
+import uuid
+from typing import List, Tuple
+
+from benchmarks.common import print_table, summarize
+
+from app.core.geo_index import GeoIndex, haversine
+from app.core.station_events import StationSnapshot
+from app.models.station import StationStatus
+
+# Roughly mainland Mexico
+LATITUDES = (14.5, 32.7)
+LONGITUDES = (-117.1, -86.7)
+
+
+def _stations(count: int) -> List[StationSnapshot]:
+    return [StationSnapshot(
+        uuid.uuid4(), f"Bench nearby {i}", "Bench nearby", 150.0,
+        random.choice(list(StationStatus)),
+        random.uniform(*LATITUDES), random.uniform(*LONGITUDES),
+    ) for i in range(count)]
+
+
+def _scan(stations: List[StationSnapshot], latitude: float, longitude: float, k: int) -> List[uuid.UUID]:
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    distances: List[Tuple[float, uuid.UUID]] = []
+    for station in stations:
+        lat2 = math.radians(station.latitude)
+        distances.append((haversine(lat, cos_lat, lon, lat2, math.cos(lat2),
+                                    math.radians(station.longitude)), station.id))
+    distances.sort()
+    return [station_id for _, station_id in distances[:k]]
+
+
+def _time(queries, run) -> List[float]:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        run(*query)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius", type=float, default=5.0, help="km, for the radius queries")
+    parser.add_argument("--cell-degrees", type=float, default=0.1)
+    parser.add_argument("--verify", type=int, default=20,
+                        help="Queries checked against (and timed for) the linear scan")
+    args = parser.parse_args()
+
+    stations = _stations(args.stations)
+    index = GeoIndex(args.cell_degrees)
+    started = time.perf_counter()
+    for station in stations:
+        index.add(station)
+    build_seconds = time.perf_counter() - started
+
+    points = [(random.uniform(*LATITUDES), random.uniform(*LONGITUDES))
+              for _ in range(args.queries)]
+    results = {
+        f"index k={args.k}": summarize(_time(
+            points, lambda lat, lon: index.nearest(lat, lon, args.k))),
+        f"index k={args.k} active": summarize(_time(
+            points, lambda lat, lon: index.nearest(lat, lon, args.k, status=StationStatus.ACTIVE))),
+        f"index {args.radius:g} km": summarize(_time(
+            points, lambda lat, lon: index.nearest(lat, lon, 100, args.radius))),
+    }
+
+    sample = points[:args.verify]
+    results[f"linear scan k={args.k}"] = summarize(_time(
+        sample, lambda lat, lon: _scan(stations, lat, lon, args.k)))
+    mismatches = sum(
+        [station.id for station, _ in index.nearest(lat, lon, args.k)]
+        != _scan(stations, lat, lon, args.k)
+        for lat, lon in sample)
+
+    print_table(f"{args.stations} stations, {args.queries} queries", results)
+    print(f"\nindex build: {build_seconds:.2f}s for {len(index)} stations")
+    print(f"mismatches vs linear scan: {mismatches} of {len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
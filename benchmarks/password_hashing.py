@@ -0,0 +1,75 @@
+"""Login burst benchmark: inline bcrypt vs the bounded hashing pool.
+
+Runs a burst of concurrent password verifications while a probe coroutine
+stands in for unrelated endpoints and measures how late it gets scheduled.
+
+    python -m benchmarks.password_hashing --logins 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from benchmarks.common import print_table, summarize
+
+from app.core import security
+
+
+async def _probe(stop: asyncio.Event, samples: List[float], interval: float) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def _run(mode: str, hashed: str, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    probe_samples: List[float] = []
+    stop = asyncio.Event()
+    shed = 0
+
+    async def login() -> None:
+        nonlocal shed
+        async with semaphore:
+            if mode == "inline":
+                security.verify_password("secret", hashed)
+                return
+            try:
+                await security.verify_password_async("secret", hashed)
+            except security.PasswordHasherBusy:
+                shed += 1
+
+    probe = asyncio.create_task(_probe(stop, probe_samples, 0.005))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    summary = summarize(probe_samples)
+    return {
+        "logins_per_s": logins / elapsed,
+        "shed": shed,
+        "probe_p50_ms": summary["p50_ms"],
+        "probe_p99_ms": summary["p99_ms"],
+        "probe_max_ms": summary["max_ms"],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    hashed = security.get_password_hash("secret")
+    rows = {}
+    for mode in ("inline", "pool"):
+        rows[mode] = await _run(mode, hashed, args.logins, args.concurrency)
+    security.shutdown_password_hasher()
+    print_table(
+        f"{args.logins} logins, concurrency {args.concurrency}", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""Type-ahead station search on the in-memory index vs a linear scan.
+
+Builds a SearchIndex of synthetic stations (no database needed) and times
+the query kinds an operator produces while typing: growing prefixes of a
+name word, a name word plus the start of another, location words, typos,
+and queries matching nothing. The linear scan checks every station's name
+and location for all query words as substrings:
+
+    python -m benchmarks.search --stations 100000 --queries 2000
+"""
+import argparse
+import random
+import string
+import time
+import uuid
+from typing import Callable, Dict, List
+
+from benchmarks.common import print_table, summarize
+
+from app.core.search_index import SearchIndex, normalize, words
+from app.core.station_events import StationSnapshot
+from app.models.station import StationStatus
+
+PLACES = [
+    "Zócalo", "Reforma", "Chapultepec", "Polanco", "Coyoacán", "Tlalpan", "Xochimilco",
+    "Insurgentes", "Revolución", "Juárez", "Hidalgo", "Morelos", "Zaragoza", "Obregón",
+    "Universidad", "Tecnológico", "Aeropuerto", "Terminal", "Central", "Norte", "Sur",
+    "Oriente", "Poniente", "Valle", "Lomas", "Bosques", "Pedregal", "Satélite", "Zapopan",
+    "Tlaquepaque", "Providencia", "Cumbres", "Contry", "Mitras", "Anáhuac", "Playa",
+]
+CITIES = [
+    "Ciudad de México", "Monterrey", "Guadalajara", "Puebla", "Tijuana", "León",
+    "Querétaro", "Mérida", "Cancún", "Toluca", "Chihuahua", "Hermosillo", "Saltillo",
+    "Aguascalientes", "Morelia", "Culiacán", "Veracruz", "Oaxaca", "Durango", "Tampico",
+]
+ZONES = ["Centro", "Norte", "Sur", "Oriente", "Poniente"]
+
+
+def _stations(count: int) -> List[StationSnapshot]:
+    return [StationSnapshot(
+        uuid.uuid4(),
+        f"Estación {random.choice(PLACES)} {random.choice(PLACES)} {i}",
+        f"{random.choice(CITIES)} {random.choice(ZONES)}",
+        150.0, StationStatus.ACTIVE, None, None,
+    ) for i in range(count)]
+
+
+def _typo(word: str) -> str:
+    """Drop a letter or swap two, keeping the first"""
+    i = random.randrange(1, len(word) - 1)
+    if random.random() < 0.5:
+        return word[:i] + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def _queries(stations: List[StationSnapshot], count: int) -> Dict[str, List[str]]:
+    names = [words(station.name) for station in random.sample(stations, count)]
+    return {
+        "prefix (1-6 chars)": [
+            random.choice(name[1:3])[:random.randint(1, 6)] for name in names],
+        "word + prefix": [
+            f"{name[1]} {name[2][:random.randint(1, 4)]}" for name in names],
+        "location": [
+            normalize(random.choice(CITIES)).split()[0] for _ in names],
+        "typo": [_typo(random.choice(name[1:3])) for name in names],
+        "no match": [
+            "".join(random.choices(string.ascii_lowercase, k=6)) for _ in names],
+    }
+
+
+def _scan(stations: List[StationSnapshot], texts: List[str], query: str, limit: int) -> List[uuid.UUID]:
+    terms = words(query)
+    found = []
+    for station, text in zip(stations, texts):
+        if all(term in text for term in terms):
+            found.append(station.id)
+            if len(found) == limit:
+                break
+    return found
+
+
+def _time(queries: List[str], run: Callable[[str], object]) -> List[float]:
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        run(query)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000, help="Per query kind")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    stations = _stations(args.stations)
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.reset(stations)
+    build_seconds = time.perf_counter() - started
+
+    queries = _queries(stations, args.queries)
+    results = {}
+    everything: List[float] = []
+    for kind, batch in queries.items():
+        samples = _time(batch, lambda query: index.search(query, args.limit))
+        everything += samples
+        results[kind] = summarize(samples)
+    results["all queries"] = summarize(everything)
+
+    texts = [normalize(f"{station.name} {station.location}") for station in stations]
+    sample = queries["word + prefix"][:20] + queries["no match"][:20]
+    results["linear scan"] = summarize(_time(
+        sample, lambda query: _scan(stations, texts, query, args.limit)))
+
+    print_table(f"{args.stations} stations, limit {args.limit}", results)
+    print(f"\nindex build: {build_seconds:.2f}s for {len(index)} stations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Fan-out of station change streams, against a running API.
+
+Opens --subscribers server-sent event streams on GET /stations/stream for
+a fresh location, then flips the status of that location's --stations
+stations --rounds times with PATCH /stations/bulk/status. Reports the delay
+from sending a bulk update to each subscriber receiving each event, missed
+events, and whether every subscriber ends on the stations' final status
+(events pending for a slow subscriber are coalesced, so with --interval 0
+fewer events than updates may arrive).
+
+    python -m benchmarks.stream_subscribers --base-url http://localhost:8000 \\
+        --subscribers 2000 --stations 50 --rounds 20
+
+Raise the open file limit (ulimit -n) above the number of subscribers on
+both the client and the server.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.bulk_stations import PREFIX, _login
+from benchmarks.common import print_table, summarize
+
+
+class Stream:
+    """One subscriber's received events"""
+
+    def __init__(self):
+        self.ready = asyncio.Event()
+        self.arrivals: List[float] = []
+        self.status: Dict[str, str] = {}
+        self.resets = 0
+
+
+async def _subscribe(client: httpx.AsyncClient, location: str, stream: Stream) -> None:
+    params = {"location": location, "snapshot": "false"}
+    async with client.stream("GET", f"{PREFIX}/stations/stream", params=params) as response:
+        response.raise_for_status()
+        event: Optional[str] = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                if event == "ready":
+                    stream.ready.set()
+                elif event == "reset":
+                    stream.resets += 1
+                elif event in ("created", "updated", "status"):
+                    data = json.loads(line[6:])
+                    stream.arrivals.append(time.perf_counter())
+                    stream.status[data["id"]] = data["status"]
+            elif not line:
+                event = None
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--stations", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="Seconds between bulk updates; 0 sends them back to back")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.subscribers + 10)
+    timeout = httpx.Timeout(60, read=None)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+        token = await _login(client, args.email, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+        location = f"Bench stream {uuid.uuid4().hex[:8]}"
+        response = await client.post(f"{PREFIX}/stations/bulk", headers=headers, json=[{
+            "name": f"Bench stream station {i}",
+            "location": location,
+            "max_capacity_kw": 150.0,
+        } for i in range(args.stations)])
+        response.raise_for_status()
+        ids = [item["id"] for item in response.json()]
+
+        streams = [Stream() for _ in range(args.subscribers)]
+        started = time.perf_counter()
+        tasks = [asyncio.ensure_future(_subscribe(client, location, stream)) for stream in streams]
+        await asyncio.wait_for(asyncio.gather(*(s.ready.wait() for s in streams)), 120)
+        connect_seconds = time.perf_counter() - started
+
+        sent: List[float] = []
+        status = "active"
+        for round_ in range(args.rounds):
+            status = "inactive" if round_ % 2 == 0 else "active"
+            sent.append(time.perf_counter())
+            response = await client.patch(f"{PREFIX}/stations/bulk/status", headers=headers,
+                                          json={"ids": ids, "status": status})
+            response.raise_for_status()
+            await asyncio.sleep(args.interval)
+
+        # Let the last events drain
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline and not all(
+                len(s.status) == len(ids) and set(s.status.values()) == {status}
+                for s in streams):
+            await asyncio.sleep(0.2)
+
+        stats = (await client.get(f"{PREFIX}/internal/stream", headers=headers)).json()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Attribute every arrival to the latest update sent before it
+    delays = []
+    for stream in streams:
+        for arrival in stream.arrivals:
+            delays.append(arrival - max(t for t in sent if t <= arrival))
+    expected = args.subscribers * args.stations * args.rounds
+    received = sum(len(s.arrivals) for s in streams)
+    converged = sum(
+        1 for s in streams
+        if len(s.status) == len(ids) and set(s.status.values()) == {status})
+
+    print_table(
+        f"{args.subscribers} subscribers, {args.stations} stations, {args.rounds} rounds",
+        {"delivery": summarize(delays)})
+    print(f"\nconnect + ready:  {connect_seconds:.2f}s")
+    print(f"events received:  {received} of {expected} ({expected - received} coalesced or missed)")
+    print(f"converged:        {converged} of {args.subscribers} subscribers")
+    print(f"resets:           {sum(s.resets for s in streams)}")
+    print(f"server:           {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""Throughput of the telemetry ingestion pipeline of a single worker.
+
+Seeds synthetic stations (location "Bench telemetry") into the configured
+database, then times, for the same readings:
+
+- parsing NDJSON request bodies (what POST /telemetry/readings does)
+- flushing the buffer with COPY and with a multi-row INSERT, rollup upsert
+  included
+
+and deletes the synthetic stations (and their telemetry) again. Run
+``alembic upgrade head`` first and use a non-echoing DB profile:
+
+    DB_PROFILE=prod python -m benchmarks.telemetry_ingest --readings 200000 --stations 1000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from benchmarks.common import print_table
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import UUID, insert
+
+from app.core.telemetry import TelemetryIngestor
+from app.db.expressions import in_array
+from app.db.session import AsyncSessionLocal, engine
+from app.models.station import Station, StationStatus
+from app.models.telemetry import StationReading
+from app.routes.telemetry import _parse_readings
+
+LOCATION = "Bench telemetry"
+
+
+async def _seed(count: int) -> List[uuid.UUID]:
+    ids = [uuid.uuid4() for _ in range(count)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Station).values([{
+            "id": station_id,
+            "name": f"Bench telemetry station {i}",
+            "location": LOCATION,
+            "max_capacity_kw": 150.0,
+            "status": StationStatus.ACTIVE,
+        } for i, station_id in enumerate(ids)]))
+        await db.commit()
+    return ids
+
+
+def _bodies(station_ids: List[uuid.UUID], readings: int, batch: int) -> List[bytes]:
+    """NDJSON bodies: one reading per station every 10 seconds, going back in time"""
+    now = datetime.now(timezone.utc)
+    lines = [json.dumps({
+        "station_id": str(station_ids[i % len(station_ids)]),
+        "recorded_at": (now - timedelta(seconds=10 * (i // len(station_ids)))).isoformat(),
+        "power_kw": round(random.uniform(0, 150), 2),
+        "energy_kwh": round(random.uniform(0, 0.4), 3),
+    }).encode() for i in range(readings)]
+    return [b"\n".join(lines[i:i + batch]) for i in range(0, readings, batch)]
+
+
+async def _flush(rows: list, flush_rows: int, use_copy: bool) -> float:
+    ingestor = TelemetryIngestor(
+        flush_rows=flush_rows, max_buffered=len(rows), use_copy=use_copy)
+    ingestor.add(rows)
+    started = time.perf_counter()
+    written = await ingestor.flush()
+    elapsed = time.perf_counter() - started
+    if written != len(rows):
+        raise RuntimeError(f"Wrote {written} of {len(rows)} readings")
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readings", type=int, default=200000)
+    parser.add_argument("--stations", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=5000,
+                        help="Readings per request body")
+    parser.add_argument("--flush-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    station_ids = await _seed(args.stations)
+    try:
+        bodies = _bodies(station_ids, args.readings, args.batch)
+
+        started = time.perf_counter()
+        rows = [(r.station_id, r.recorded_at, r.power_kw, r.energy_kwh)
+                for body in bodies
+                for r in _parse_readings(body, "application/x-ndjson")]
+        parse_seconds = time.perf_counter() - started
+
+        results: Dict[str, Dict[str, float]] = {
+            "parse": {"seconds": parse_seconds,
+                      "per_second": len(rows) / parse_seconds},
+        }
+        for label, use_copy in (("flush (COPY)", True), ("flush (INSERT)", False)):
+            seconds = await _flush(rows, args.flush_rows, use_copy)
+            results[label] = {"seconds": seconds, "per_second": len(rows) / seconds}
+        copy_seconds = results["flush (COPY)"]["seconds"]
+        results["parse + flush (COPY)"] = {
+            "seconds": parse_seconds + copy_seconds,
+            "per_second": len(rows) / (parse_seconds + copy_seconds),
+        }
+        print_table(f"{len(rows)} readings, {args.stations} stations", results)
+    finally:
+        async with AsyncSessionLocal() as db:
+            # Rollups go with the stations; raw readings have no foreign key
+            await db.execute(delete(StationReading).where(
+                in_array(StationReading.station_id, station_ids, UUID(as_uuid=True)))
+                .execution_options(synchronize_session=False))
+            await db.execute(delete(Station).where(Station.location == LOCATION))
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,12 @@ sleep 5
 echo "Running database migrations..."
 alembic upgrade head
 
-# Start the application
+# Seed fixtures once, outside the request-serving process
+echo "Seeding fixtures..."
+python -m app.core.init_data
+export SEED_ON_STARTUP=false
+
+# Start the application; workers keep each other's in-process state
+# current through the invalidation bus
 echo "Starting application..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "${WEB_CONCURRENCY:-1}"
\ No newline at end of file
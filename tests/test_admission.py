@@ -0,0 +1,37 @@
+import ipaddress
+
+import pytest
+
+from app.core.admission import _client_key, admission_control
+
+
+def scope(peer, *forwarded):
+    return {"client": (peer, 50000),
+            "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded]}
+
+
+@pytest.fixture
+def trusted_proxies(monkeypatch):
+    admission_control.applies("/")
+    monkeypatch.setattr(admission_control, "trusted_proxies",
+                        [ipaddress.ip_network("10.0.0.0/8")])
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(monkeypatch):
+    admission_control.applies("/")
+    monkeypatch.setattr(admission_control, "trusted_proxies", [])
+    assert _client_key(scope("10.0.0.1", "203.0.113.7")) == "addr:10.0.0.1"
+
+
+@pytest.mark.parametrize("peer, forwarded, key", [
+    ("10.0.0.1", ["203.0.113.7"], "addr:203.0.113.7"),
+    # Entries left of the first untrusted one may be forged by the client
+    ("10.0.0.1", ["198.51.100.1, 203.0.113.7, 10.0.0.2"], "addr:203.0.113.7"),
+    ("10.0.0.1", ["198.51.100.1", "203.0.113.7"], "addr:203.0.113.7"),
+    ("10.0.0.1", [], "addr:10.0.0.1"),
+    ("10.0.0.1", ["10.0.0.3"], "addr:10.0.0.3"),
+    # Only the proxies' own header is believed
+    ("192.0.2.5", ["203.0.113.7"], "addr:192.0.2.5"),
+])
+def test_client_address_behind_trusted_proxies(trusted_proxies, peer, forwarded, key):
+    assert _client_key(scope(peer, *forwarded)) == key
@@ -0,0 +1,52 @@
+import uuid
+
+import pytest
+
+from app.core.analytics_state import AnalyticsState
+from app.core.station_events import StationSnapshot
+from app.models.station import StationStatus
+
+pytestmark = pytest.mark.anyio
+
+
+def snapshot(status=StationStatus.ACTIVE, **fields) -> StationSnapshot:
+    return StationSnapshot(**{
+        "id": uuid.uuid4(), "name": "Station", "location": "Monterrey",
+        "max_capacity_kw": 50.0, "status": status, "latitude": None, "longitude": None,
+        **fields})
+
+
+class RacingSession:
+    """Publishes changes to the state while its query is awaited"""
+
+    def __init__(self, state, rows, changes):
+        self.state, self.rows, self.changes = state, rows, changes
+
+    async def execute(self, _):
+        self.state.apply(self.changes)
+        return self
+
+    def all(self):
+        return self.rows
+
+
+@pytest.mark.parametrize("read_after_commit", [False, True])
+async def test_load_keeps_changes_published_while_querying(read_after_commit):
+    state = AnalyticsState()
+    station = snapshot()
+    await state.load(RacingSession(state, [station], []))
+
+    added = snapshot(location="Saltillo")
+    deactivated = station._replace(status=StationStatus.INACTIVE)
+    changes = [(None, added), (station, deactivated)]
+    # The read may or may not have seen the changes' commit
+    rows = [deactivated, added] if read_after_commit else [station]
+    await state.load(RacingSession(state, rows, changes))
+
+    assert state.status_summary() == {"active": 1, "inactive": 1}
+    assert state.location_stats() == [
+        {"location": "Monterrey", "total_stations": 1, "avg_capacity": 50.0,
+         "active_stations": 0},
+        {"location": "Saltillo", "total_stations": 1, "avg_capacity": 50.0,
+         "active_stations": 1},
+    ]
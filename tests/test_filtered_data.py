@@ -0,0 +1,39 @@
+import uuid
+
+import pytest
+from asyncpg.pgproto.pgproto import UUID as AsyncpgUUID
+
+from sqlalchemy import delete
+
+from app.core.responses import dumps
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station
+
+pytestmark = pytest.mark.anyio
+
+
+def test_dumps_encodes_asyncpg_uuids():
+    # orjson only knows uuid.UUID itself, not asyncpg's subclass
+    id = AsyncpgUUID("0cefcf7a-469f-4b4e-89ed-2ef327cccefa")
+    assert dumps({"id": id}) == b'{"id":"0cefcf7a-469f-4b4e-89ed-2ef327cccefa"}'
+
+
+async def test_filtered_data_encodes_rows(client, auth_headers):
+    response = await client.post("/api/v1/stations/", headers=auth_headers, json={
+        "name": f"Filtered {uuid.uuid4().hex}", "location": "Test",
+        "max_capacity_kw": 50.0})
+    assert response.status_code == 200, response.text
+    station = response.json()
+
+    try:
+        response = await client.get(
+            "/api/v1/analytics/stations/filtered-data",
+            params={"location": "Test"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert {"id": station["id"], "name": station["name"], "location": "Test",
+                "max_capacity_kw": 50.0, "status": station["status"]} in response.json()
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Station).where(Station.id == uuid.UUID(station["id"])))
+            await db.commit()
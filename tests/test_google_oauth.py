@@ -0,0 +1,244 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+import rsa
+from jose import jwk, jwt
+from sqlalchemy import delete
+
+from app.core import google_jwks as google_jwks_module
+from app.core.config import settings
+from app.core.google_jwks import MIN_REFRESH_INTERVAL, GoogleJWKS, GoogleKeysUnavailable
+from app.core.http import close_http_client
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.routes import oauth
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+pytestmark = pytest.mark.anyio
+
+
+class SigningKey:
+    def __init__(self):
+        public, private = rsa.newkeys(1024)
+        self.kid = uuid.uuid4().hex
+        self.private_pem = private.save_pkcs1().decode()
+        self.jwk = {
+            **jwk.construct(public.save_pkcs1().decode(), "RS256").to_dict(),
+            "kid": self.kid, "use": "sig",
+        }
+
+    def id_token(self, **claims: Any) -> str:
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": CLIENT_ID,
+            "sub": "1234567890",
+            "email": "someone@example.com",
+            "name": "Some One",
+            "iat": int(time.time()),
+            "exp": int(time.time()) + 3600,
+            **claims,
+        }
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+
+class FakeGoogle:
+    """Stand-in for Google's token and certs endpoints, on a local port"""
+
+    def __init__(self):
+        self.keys: List[SigningKey] = []
+        self.max_age = 3600
+        self.certs_status = 200
+        self.id_token: Optional[str] = None
+        self.certs_requests = 0
+        self.token_requests: List[Dict[str, str]] = []
+
+        google = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/certs":
+                    return self._send(404, {})
+                google.certs_requests += 1
+                self._send(google.certs_status, {"keys": [key.jwk for key in google.keys]},
+                           {"Cache-Control": f"public, max-age={google.max_age}"})
+
+            def do_POST(self):
+                if self.path != "/token":
+                    return self._send(404, {})
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                google.token_requests.append(dict(httpx.QueryParams(body)))
+                self._send(200, {"access_token": "access", "id_token": google.id_token})
+
+            def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def google(monkeypatch):
+    fake = FakeGoogle()
+    monkeypatch.setattr(settings, "GOOGLE_CERTS_URL", f"{fake.url}/certs")
+    monkeypatch.setattr(settings, "GOOGLE_TOKEN_URL", f"{fake.url}/token")
+    monkeypatch.setattr(settings, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    monkeypatch.setattr(settings, "GOOGLE_CLIENT_SECRET", "secret")
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(google_jwks_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+async def jwks(monkeypatch):
+    keys = GoogleJWKS()
+    monkeypatch.setattr(oauth, "google_jwks", keys)
+    yield keys
+    # The pooled client belongs to this test's event loop
+    await close_http_client()
+
+
+async def test_verifies_with_cached_keys(google, clock, jwks):
+    key = SigningKey()
+    google.keys = [key]
+
+    for _ in range(3):
+        claims = await jwks.verify_id_token(key.id_token(), CLIENT_ID)
+        assert claims["email"] == "someone@example.com"
+    assert google.certs_requests == 1
+
+
+async def test_refreshes_when_max_age_expires(google, clock, jwks):
+    old, new = SigningKey(), SigningKey()
+    google.keys = [old]
+    google.max_age = 300
+    await jwks.verify_id_token(old.id_token(), CLIENT_ID)
+
+    # Google rotates its keys; the cached set is used until it expires
+    google.keys = [new]
+    clock.now += 299
+    await jwks.verify_id_token(old.id_token(), CLIENT_ID)
+    assert google.certs_requests == 1
+
+    clock.now += 1
+    await jwks.verify_id_token(new.id_token(), CLIENT_ID)
+    assert google.certs_requests == 2
+    with pytest.raises(ValueError, match="Unknown signing key"):
+        await jwks.verify_id_token(old.id_token(), CLIENT_ID)
+
+
+async def test_unknown_kid_refreshes_at_most_once_a_minute(google, clock, jwks):
+    old, new = SigningKey(), SigningKey()
+    google.keys = [old]
+    await jwks.verify_id_token(old.id_token(), CLIENT_ID)
+
+    # Keys rotated long before the cached set expires
+    google.keys = [old, new]
+    with pytest.raises(ValueError, match="Unknown signing key"):
+        await jwks.verify_id_token(new.id_token(), CLIENT_ID)
+    assert google.certs_requests == 1
+
+    clock.now += MIN_REFRESH_INTERVAL
+    await jwks.verify_id_token(new.id_token(), CLIENT_ID)
+    assert google.certs_requests == 2
+
+    # Tokens with made-up key ids cannot make every request fetch the keys
+    forged = SigningKey()
+    for _ in range(5):
+        with pytest.raises(ValueError, match="Unknown signing key"):
+            await jwks.verify_id_token(forged.id_token(), CLIENT_ID)
+        clock.now += 10
+    assert google.certs_requests == 2
+    clock.now += 10
+    with pytest.raises(ValueError, match="Unknown signing key"):
+        await jwks.verify_id_token(forged.id_token(), CLIENT_ID)
+    assert google.certs_requests == 3
+
+
+async def test_rejects_wrong_audience_and_issuer(google, clock, jwks):
+    key = SigningKey()
+    google.keys = [key]
+    with pytest.raises(ValueError):
+        await jwks.verify_id_token(key.id_token(aud="someone-else"), CLIENT_ID)
+    with pytest.raises(ValueError, match="Wrong issuer"):
+        await jwks.verify_id_token(key.id_token(iss="https://evil.example.com"), CLIENT_ID)
+
+
+async def test_failed_fetch_raises(google, clock, jwks):
+    google.certs_status = 500
+    with pytest.raises(GoogleKeysUnavailable):
+        await jwks.verify_id_token(SigningKey().id_token(), CLIENT_ID)
+
+
+async def test_callback_answers_502_when_keys_unavailable(google, clock, jwks, client):
+    google.certs_status = 503
+    google.id_token = SigningKey().id_token()
+
+    response = await client.get("/api/v1/oauth/google/callback", params={"code": "abc"})
+
+    assert response.status_code == 502
+    assert google.token_requests[0]["code"] == "abc"
+
+
+async def test_callback_rejects_invalid_token(google, clock, jwks, client):
+    key = SigningKey()
+    google.keys = [key]
+    google.id_token = key.id_token(aud="someone-else")
+
+    response = await client.get("/api/v1/oauth/google/callback", params={"code": "abc"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid ID token")
+
+
+async def test_callback_signs_in(google, clock, jwks, client, database):
+    key = SigningKey()
+    google.keys = [key]
+    email = f"{uuid.uuid4().hex}@example.com"
+    google.id_token = key.id_token(email=email, sub=uuid.uuid4().hex)
+
+    try:
+        response = await client.get("/api/v1/oauth/google/callback", params={"code": "abc"})
+        assert response.status_code == 200
+        assert response.json()["user"]["email"] == email
+        assert response.json()["access_token"]
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.email == email))
+            await db.commit()
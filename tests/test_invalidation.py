@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.core.invalidation import InvalidationBus, MemoryTransport
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakyTransport(MemoryTransport):
+    """Memory transport whose first connection attempts fail"""
+
+    def __init__(self, hub, failures: int):
+        super().__init__(hub)
+        self.failures = failures
+
+    async def connect(self, on_message):
+        await asyncio.sleep(0.01)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("refused")
+        await super().connect(on_message)
+
+
+async def test_start_returns_once_listening():
+    hub = []
+    sender, receiver = InvalidationBus(), InvalidationBus()
+    received = []
+    receiver.on("topic", received.extend)
+    await sender.start("memory", MemoryTransport(hub))
+    await receiver.start("memory", FlakyTransport(hub, failures=0))
+
+    # Published right after start returns, e.g. while state is being loaded
+    assert receiver.connected
+    sender.publish("topic", ["item"])
+    await asyncio.sleep(0.05)
+    assert received == ["item"]
+
+    await sender.stop()
+    await receiver.stop()
+
+
+async def test_resyncs_when_first_connection_fails():
+    bus = InvalidationBus()
+    resyncs = []
+    bus.on_resync(lambda: resyncs.append(True))
+    await bus.start("memory", FlakyTransport([], failures=1))
+
+    assert not bus.connected
+    for _ in range(100):
+        if bus.connected:
+            break
+        await asyncio.sleep(0.01)
+    assert bus.connected and resyncs == [True]
+    await bus.stop()
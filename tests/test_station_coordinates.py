@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+from app.core.geo_index import nearest_from_db
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def station_ids(database):
+    ids = []
+    yield ids
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Station).where(Station.id.in_(ids)))
+        await db.commit()
+
+
+async def create(client, headers, station_ids, **fields) -> dict:
+    response = await client.post("/api/v1/stations/", headers=headers, json={
+        "name": f"Coordinates {uuid.uuid4().hex}", "location": "Test",
+        "max_capacity_kw": 50.0, **fields})
+    assert response.status_code == 200, response.text
+    station_ids.append(uuid.UUID(response.json()["id"]))
+    return response.json()
+
+
+async def test_update_cannot_leave_a_single_coordinate(client, auth_headers, station_ids):
+    located = await create(client, auth_headers, station_ids, latitude=10.0, longitude=20.0)
+    unlocated = await create(client, auth_headers, station_ids)
+
+    for station, body in ((located, {"latitude": None}), (unlocated, {"longitude": 5.0})):
+        response = await client.patch(
+            f"/api/v1/stations/{station['id']}", headers=auth_headers, json=body)
+        assert response.status_code == 422
+
+    response = await client.patch(
+        f"/api/v1/stations/{located['id']}", headers=auth_headers, json={"latitude": 11.0})
+    assert response.status_code == 200
+    assert (response.json()["latitude"], response.json()["longitude"]) == (11.0, 20.0)
+
+    response = await client.patch(
+        "/api/v1/stations/bulk", headers=auth_headers,
+        json=[{"id": located["id"], "name": "Renamed"},
+              {"id": unlocated["id"], "latitude": 1.0}])
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Item 1:")
+
+
+async def test_nearest_from_db_skips_stations_without_longitude(station_ids):
+    async with AsyncSessionLocal() as db:
+        station = Station(name=f"Polar {uuid.uuid4().hex}", location="Test",
+                          max_capacity_kw=50.0, latitude=89.95, longitude=None)
+        db.add(station)
+        await db.commit()
+        station_ids.append(station.id)
+
+        # So close to the pole the bounding box does not bound longitudes
+        found = await nearest_from_db(db, 89.9, 0.0, k=5, radius_km=50)
+
+    assert station.id not in [snapshot.id for snapshot, _ in found]
@@ -0,0 +1,61 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.station_events import StationSnapshot
+from app.core.station_stream import StationBroker
+from app.models.station import StationStatus
+
+pytestmark = pytest.mark.anyio
+
+
+def snapshot(location: str, id: uuid.UUID = None, status=StationStatus.ACTIVE) -> StationSnapshot:
+    return StationSnapshot(id or uuid.uuid4(), "Station", location, 50.0, status, None, None)
+
+
+async def settle(broker: StationBroker) -> None:
+    while broker.stats()["queued"]:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+async def test_replay_matches_live_delivery_of_moved_stations():
+    broker = StationBroker()
+    before = snapshot("North")
+    after = before._replace(location="South")
+
+    live = broker.subscribe("North")
+    start = broker.event_id(broker.seq)
+    broker.on_station_changes([(before, after), (None, snapshot("East"))])
+    await settle(broker)
+
+    delivered = [event.station_id for event in live.drain()]
+    replayed = [event.station_id for event in broker.replay_since(start, "North")]
+    assert delivered == replayed == [before.id]
+    await broker.stop()
+
+
+async def test_fan_out_runs_after_the_writer():
+    broker = StationBroker()
+    subscriber = broker.subscribe()
+
+    broker.on_station_changes([(None, snapshot("North"))])
+    assert not subscriber.pending and broker.seq == 0
+
+    await settle(broker)
+    assert broker.seq == 1 and len(subscriber.drain()) == 1
+    await broker.stop()
+
+
+async def test_resume_neither_repeats_nor_misses_queued_changes():
+    broker = StationBroker()
+    first = broker.event_id(broker.seq)
+    broker.on_station_changes([(None, snapshot("North"))])
+
+    # Resumed while the change is still queued: it arrives live, not replayed
+    subscriber = broker.subscribe()
+    assert broker.replay_since(first) == []
+    await settle(broker)
+    assert [event.seq for event in subscriber.drain()] == [1]
+    await broker.stop()
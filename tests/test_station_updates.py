@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def station(client, auth_headers):
+    response = await client.post("/api/v1/stations/", headers=auth_headers, json={
+        "name": f"Updates {uuid.uuid4().hex}", "location": "Test", "max_capacity_kw": 50.0})
+    assert response.status_code == 200, response.text
+    station = response.json()
+    yield station
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Station).where(Station.id == uuid.UUID(station["id"])))
+        await db.commit()
+
+
+@pytest.mark.parametrize("field", ["name", "location", "max_capacity_kw", "status"])
+async def test_update_rejects_null_for_required_fields(client, auth_headers, station, field):
+    response = await client.patch(
+        f"/api/v1/stations/{station['id']}", headers=auth_headers, json={field: None})
+    assert response.status_code == 422, response.text
+
+    response = await client.patch(
+        "/api/v1/stations/bulk", headers=auth_headers,
+        json=[{"id": station["id"], field: None}])
+    assert response.status_code == 422, response.text
+
+
+async def test_duplicate_name_and_location_is_a_conflict(client, auth_headers, station):
+    response = await client.post("/api/v1/stations/", headers=auth_headers, json={
+        "name": f"Updates {uuid.uuid4().hex}", "location": "Test", "max_capacity_kw": 50.0})
+    assert response.status_code == 200, response.text
+    other = response.json()
+    try:
+        response = await client.patch(
+            f"/api/v1/stations/{other['id']}", headers=auth_headers,
+            json={"name": station["name"]})
+        assert response.status_code == 409
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Station).where(Station.id == uuid.UUID(other["id"])))
+            await db.commit()
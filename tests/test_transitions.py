@@ -0,0 +1,165 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.core import transitions
+from app.core.invalidation import SCHEDULES, TRANSITIONS, InvalidationBus, MemoryTransport
+from app.core.transitions import (
+    PendingSchedule,
+    PendingTransition,
+    TransitionEngine,
+    _weekdays,
+    cron_trigger,
+    supersede_transitions,
+)
+from app.db.session import AsyncSessionLocal
+from app.models.station import Station, StationStatus
+from app.models.station_transition import StationStatusTransition
+
+EVERY_DAY = "sun,mon,tue,wed,thu,fri,sat"
+
+
+@pytest.mark.parametrize("field, days", [
+    ("*", EVERY_DAY),
+    ("*/2", "sun,tue,thu,sat"),
+    ("*/3", "sun,wed,sat"),
+    ("0-4/2", "sun,tue,thu"),
+    ("1-5/2", "mon,wed,fri"),
+    ("0", "sun"),
+    ("7", "sun"),
+    ("0-6", EVERY_DAY),
+    ("0-7", EVERY_DAY),
+    ("5-7", "sun,fri,sat"),
+    ("mon-fri", "mon,tue,wed,thu,fri"),
+    ("6,0", "sun,sat"),
+])
+def test_weekdays_in_crontab_week(field, days):
+    assert _weekdays(field) == days
+
+
+@pytest.mark.parametrize("field", ["8", "6-1", "*/0", "*/x", "someday"])
+def test_invalid_weekdays(field):
+    with pytest.raises(ValueError):
+        _weekdays(field)
+
+
+def test_cron_trigger_steps_from_sunday():
+    trigger = cron_trigger("0 8 * * */2", "UTC")
+    # 2026-10-18 is a Sunday
+    fire = trigger.get_next_fire_time(None, datetime(2026, 10, 18, 9, tzinfo=timezone.utc))
+    days = []
+    for _ in range(4):
+        days.append(fire.strftime("%a"))
+        fire = trigger.get_next_fire_time(fire, fire.replace(hour=9))
+    assert days == ["Tue", "Thu", "Sat", "Sun"]
+
+
+@pytest.fixture
+async def station_id(client, auth_headers):
+    response = await client.post("/api/v1/stations/", headers=auth_headers, json={
+        "name": f"Transitions {uuid.uuid4().hex}", "location": "Test",
+        "max_capacity_kw": 50.0})
+    assert response.status_code == 200, response.text
+    station_id = response.json()["id"]
+    yield station_id
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Station).where(Station.id == uuid.UUID(station_id)))
+        await db.commit()
+
+
+@pytest.mark.anyio
+async def test_changes_due_at_different_times_are_kept(client, auth_headers, station_id):
+    # A maintenance window: out of service in an hour, back in nine
+    jobs = []
+    for status, delay in (("inactive", 3600), ("active", 9 * 3600)):
+        response = await client.post(
+            f"/api/v1/stations/{station_id}/schedule-status-change",
+            headers=auth_headers, json={"status": status, "delay_seconds": delay})
+        assert response.status_code == 200, response.text
+        jobs.append((response.json()["job_id"], status))
+
+    response = await client.get(
+        "/api/v1/stations/scheduled-changes", headers=auth_headers,
+        params={"station_id": station_id})
+    assert response.status_code == 200
+    assert [(c["id"], c["status"]) for c in response.json()] == jobs
+
+
+@pytest.mark.anyio
+async def test_change_replaces_the_one_due_at_the_same_time(station_id):
+    due_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    station = uuid.UUID(station_id)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            StationStatusTransition(station_id=station, target_status=StationStatus.INACTIVE,
+                                    due_at=due_at),
+            StationStatusTransition(station_id=station, target_status=StationStatus.INACTIVE,
+                                    due_at=due_at + timedelta(hours=1)),
+        ])
+        await db.commit()
+
+        replacement = StationStatusTransition(
+            station_id=station, target_status=StationStatus.ACTIVE, due_at=due_at)
+        await supersede_transitions(db, [replacement])
+        db.add(replacement)
+        await db.commit()
+
+        result = await db.execute(
+            select(StationStatusTransition.due_at, StationStatusTransition.target_status)
+            .where(StationStatusTransition.station_id == station)
+            .order_by(StationStatusTransition.due_at))
+        assert result.all() == [(due_at, StationStatus.ACTIVE),
+                                (due_at + timedelta(hours=1), StationStatus.INACTIVE)]
+
+
+def fire_times(cron, after, count):
+    trigger = cron_trigger(cron, "UTC")
+    times = []
+    fire = trigger.get_next_fire_time(None, after)
+    while len(times) < count:
+        times.append(fire)
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(seconds=1))
+    return times
+
+
+def test_cron_runs_on_either_restricted_day_field():
+    # The 1st of the month or any Sunday, like crontab
+    times = fire_times("0 22 1 * 0", datetime(2026, 10, 18, 23, tzinfo=timezone.utc), 3)
+    assert [t.date().isoformat() for t in times] == ["2026-10-25", "2026-11-01", "2026-11-08"]
+
+
+def test_cron_with_one_restricted_day_field():
+    times = fire_times("0 22 * * 0", datetime(2026, 10, 18, 23, tzinfo=timezone.utc), 2)
+    assert [t.date().isoformat() for t in times] == ["2026-10-25", "2026-11-01"]
+    times = fire_times("0 22 1 * *", datetime(2026, 10, 18, 23, tzinfo=timezone.utc), 2)
+    assert [t.date().isoformat() for t in times] == ["2026-11-01", "2026-12-01"]
+
+
+@pytest.mark.anyio
+async def test_pushed_changes_reach_the_other_workers(monkeypatch):
+    hub = []
+    bus, peer_bus = InvalidationBus(), InvalidationBus()
+    engine, peer = TransitionEngine(), TransitionEngine()
+    monkeypatch.setattr(transitions, "invalidation_bus", bus)
+    monkeypatch.setattr(transitions, "transition_engine", peer)
+    peer_bus.on(TRANSITIONS, transitions._receive_transitions)
+    peer_bus.on(SCHEDULES, transitions._receive_schedules)
+    await bus.start("memory", MemoryTransport(hub))
+    await peer_bus.start("memory", MemoryTransport(hub))
+    try:
+        due_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        pending = [PendingTransition(due_at + timedelta(minutes=i), uuid.uuid4(),
+                                     uuid.uuid4(), StationStatus.INACTIVE) for i in range(3)]
+        schedule = PendingSchedule(due_at, uuid.uuid4())
+        engine.push(*pending)
+        engine.push_schedule(schedule)
+        await asyncio.sleep(0.05)
+
+        assert sorted(peer._heap) == sorted(engine._heap) == pending
+        assert peer._schedules == engine._schedules == [schedule]
+    finally:
+        await bus.stop()
+        await peer_bus.stop()